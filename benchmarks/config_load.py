@@ -0,0 +1,76 @@
+"""Measures the config phase of the startup: parsing every config file for
+each use, and loading them through the cached ConfigLoader from a cold and
+a warm disk cache. Both use the same yaml loader class, so only the caching
+is measured.
+
+Usage: python benchmarks/config_load.py [repeat]
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pixel_farm.config import ConfigLoader, ConfigSafeLoader  # noqa: E402
+
+#: The config files read at startup, how often they are read and whether
+#: they have several documents
+FILES = (("combined.yaml", 4, False), ("fruits.yaml", 1, False),
+         ("objects/entities.yaml", 1, True))
+
+
+def load_each_time():
+    """Parses the files for each use, like the separate load_* calls did"""
+    for name, uses, documents in FILES:
+        for _ in range(uses):
+            with open(os.path.join(ROOT, name), "r") as stream:
+                if documents:
+                    list(yaml.load_all(stream, Loader=ConfigSafeLoader))
+                else:
+                    yaml.load(stream, Loader=ConfigSafeLoader)
+
+
+def load_cached(cache_dir):
+    """Loads the files with a new ConfigLoader"""
+    loader = ConfigLoader(cache_dir)
+    for name, uses, documents in FILES:
+        load = loader.load_all if documents else loader.load
+        for _ in range(uses):
+            load(os.path.join(ROOT, name))
+    return loader
+
+
+def measure(function, *args):
+    """Returns the seconds a call takes"""
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print("Loader: %s" % ConfigSafeLoader.__mro__[1].__name__)
+    uncached = cold = warm = 0.0
+    for _ in range(repeat):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            uncached += measure(load_each_time)
+            cold += measure(load_cached, cache_dir)
+            warm += measure(load_cached, cache_dir)
+        finally:
+            shutil.rmtree(cache_dir)
+    print("%-24s %9.3fms" % ("parse on every use", uncached / repeat * 1000))
+    print("%-24s %9.3fms" % ("cold cache", cold / repeat * 1000))
+    print("%-24s %9.3fms" % ("warm cache", warm / repeat * 1000))
+
+
+if __name__ == "__main__":
+    main()
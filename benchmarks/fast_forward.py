@@ -0,0 +1,80 @@
+"""Compares advancing crops day by day with fast forwarding them.
+
+Usage: python benchmarks/fast_forward.py [crops]
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pixel_farm import growth  # noqa: E402
+from pixel_farm.fruits import load_fruits  # noqa: E402
+
+TOMATO = load_fruits(os.path.join(ROOT, "fruits.yaml"))["tomato"]
+
+
+class Crop(object):
+    """Stand-in for the Crop component"""
+    __slots__ = ("water", "sun", "days", "stage", "ripe", "harvested")
+
+    def __init__(self, seed):
+        self.water = seed % 9
+        self.sun = seed % 7
+        self.days = seed % 3
+        self.stage = seed % 3
+        self.ripe = False
+        self.harvested = False
+
+
+class Field(object):
+    """Stand-in for the Field component"""
+    __slots__ = ("water", "sun")
+
+    def __init__(self, seed):
+        self.water = seed % 5
+        self.sun = seed % 4
+
+
+def make_farm(count):
+    """Creates crops and the fields they are on"""
+    return [(Crop(i), Field(i)) for i in range(count)]
+
+
+def step_days(farm, days):
+    """Advances the crops one day at a time"""
+    for crop, field in farm:
+        for _ in range(days):
+            growth.advance_day(crop, field)
+            growth.update_stage(crop, TOMATO)
+
+
+def fast_forward_days(farm, days):
+    """Advances the crops by jumping to their final state"""
+    for crop, field in farm:
+        growth.fast_forward(crop, TOMATO, field, days)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print("%d crops" % count)
+    print("%6s %12s %12s %8s" % ("days", "stepped", "forwarded", "speedup"))
+    for days in (1, 10, 365):
+        stepped = min(timeit.repeat(
+            "step_days(farm, %d)" % days,
+            setup="farm = make_farm(%d)" % count,
+            globals=globals(), number=1, repeat=3))
+        forwarded = min(timeit.repeat(
+            "fast_forward_days(farm, %d)" % days,
+            setup="farm = make_farm(%d)" % count,
+            globals=globals(), number=1, repeat=3))
+        print("%6d %11.4fs %11.4fs %7.1fx" % (days, stepped, forwarded,
+                                              stepped / forwarded))
+
+
+if __name__ == '__main__':
+    main()
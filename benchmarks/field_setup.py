@@ -0,0 +1,152 @@
+"""Compares creating the entities of the fields of a map one at a time,
+with the agents updated after each field, with creating them in bulk from
+templates, with the agents updated once for the map.
+
+Usage: python benchmarks/field_setup.py [size ...]
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pixel_farm.autotile import border_tiles  # noqa: E402
+from pixel_farm.field_grid import FieldGrid  # noqa: E402
+from pixel_farm.field_layout import (border_entities, cell_entities,  # noqa
+                                     create_entities)
+
+SIZES = (15, 50, 100, 250, 500)
+
+#: The number of fields of each size on the map
+FIELDS = 2
+
+
+class World(object):
+    """Stand-in for the world and the application. Entities copy the
+    component values like fife_rpg does, and updating the agents of a map
+    looks at every agent of it and creates the missing instances."""
+
+    def __init__(self):
+        self.entities = {}
+        self.instances = set()
+        self.agent_updates = 0
+
+    def get_entity(self, identifier):
+        return self.entities.get(identifier)
+
+    def get_or_create_entity(self, identifier, comp_data):
+        entity = self.entities.get(identifier)
+        if entity is None:
+            entity = self.entities[identifier] = {
+                name: dict(data) for name, data in comp_data.items()}
+        return entity
+
+    def update_agents(self, map_name):
+        self.agent_updates += 1
+        for identifier, entity in self.entities.items():
+            agent = entity.get("Agent")
+            if agent is not None and agent["map"] == map_name:
+                if identifier not in self.instances:
+                    self.instances.add(identifier)
+
+
+def field_data(index, size):
+    """Returns the data of a square field, next to the fields before it"""
+    return {"map": "farm", "layer": "fields", "vert_start": 0,
+            "vert_size": size, "horz_start": index * (size + 2),
+            "horz_size": size}
+
+
+def layout(field_name, data):
+    """Returns the borders and cells of a field"""
+    grid = FieldGrid(field_name, data)
+    borders = border_entities(field_name, data, border_tiles(grid))
+    cells = cell_entities(field_name, data, grid.occupied_cells())
+    return borders, cells
+
+
+def setup_single(world, field_name, data):
+    """Creates the entities one at a time, with their own component data,
+    and updates the agents of the map"""
+    borders, cells = layout(field_name, data)
+    identifiers, positions, rotations = borders
+    for identifier, position, rotation in zip(identifiers, positions,
+                                              rotations):
+        comp_data = {}
+        agent_data = comp_data["Agent"] = {}
+        agent_data["map"] = data["map"]
+        agent_data["layer"] = data["layer"]
+        agent_data["namespace"] = "LPC"
+        agent_data["gfx"] = "grass/soil"
+        agent_data["rotation"] = rotation
+        agent_data["position"] = list(position)
+        agent_data["behaviour_type"] = "Base"
+        world.get_or_create_entity(identifier, comp_data)
+    for identifier, position in zip(*cells):
+        if world.get_entity(identifier) is not None:
+            continue
+        comp_data = {}
+        agent_data = comp_data["Agent"] = {}
+        agent_data["map"] = data["map"]
+        agent_data["layer"] = data["layer"]
+        agent_data["namespace"] = "LPC"
+        agent_data["gfx"] = "soil:01"
+        agent_data["position"] = list(position)
+        agent_data["behaviour_type"] = "Base"
+        comp_data["Field"] = {"plowed": False}
+        world.get_or_create_entity(identifier, comp_data)
+    world.update_agents(data["map"])
+
+
+def setup_bulk(world, field_name, data):
+    """Creates the entities in bulk from templates, the agents are updated
+    by the caller"""
+    borders, cells = layout(field_name, data)
+    agent_data = {"map": data["map"], "layer": data["layer"],
+                  "namespace": "LPC", "gfx": "grass/soil",
+                  "behaviour_type": "Base"}
+    identifiers, positions, rotations = borders
+    create_entities(world, {"Agent": agent_data}, identifiers, positions,
+                    rotations)
+    agent_data = dict(agent_data, gfx="soil:01")
+    identifiers, positions = cells
+    create_entities(world, {"Agent": agent_data, "Field": {"plowed": False}},
+                    identifiers, positions)
+
+
+def measure(bulk, size):
+    """Returns the seconds it takes to set up the fields of a map, the
+    number of entities and the number of agent updates"""
+    world = World()
+    start = time.perf_counter()
+    for index in range(FIELDS):
+        data = field_data(index, size)
+        if bulk:
+            setup_bulk(world, "field_%d" % index, data)
+        else:
+            setup_single(world, "field_%d" % index, data)
+    if bulk:
+        world.update_agents("farm")
+    return (time.perf_counter() - start, len(world.entities),
+            world.agent_updates)
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or SIZES
+    print("%d fields per map" % FIELDS)
+    print("%9s %9s %12s %12s %8s %8s" % ("size", "entities", "single",
+                                           "bulk", "speedup", "updates"))
+    for size in sizes:
+        single, entities, single_updates = measure(False, size)
+        bulk, _, bulk_updates = measure(True, size)
+        print("%4dx%-4d %9d %11.4fs %11.4fs %7.1fx %5d/%d" % (
+            size, size, entities, single, bulk, single / bulk,
+            single_updates, bulk_updates))
+
+
+if __name__ == "__main__":
+    main()
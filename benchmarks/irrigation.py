@@ -0,0 +1,76 @@
+"""Measures placing sprinklers and a day of irrigation, compared with
+watering the coverage of each sprinkler cell by cell. Both skip the cells
+that are not part of the field or have a plant and collect the cells that
+were dry, like IrrigationMap.apply. The first day after placing, which
+collects the runs of covered cells, is not part of the daily time. The
+daily times are the best of a few repeats.
+
+Usage: python benchmarks/irrigation.py [sprinklers ...]
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+import os
+import random
+import sys
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pixel_farm.field_grid import FieldGrid  # noqa: E402
+from pixel_farm.irrigation import IrrigationMap, sprinkler_coverage  # noqa
+from pixel_farm.masks import get_mask  # noqa: E402
+
+COUNTS = (100, 1000, 5000, 20000)
+FIELD_SIZE = 500
+REPEAT = 5
+
+
+def main():
+    counts = [int(count) for count in sys.argv[1:]] or COUNTS
+    mask = get_mask("circle:3")
+    print("%d cells, %d cells per sprinkler" % (FIELD_SIZE * FIELD_SIZE,
+                                                len(mask)))
+    print("%11s %12s %12s %14s" % ("sprinklers", "placing", "daily",
+                                   "cell by cell"))
+    for count in counts:
+        grid = FieldGrid("field", {"vert_size": FIELD_SIZE,
+                                   "horz_size": FIELD_SIZE})
+        generator = random.Random(1)
+        positions = [(generator.randrange(FIELD_SIZE),
+                      generator.randrange(FIELD_SIZE))
+                     for _ in range(count)]
+        irrigation = IrrigationMap()
+        start = time.perf_counter()
+        coverages = []
+        for x_pos, y_pos in positions:
+            cells = sprinkler_coverage(grid, mask, x_pos, y_pos)
+            irrigation.add(grid, cells, 1)
+            coverages.append(cells)
+        placing = time.perf_counter() - start
+        irrigation.apply({grid.name: grid})
+        daily = min(timeit.repeat(
+            lambda: irrigation.apply({grid.name: grid}),
+            number=1, repeat=REPEAT))
+        water = grid.water
+        occupied = grid.occupied
+        has_plant = grid.has_plant
+
+        def single_day():
+            wetted = []
+            for cells in coverages:
+                for index in cells:
+                    if occupied[index] and not has_plant[index]:
+                        old = water[index]
+                        if not old:
+                            wetted.append(index)
+                        water[index] = old + 1
+        single = min(timeit.repeat(single_day, number=1, repeat=REPEAT))
+        print("%11d %10.1fms %10.1fms %12.1fms" % (
+            count, placing * 1000, daily * 1000, single * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compares finding the cells a tool can plow by testing each cell of a
+rectangle with intersecting the bitsets of a mask and the field.
+
+Usage: python benchmarks/masks.py [size ...]
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pixel_farm import field_rules  # noqa: E402
+from pixel_farm.field_grid import FieldGrid  # noqa: E402
+from pixel_farm.helper import get_rotated_cell_offset_coord  # noqa: E402
+from pixel_farm.masks import rect_mask  # noqa: E402
+
+SIZES = (3, 9, 31, 101)
+FIELD_SIZE = 250
+REPEAT = 20
+
+
+def make_grid():
+    """Returns a field in which half of the cells are plowed"""
+    grid = FieldGrid("field", {"vert_size": FIELD_SIZE,
+                               "horz_size": FIELD_SIZE})
+    generator = random.Random(1)
+    for index in range(len(grid)):
+        grid.plowed[index] = generator.random() < 0.5
+    return grid
+
+
+def sweep_rect(grid, offsets, x_pos, y_pos):
+    """Tests each cell of the rectangle, like the rect sweep does"""
+    cells = []
+    for index, (y_offset, x_offset) in enumerate(offsets):
+        y_offset, x_offset = get_rotated_cell_offset_coord(y_offset,
+                                                           x_offset, 1)
+        position = grid.cell_at_position(x_pos + x_offset, y_pos + y_offset)
+        if position is not None:
+            if field_rules.can_plow(grid.cell(*position)):
+                cells.append((index,) + position)
+    return cells
+
+
+def intersect_mask(grid, mask, x_pos, y_pos):
+    """Intersects the mask with the bitsets of the plowable cells"""
+    def plowable(row):
+        return grid.row_bits("occupied", row) & ~grid.row_bits("plowed", row)
+    return mask.intersect(1, grid, y_pos - grid.vert_start,
+                          x_pos - grid.horz_start, plowable)
+
+
+def measure(function, *args):
+    """Returns the seconds a call takes on average and its result"""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = function(*args)
+    return (time.perf_counter() - start) / REPEAT, result
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or SIZES
+    grid = make_grid()
+    center = FIELD_SIZE // 2
+    print("%9s %14s %14s %8s" % ("size", "sweep", "mask", "speedup"))
+    for size in sizes:
+        half = size // 2
+        offsets = [(row, col) for row in range(-half, size - half)
+                   for col in range(-half, size - half)]
+        mask = rect_mask(-half, -half, size, size)
+        sweep, swept = measure(sweep_rect, grid, offsets, center, center)
+        masked, intersected = measure(intersect_mask, grid, mask, center,
+                                      center)
+        assert (sorted(cell[1:] for cell in swept) ==
+                sorted(cell[1:] for cell in intersected))
+        print("%4dx%-4d %10.0f c/s %10.0f c/s %7.1fx" % (
+            size, size, size * size / sweep, size * size / masked,
+            sweep / masked))
+
+
+if __name__ == "__main__":
+    main()
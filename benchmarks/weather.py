@@ -0,0 +1,37 @@
+"""Measures applying a day of weather to all cells of a field.
+
+Usage: python benchmarks/weather.py [rows] [cols] [days]
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pixel_farm.field_grid import FieldGrid  # noqa: E402
+from pixel_farm.weather import WeatherModel  # noqa: E402
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    cols = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    days = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    grid = FieldGrid("field", {"vert_size": rows, "horz_size": cols})
+    print("%d cells, %d days" % (len(grid), days))
+    for region_size in (0, 16, 64):
+        model = WeatherModel(seed=1, region_size=region_size)
+        start = time.perf_counter()
+        for day in range(days):
+            model.apply(day, grid)
+        elapsed = time.perf_counter() - start
+        label = "regions of %d" % region_size if region_size else "uniform"
+        print("%-16s %8.1fms/day %12.0f cells/sec" % (
+            label, elapsed / days * 1000, len(grid) * days / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -21,12 +21,15 @@ def main():
     app.register_behaviours()
     app.create_world()
     world = app.world
+    world.systems.ActionExecutor.load_settings(TDS)
+    world.systems.Crops.load_settings(TDS)
+    world.systems.fields.load_settings(TDS)
     view = View(app)
     controller = Controller(view, app)
     app.load_maps()
     # world.read_object_db()
     world.import_agent_objects()
-    world.load_and_create_entities()
+    app.load_entities()
     app.switch_map("farm")
     app.push_mode(controller)
     app.run()
@@ -6,6 +6,8 @@
 .. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
 """
 from abc import ABCMeta, abstractmethod
+from functools import partial
+from operator import itemgetter
 
 import six
 from fife import fife
@@ -13,8 +15,15 @@ from fife import fife
 import fife_rpg
 from fife_rpg.actions.base import BaseAction
 from pixel_farm.components.field import Field
-from pixel_farm.helper import (sweep_yield, get_rotated_cell_offset_coord,
-                               get_instances_at_offset)
+from pixel_farm.helper import get_rotated_offsets
+from pixel_farm.masks import CoverageMask
+from pixel_farm.systems.fields import get_field
+from .plan import ActionPlan
+
+#: The number of cells up to which a mask is looked at cell by cell. Each
+#: covered field has to be looked up anyway, so intersecting the bitsets only
+#: pays off for larger masks.
+SMALL_MASK = 25
 
 
 class BaseFieldAction(six.with_metaclass(ABCMeta, BaseAction)):
@@ -28,8 +37,9 @@ class BaseFieldAction(six.with_metaclass(ABCMeta, BaseAction)):
     origin : fife_rpg.RPGEntity
         The entity that is the origin point of the rectangle
 
-    rect : fife.Rect
-        The rectangle of the fields that should be watered.
+    rect : fife.Rect or pixel_farm.masks.CoverageMask
+        The rectangle of the fields that should be watered, or the mask of
+        the cells around the origin.
 
     direction : int
         The direction to which the player is facing. (0: Up, 1: Right, 2: Down,
@@ -38,6 +48,10 @@ class BaseFieldAction(six.with_metaclass(ABCMeta, BaseAction)):
     commands : list
         commands: List of additional commands to execute
 
+    plan : pixel_farm.actions.plan.ActionPlan
+        The plan of the action. It is made when the action is executed,
+        unless a plan with the same key was set before.
+
     Parameters
     ---------
     application : fife_rpg.RPGApplication
@@ -46,8 +60,9 @@ class BaseFieldAction(six.with_metaclass(ABCMeta, BaseAction)):
     origin : fife_rpg.RPGEntity
         The entity that is the origin point of the rectangle
 
-    rect : fife.Rect
-        The rectangle of the fields that should be watered.
+    rect : fife.Rect or pixel_farm.masks.CoverageMask
+        The rectangle of the fields that should be watered, or the mask of
+        the cells around the origin.
 
     direction : int
         The direction to which the player is facing. (0: Up, 1: Right, 2: Down,
@@ -59,11 +74,16 @@ class BaseFieldAction(six.with_metaclass(ABCMeta, BaseAction)):
 
     dependencies = [Field]
 
+    #: The resources that are taken from the container for each processed
+    #: cell
+    cell_cost = 0
+
     def __init__(self, application, origin, rect, direction, commands=None):
         super().__init__(application, commands)
         self.origin = origin
         self.rect = rect
         self.direction = direction
+        self.plan = None
 
     @property
     @abstractmethod
@@ -88,8 +108,275 @@ class BaseFieldAction(six.with_metaclass(ABCMeta, BaseAction)):
         -------
         bool
         """
-        return bool(getattr(entity, Field.registered_as))
+        field = get_field(entity)
+        if field:
+            return cls.cell_valid(field)
+        return False
+
+    @classmethod
+    def cell_valid(cls, field):
+        """Whether the action can be used on the state of a field. This has
+        to agree with valid_bits.
+
+        Parameters
+        ----------
+        field : pixel_farm.field_grid.FieldCell or Field
+            The state of the field
+
+        Returns
+        -------
+        bool
+        """
+        return True
+
+    @classmethod
+    def available_resources(cls, container):
+        """Returns the resources a container has for the action
+
+        Parameters
+        ----------
+        container : fife_rpg.components.base.Base
+            The container of the resources
+
+        Returns
+        -------
+        int
+            The resources, or None if they are unlimited
+        """
+        return None
+
+    @property
+    def resources(self):
+        """The resources the action has left
+
+        Returns
+        -------
+        int
+            The resources, or None if they are unlimited
+        """
+        return None
+
+    def use_resources(self, amount):
+        """Takes resources from the container of the action
 
+        Parameters
+        ----------
+        amount : int
+            The resources to take
+        """
+        pass
+
+    @classmethod
+    def plan_key(cls, fields_system, origin, rect, direction, resources,
+                 map_name=None):
+        """Returns the key of a plan, which changes when the plan has to be
+        made again
+
+        Parameters
+        ----------
+        fields_system : pixel_farm.systems.fields.Fields
+            The fields system
+        origin : fife.ExactModelCoordinate
+            The layer coordinates of the origin point of the rectangle
+        rect : fife.Rect or pixel_farm.masks.CoverageMask
+            The rectangle or mask of the fields
+        direction : int
+            The direction to which the player is facing
+        resources : int
+            The available resources, or None if they are unlimited
+        map_name : str, optional
+            The name of the map of the origin
+
+        Returns
+        -------
+        tuple
+        """
+        if isinstance(rect, CoverageMask):
+            area = rect.key
+        else:
+            area = (rect.getX(), rect.getY(), rect.getW(), rect.getH())
+        return (cls, map_name, origin.x, origin.y, area, direction,
+                fields_system.version, resources)
+
+    @classmethod
+    def valid_bits(cls, grid, row):
+        """Returns the cells of a row of a grid the action can be used on
+
+        Parameters
+        ----------
+        grid : pixel_farm.field_grid.FieldGrid
+            The grid of a field
+        row : int
+            The row
+
+        Returns
+        -------
+        int
+            A bitset in which bit n is set if the action can be used on the
+            cell in column n
+        """
+        return grid.row_bits("occupied", row)
+
+    @classmethod
+    def rect_targets(cls, fields_system, origin, rect, direction):
+        """Returns the cells of a rectangle and the fields in them
+
+        Parameters
+        ----------
+        fields_system : pixel_farm.systems.fields.Fields
+            The fields system
+        origin : fife.ExactModelCoordinate
+            The layer coordinates of the origin point of the rectangle
+        rect : fife.Rect
+            The rectangle of the fields
+        direction : int
+            The direction to which the player is facing
+
+        Returns
+        -------
+        cells : list[tuple[int]]
+            The (x, y) offset of each cell, in the sweep order
+        targets : list[tuple]
+            The (cell index, field entity, valid) of each field
+        """
+        cells = []
+        targets = []
+        for y, x, y_pos, x_pos in get_rotated_offsets(rect, direction,
+                                                      sweep=True):
+            index = len(cells)
+            cells.append((x, y))
+            for entity in fields_system.fields_at(origin.x + x_pos,
+                                                  origin.y + y_pos):
+                targets.append((index, entity,
+                                fields_system.is_valid(cls, entity)))
+        return cells, targets
+
+    @classmethod
+    def mask_targets(cls, fields_system, origin, mask, direction,
+                     map_name=None):
+        """Returns the cells of a mask and the fields in them. A mask of
+        more than SMALL_MASK cells is intersected with the bitsets of the
+        grids and the validity maps of the action instead of looking at each
+        cell.
+
+        Parameters
+        ----------
+        fields_system : pixel_farm.systems.fields.Fields
+            The fields system
+        origin : fife.ExactModelCoordinate
+            The layer coordinates of the cell the mask is used on
+        mask : pixel_farm.masks.CoverageMask
+            The mask of the fields
+        direction : int
+            The direction to which the player is facing
+        map_name : str, optional
+            The name of the map of the origin. Only the fields on it are
+            used, all fields if this is None.
+
+        Returns
+        -------
+        cells : tuple[tuple[int]]
+            The (x, y) offset of each cell of the mask
+        targets : list[tuple]
+            The (cell index, field entity, valid) of each field
+        """
+        fields = fields_system.fields
+        grids = [grid for name, grid in fields_system.grids.items()
+                 if map_name is None or fields[name]["map"] == map_name]
+        targets = []
+        if len(mask) <= SMALL_MASK:
+            offsets = mask.rotations[direction].index.items()
+            for grid in grids:
+                validity = fields_system.get_validity(cls, grid.name)
+                for (y_pos, x_pos), index in offsets:
+                    x_pos += origin.x
+                    y_pos += origin.y
+                    position = grid.cell_at_position(x_pos, y_pos)
+                    if position is None:
+                        continue
+                    entity = fields_system.field_at(grid.layer, x_pos, y_pos)
+                    if entity is not None:
+                        targets.append((index, entity,
+                                        validity.is_valid(*position)))
+            targets.sort(key=itemgetter(0))
+            return mask.cells, targets
+        for grid in grids:
+            row = origin.y - grid.vert_start
+            col = origin.x - grid.horz_start
+            validity = fields_system.get_validity(cls, grid.name)
+            valid = set(
+                (cell_row, cell_col) for _, cell_row, cell_col in
+                mask.intersect(direction, grid, row, col, validity.row_bits))
+            for index, cell_row, cell_col in mask.intersect(
+                    direction, grid, row, col,
+                    partial(grid.row_bits, "occupied")):
+                x_pos, y_pos = grid.position(cell_row, cell_col)
+                entity = fields_system.field_at(grid.layer, x_pos, y_pos)
+                if entity is not None:
+                    targets.append((index, entity,
+                                    (cell_row, cell_col) in valid))
+        targets.sort(key=itemgetter(0))
+        return mask.cells, targets
+
+    @classmethod
+    def make_plan(cls, fields_system, origin, rect, direction, resources,
+                  map_name=None):
+        """Makes the plan of the action for a rectangle or mask
+
+        Parameters
+        ----------
+        fields_system : pixel_farm.systems.fields.Fields
+            The fields system
+        origin : fife.ExactModelCoordinate
+            The layer coordinates of the origin point of the rectangle
+        rect : fife.Rect or pixel_farm.masks.CoverageMask
+            The rectangle or mask of the fields
+        direction : int
+            The direction to which the player is facing
+        resources : int
+            The available resources, or None if they are unlimited
+        map_name : str, optional
+            The name of the map of the origin. A mask only covers the fields
+            on it, all fields if this is None.
+
+        Returns
+        -------
+        pixel_farm.actions.plan.ActionPlan
+        """
+        if isinstance(rect, CoverageMask):
+            cells, targets = cls.mask_targets(fields_system, origin, rect,
+                                              direction, map_name)
+        else:
+            cells, targets = cls.rect_targets(fields_system, origin, rect,
+                                              direction)
+        processed = len(cells)
+        cost = 0
+        if resources is not None and cls.cell_cost:
+            processed = min(processed, max(resources, 0) // cls.cell_cost)
+            cost = processed * cls.cell_cost
+        key = cls.plan_key(fields_system, origin, rect, direction, resources,
+                           map_name)
+        return ActionPlan(key, tuple(cells), tuple(targets), processed, cost)
+
+    def get_plan(self):
+        """Returns the plan of the action. The plan in self.plan is used if
+        its key is still the same, otherwise a new plan is made.
+
+        Returns
+        -------
+        pixel_farm.actions.plan.ActionPlan
+        """
+        fields_system = self.application.world.systems.fields
+        origin_instance = self.origin.FifeAgent.instance
+        origin = origin_instance.getLocation().getLayerCoordinates()
+        map_name = self.origin.Agent.map
+        resources = self.resources
+        key = self.plan_key(fields_system, origin, self.rect, self.direction,
+                            resources, map_name)
+        if self.plan is None or self.plan.key != key:
+            self.plan = self.make_plan(fields_system, origin, self.rect,
+                                       self.direction, resources, map_name)
+        return self.plan
 
     @abstractmethod
     def do_field_action(self, entity):
@@ -115,6 +402,61 @@ class BaseFieldAction(six.with_metaclass(ABCMeta, BaseAction)):
         """
         pass
 
+    def run_plan(self, plan):
+        """Works on the fields of a plan one cell at a time. The cost is
+        taken from the container before the first cell.
+
+        Parameters
+        ----------
+        plan : pixel_farm.actions.plan.ActionPlan
+            The plan to apply
+
+        Yields
+        ------
+        int
+            The index of each processed cell
+        """
+        self.use_resources(plan.cost)
+        targets = plan.targets
+        target = 0
+        for index, (x_pos, y_pos) in enumerate(plan.cells[:plan.processed]):
+            while target < len(targets) and targets[target][0] == index:
+                _, entity, valid = targets[target]
+                if valid:
+                    self.do_field_action(entity)
+                target += 1
+            self.on_cell_processed(x_pos, y_pos)
+            yield index
+
+    def apply_plan(self, plan):
+        """Works on all fields of a plan at once
+
+        Parameters
+        ----------
+        plan : pixel_farm.actions.plan.ActionPlan
+            The plan to apply
+        """
+        for _ in self.run_plan(plan):
+            pass
+
+    def execute_steps(self):
+        """Executes the action one cell at a time. The commands are executed
+        after the last cell.
+
+        Yields
+        ------
+        int
+            The index of each processed cell
+
+        Raises
+        ------
+        fife_rpg.exceptions.NoSuchCommandError
+            If a command is detected that is not registered.
+        """
+        for index in self.run_plan(self.get_plan()):
+            yield index
+        super().execute()
+
     def execute(self):
         """Execute the action
 
@@ -123,24 +465,5 @@ class BaseFieldAction(six.with_metaclass(ABCMeta, BaseAction)):
         fife_rpg.exceptions.NoSuchCommandError
             If a command is detected that is not registered.
         """
-        world = self.application.world
-        origin_instance = self.origin.FifeAgent.instance
-        if self.rect.getH() == 1 and self.rect.getW() == 1:
-            fields = ((0, 0),)
-        else:
-            fields = sweep_yield(self.rect, False)
-        for y, x in fields:
-            y_pos, x_pos = get_rotated_cell_offset_coord(
-                y, x, self.direction)
-            instances = get_instances_at_offset(
-                self.application.current_map.camera,
-                origin_instance, y_pos, x_pos)
-            for instance in instances:
-                entity = world.get_entity(instance.getId())
-                if self.can_execute_on(entity):
-                    self.do_field_action(entity)
-                    continue
-            self.on_cell_processed(x, y)
-            if not self.can_continue:
-                break
-        super().execute()
+        for _ in self.execute_steps():
+            pass
@@ -0,0 +1,75 @@
+"""This module contains the plan of a field action.
+
+.. module:: plan
+    :synopsis: Plan of a field action.
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+from collections import namedtuple
+
+
+class ActionPlan(namedtuple("ActionPlan", ["key", "cells", "targets",
+                                           "processed", "cost"])):
+    """The cells a field action would work on and what it would do to them
+
+    A plan is made once for a rectangle and is used to draw the selector and
+    to execute the action, as long as its key is unchanged.
+
+    Attributes
+    ----------
+    key : tuple
+        The action, origin position, rectangle or mask, direction, version
+        of the fields and resources the plan was made for
+    cells : tuple[tuple[int]]
+        The (x, y) offset of each cell, in the order the action processes
+        them
+    targets : tuple[tuple]
+        The (cell index, field entity, valid) of each field in the cells.
+        valid is whether the action can be used on the field.
+    processed : int
+        The number of cells the resources are enough for. Only the first
+        processed cells are worked on.
+    cost : int
+        The resources the action takes from its container
+    """
+
+    __slots__ = ()
+
+    @property
+    def covered(self):
+        """The number of cells that contain fields
+
+        Returns
+        -------
+        int
+        """
+        return len(set(index for index, _, _ in self.targets))
+
+    def is_valid(self, index, valid):
+        """Whether a target will be worked on
+
+        Parameters
+        ----------
+        index : int
+            The index of the cell of the target
+        valid : bool
+            Whether the action can be used on the field of the target
+
+        Returns
+        -------
+        bool
+        """
+        return valid and index < self.processed
+
+    def valid_targets(self):
+        """Returns the fields that will be worked on
+
+        Returns
+        -------
+        list[fife_rpg.RPGEntity]
+            The field entities, in the order they are worked on
+        """
+        processed = self.processed
+        return [entity for index, entity, valid in self.targets
+                if valid and index < processed]
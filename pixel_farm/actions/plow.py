@@ -9,7 +9,8 @@
 from fife import fife
 
 import fife_rpg
-from pixel_farm.components.field import Field
+from pixel_farm import field_rules
+from pixel_farm.systems.fields import get_field
 from .basefieldaction import BaseFieldAction
 
 
@@ -24,8 +25,9 @@ class Plow(BaseFieldAction):
     origin : fife_rpg.RPGEntity
         The entity that is the origin point of the rectangle
 
-    rect : fife.Rect
-        The rectangle of the fields that should be plowed.
+    rect : fife.Rect or pixel_farm.masks.CoverageMask
+        The rectangle of the fields that should be plowed, or the mask of
+        the cells around the origin.
 
     direction : int
         The direction to which the player is facing. (0: Up, 1: Right, 2: Down,
@@ -42,8 +44,9 @@ class Plow(BaseFieldAction):
     origin : fife_rpg.RPGEntity
         The entity that is the origin point of the rectangle
 
-    rect : fife.Rect
-        The rectangle of the fields that should be plowed.
+    rect : fife.Rect or pixel_farm.masks.CoverageMask
+        The rectangle of the fields that should be plowed, or the mask of
+        the cells around the origin.
 
     direction : int
         The direction to which the player is facing. (0: Up, 1: Right, 2: Down,
@@ -68,22 +71,37 @@ class Plow(BaseFieldAction):
         return True
 
     @classmethod
-    def can_execute_on(cls, entity):
-        """Whether the action can be used on an entity
+    def cell_valid(cls, field):
+        """Whether the action can be used on the state of a field
 
         Parameters
         ----------
-        entity : fife_rpg.RPGEntity
-            The entity to check
+        field : pixel_farm.field_grid.FieldCell or Field
+            The state of the field
 
         Returns
         -------
         bool
         """
-        if super().can_execute_on(entity):
-            field = getattr(entity, Field.registered_as)
-            return not field.plowed
-        return False
+        return field_rules.can_plow(field)
+
+    @classmethod
+    def valid_bits(cls, grid, row):
+        """Returns the cells of a row of a grid the action can be used on
+
+        Parameters
+        ----------
+        grid : pixel_farm.field_grid.FieldGrid
+            The grid of a field
+        row : int
+            The row
+
+        Returns
+        -------
+        int
+            A bitset of the cells that are not plowed
+        """
+        return grid.row_bits("occupied", row) & ~grid.row_bits("plowed", row)
 
     def do_field_action(self, entity):
         """Do an an action to a field
@@ -93,8 +111,9 @@ class Plow(BaseFieldAction):
         entity : fife_rpg.RPGEntity
             The field entity to do an action on
         """
-        field = getattr(entity, Field.registered_as)
-        field.plowed = True
+        field = get_field(entity)
+        field_rules.plow(field)
+        self.application.world.systems.fields.mark_dirty(entity)
 
     @classmethod
     def register(cls, name="Plow"):
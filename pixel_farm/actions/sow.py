@@ -9,8 +9,8 @@
 from fife import fife
 
 import fife_rpg
-from pixel_farm.components.field import Field
 from pixel_farm.components.seed_container import SeedContainer
+from pixel_farm import field_rules
 from .basefieldaction import BaseFieldAction
 
 
@@ -25,8 +25,9 @@ class Sow(BaseFieldAction):
     origin : fife_rpg.RPGEntity
         The entity that is the origin point of the rectangle
 
-    rect : fife.Rect
-        The rectangle of the fields that should be watered.
+    rect : fife.Rect or pixel_farm.masks.CoverageMask
+        The rectangle of the fields that should be sown, or the mask of the
+        cells around the origin.
 
     direction : int
         The direction to which the player is facing. (0: Up, 1: Right, 2: Down,
@@ -46,8 +47,9 @@ class Sow(BaseFieldAction):
     origin : fife_rpg.RPGEntity
         The entity that is the origin point of the rectangle
 
-    rect : fife.Rect
-        The rectangle of the fields that should be watered.
+    rect : fife.Rect or pixel_farm.masks.CoverageMask
+        The rectangle of the fields that should be sown, or the mask of the
+        cells around the origin.
 
     direction : int
         The direction to which the player is facing. (0: Up, 1: Right, 2: Down,
@@ -62,6 +64,8 @@ class Sow(BaseFieldAction):
 
     dependencies = [SeedContainer]
 
+    cell_cost = 1
+
     def __init__(self, application, origin, rect, seed_container, direction,
                  commands=None):
         BaseFieldAction.__init__(self, application, origin, rect, direction,
@@ -79,35 +83,76 @@ class Sow(BaseFieldAction):
         return self.seed_container.seed > 0
 
     @classmethod
-    def can_execute_on(cls, entity):
-        """Whether the action can be used on an entity
+    def cell_valid(cls, field):
+        """Whether the action can be used on the state of a field
 
         Parameters
         ----------
-        entity : fife_rpg.RPGEntity
-            The entity to check
+        field : pixel_farm.field_grid.FieldCell or Field
+            The state of the field
 
         Returns
         -------
         bool
         """
-        if super().can_execute_on(entity):
-            field = getattr(entity, Field.registered_as)
-            return field.plowed and not field.has_plant
-        return False
+        return field_rules.can_sow(field)
 
-    def on_cell_processed(self, cell_x, cell_y):
-        """Called after a cell was processed during execution.
+    @classmethod
+    def available_resources(cls, container):
+        """Returns the resources a container has for the action
 
         Parameters
         ----------
-        cell_x : int
-            The x position of the cell
+        container : SeedContainer
+            The container of the seed
+
+        Returns
+        -------
+        int
+            The seed in the container
+        """
+        return container.seed
+
+    @property
+    def resources(self):
+        """The resources the action has left
+
+        Returns
+        -------
+        int
+            The seed in the container
+        """
+        return self.available_resources(self.seed_container)
 
-        cell_y : int
-            The y position of the cell
+    def use_resources(self, amount):
+        """Takes seed from the container
+
+        Parameters
+        ----------
+        amount : int
+            The seed to take
+        """
+        self.seed_container.seed -= amount
+
+    @classmethod
+    def valid_bits(cls, grid, row):
+        """Returns the cells of a row of a grid the action can be used on
+
+        Parameters
+        ----------
+        grid : pixel_farm.field_grid.FieldGrid
+            The grid of a field
+        row : int
+            The row
+
+        Returns
+        -------
+        int
+            A bitset of the plowed cells without a plant
         """
-        self.seed_container.seed -= 1
+        return (grid.row_bits("occupied", row) &
+                grid.row_bits("plowed", row) &
+                ~grid.row_bits("has_plant", row))
 
     def do_field_action(self, entity):
         """Do an an action to a field
@@ -117,8 +162,6 @@ class Sow(BaseFieldAction):
         entity : fife_rpg.RPGEntity
             The field entity to do an action on
         """
-        if not self.can_continue:
-            return
         world = self.application.world
         world.systems.Crops.plant_crop(entity, self.seed_container.crop)
 
@@ -9,8 +9,9 @@
 from fife import fife
 
 import fife_rpg
-from pixel_farm.components.field import Field
 from pixel_farm.components.water_container import WaterContainer
+from pixel_farm import field_rules
+from pixel_farm.systems.fields import get_field
 from .basefieldaction import BaseFieldAction
 
 
@@ -25,8 +26,9 @@ class Water(BaseFieldAction):
     origin : fife_rpg.RPGEntity
         The entity that is the origin point of the rectangle
 
-    rect : fife.Rect
-        The rectangle of the fields that should be watered.
+    rect : fife.Rect or pixel_farm.masks.CoverageMask
+        The rectangle of the fields that should be watered, or the mask of
+        the cells around the origin.
 
     container : WaterContainer
         The container used for watering.
@@ -46,8 +48,9 @@ class Water(BaseFieldAction):
     origin : fife_rpg.RPGEntity
         The entity that is the origin point of the rectangle
 
-    rect : fife.Rect
-        The rectangle of the fields that should be watered.
+    rect : fife.Rect or pixel_farm.masks.CoverageMask
+        The rectangle of the fields that should be watered, or the mask of
+        the cells around the origin.
 
     container : WaterContainer
         The container used for watering.
@@ -62,6 +65,8 @@ class Water(BaseFieldAction):
 
     dependencies = [WaterContainer]
 
+    cell_cost = 1
+
     def __init__(self, application, origin, rect, container, direction,
                  commands=None):
         super().__init__(application, origin, rect, direction, commands)
@@ -92,20 +97,42 @@ class Water(BaseFieldAction):
         """
         return super().can_execute_on(entity)
 
-    def on_cell_processed(self, cell_x, cell_y):
-        """Called after a cell was processed during execution.
+    @classmethod
+    def available_resources(cls, container):
+        """Returns the resources a container has for the action
 
         Parameters
         ----------
-        cell_x : int
-            The x position of the cell
+        container : WaterContainer
+            The container of the water
+
+        Returns
+        -------
+        int
+            The water in the container
+        """
+        return container.water
+
+    @property
+    def resources(self):
+        """The resources the action has left
 
-        cell_y : int
-            The y position of the cell
+        Returns
+        -------
+        int
+            The water in the container
+        """
+        return self.available_resources(self.container)
+
+    def use_resources(self, amount):
+        """Takes water from the container
+
+        Parameters
+        ----------
+        amount : int
+            The water to take
         """
-        self.container.water -= 1
-        if self.container.water < -1:
-            water = -1  # Just to be on the safe side
+        self.container.water -= amount
 
     def do_field_action(self, entity):
         """Do an an action to a field
@@ -115,10 +142,11 @@ class Water(BaseFieldAction):
         entity : fife_rpg.RPGEntity
             The field entity to do an action on
         """
-        field = getattr(entity, Field.registered_as)
-        if not self.can_continue:
-            return
-        field.water += 1
+        field = get_field(entity)
+        field_rules.add_water(field)
+        systems = self.application.world.systems
+        systems.fields.mark_dirty(entity)
+        systems.Crops.field_changed(entity)
 
     @classmethod
     def register(cls, name="Water"):
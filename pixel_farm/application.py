@@ -14,6 +14,10 @@
 
 """The application for pixel-farm
 
+The config files are read through the shared loader of pixel_farm.config,
+so combined.yaml is parsed once for the components, actions, systems and
+behaviours, and the parsed files are cached on disk.
+
 .. module:: application
     :synopsis: Application for pixel-farm
 
@@ -21,6 +25,8 @@
 """
 
 
+import importlib
+import logging
 
 import PyCEGUI
 
@@ -28,11 +34,16 @@ from fife_rpg import RPGApplicationCEGUI
 from fife_rpg import GameSceneView
 from fife_rpg.game_scene import SimpleOutliner
 
+from pixel_farm.config import load_config, load_config_all
+
+logger = logging.getLogger(__name__)
+
 
 class Application(RPGApplicationCEGUI):
 
     def __init__(self, TDS):
         RPGApplicationCEGUI.__init__(self, TDS)
+        self.__config = {}
 
         self._loadSchemes()
 
@@ -49,3 +60,115 @@ class Application(RPGApplicationCEGUI):
         PyCEGUI.SchemeManager.getSingleton().createFromFile(
             "TaharezLook.scheme")
         PyCEGUI.FontManager.getSingleton().createFromFile("DejaVuSans-10.font")
+
+    def _load_section(self, section, filepath):
+        """Reads a section of a config file through the shared loader"""
+        self.__config[section] = load_config(filepath)[section]
+
+    def _register_section(self, section, names):
+        """Imports the classes of a section that was read and registers
+        them under their default names
+
+        Args:
+
+            section: The name of the section
+
+            names: The names of the classes to register, None for all
+        """
+        classes = self.__config[section]
+        if names is None:
+            names = list(classes)
+        for name in names:
+            try:
+                module = importlib.import_module(classes[name])
+            except ImportError as error:
+                logger.warning("Can't register %s %s: %s", section, name,
+                               error)
+                continue
+            getattr(module, name).register()
+
+    def load_components(self, filepath="combined.yaml"):
+        """Reads the components of a config file
+
+        Args:
+
+            filepath: The path to the config file
+        """
+        self._load_section("Components", filepath)
+
+    def register_components(self, component_list=None):
+        """Registers the components that were read
+
+        Args:
+
+            component_list: The names of the components, None for all
+        """
+        self._register_section("Components", component_list)
+
+    def load_actions(self, filepath="combined.yaml"):
+        """Reads the actions of a config file
+
+        Args:
+
+            filepath: The path to the config file
+        """
+        self._load_section("Actions", filepath)
+
+    def register_actions(self, action_list=None):
+        """Registers the actions that were read
+
+        Args:
+
+            action_list: The names of the actions, None for all
+        """
+        self._register_section("Actions", action_list)
+
+    def load_systems(self, filepath="combined.yaml"):
+        """Reads the systems of a config file
+
+        Args:
+
+            filepath: The path to the config file
+        """
+        self._load_section("Systems", filepath)
+
+    def register_systems(self, system_list=None):
+        """Registers the systems that were read
+
+        Args:
+
+            system_list: The names of the systems, None for all
+        """
+        self._register_section("Systems", system_list)
+
+    def load_behaviours(self, filepath="combined.yaml"):
+        """Reads the behaviours of a config file
+
+        Args:
+
+            filepath: The path to the config file
+        """
+        self._load_section("Behaviours", filepath)
+
+    def register_behaviours(self, behaviour_list=None):
+        """Registers the behaviours that were read
+
+        Args:
+
+            behaviour_list: The names of the behaviours, None for all
+        """
+        self._register_section("Behaviours", behaviour_list)
+
+    def load_entities(self, filepath="objects/entities.yaml"):
+        """Creates the entities of an entity file
+
+        Args:
+
+            filepath: The path to the entity file. Each document has the
+            data of the components of an entity, its identifier is the one
+            of its General component.
+        """
+        for entity_data in load_config_all(filepath):
+            components = dict(entity_data["Components"])
+            identifier = components.pop("General")["identifier"]
+            self.world.get_or_create_entity(identifier, components)
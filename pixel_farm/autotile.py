@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Computation of the border tiles of fields
+
+A position that is not part of a field gets border tiles when one of its
+8 neighbours is part of the field. The occupied neighbours form a bitmask
+that is looked up in a table of the tiles to use.
+
+.. module:: autotile
+    :synopsis: Computation of the border tiles of fields
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+#: The bit, row offset and column offset of each neighbour
+NORTH = (1, -1, 0)
+EAST = (2, 0, 1)
+SOUTH = (4, 1, 0)
+WEST = (8, 0, -1)
+NORTH_EAST = (16, -1, 1)
+SOUTH_EAST = (32, 1, 1)
+SOUTH_WEST = (64, 1, -1)
+NORTH_WEST = (128, -1, -1)
+NEIGHBOURS = (NORTH, EAST, SOUTH, WEST,
+              NORTH_EAST, SOUTH_EAST, SOUTH_WEST, NORTH_WEST)
+
+#: The rotation of the border graphic for a field on one side
+EDGE_ROTATIONS = ((NORTH, 180), (EAST, 270), (SOUTH, 0), (WEST, 90))
+
+#: The rotation of the corner graphic for a field on a diagonal, and the
+#: sides that have to be free for the corner to be visible
+CORNER_ROTATIONS = ((NORTH_EAST, 225, NORTH, EAST),
+                    (SOUTH_EAST, 315, SOUTH, EAST),
+                    (SOUTH_WEST, 45, SOUTH, WEST),
+                    (NORTH_WEST, 135, NORTH, WEST))
+
+
+def _make_lut():
+    """Creates the table of the border rotations of each bitmask"""
+    lut = []
+    for mask in range(256):
+        rotations = [rotation for (bit, _, _), rotation in EDGE_ROTATIONS
+                     if mask & bit]
+        for (bit, _, _), rotation, side_a, side_b in CORNER_ROTATIONS:
+            if mask & bit and not mask & (side_a[0] | side_b[0]):
+                rotations.append(rotation)
+        lut.append(tuple(rotations))
+    return tuple(lut)
+
+
+#: The rotations of the border tiles, by the bitmask of the occupied
+#: neighbours
+BORDER_LUT = _make_lut()
+
+
+def is_occupied(grid, row, col):
+    """Whether a position is a cell of a field
+
+    Parameters
+    ----------
+    grid : pixel_farm.field_grid.FieldGrid
+        The grid of the field
+    row, col : int
+        The position in the grid, which may be outside of it
+
+    Returns
+    -------
+    bool
+    """
+    if 0 <= row < grid.rows and 0 <= col < grid.cols:
+        return bool(grid.occupied[row * grid.cols + col])
+    return False
+
+
+def border_mask(grid, row, col):
+    """Returns the bitmask of the occupied neighbours of a position
+
+    Parameters
+    ----------
+    grid : pixel_farm.field_grid.FieldGrid
+        The grid of the field
+    row, col : int
+        The position in the grid, which may be outside of it
+
+    Returns
+    -------
+    int
+    """
+    mask = 0
+    for bit, row_offset, col_offset in NEIGHBOURS:
+        if is_occupied(grid, row + row_offset, col + col_offset):
+            mask |= bit
+    return mask
+
+
+def border_rotations(grid, row, col):
+    """Returns the rotations of the border tiles at a position
+
+    Parameters
+    ----------
+    grid : pixel_farm.field_grid.FieldGrid
+        The grid of the field
+    row, col : int
+        The position in the grid, which may be outside of it
+
+    Returns
+    -------
+    tuple[int]
+        The rotations, empty if the position needs no border
+    """
+    if is_occupied(grid, row, col):
+        return ()
+    return BORDER_LUT[border_mask(grid, row, col)]
+
+
+def border_tiles(grid):
+    """Returns the border tiles of a field
+
+    Parameters
+    ----------
+    grid : pixel_farm.field_grid.FieldGrid
+        The grid of the field
+
+    Returns
+    -------
+    dict[tuple[int], tuple[int]]
+        The rotations of the border tiles by (row, column). The positions
+        can be outside of the grid by one row or column.
+    """
+    tiles = {}
+    for row in range(-1, grid.rows + 1):
+        for col in range(-1, grid.cols + 1):
+            rotations = border_rotations(grid, row, col)
+            if rotations:
+                tiles[row, col] = rotations
+    return tiles
+
+
+def update_border_tiles(grid, tiles, cells):
+    """Updates the border tiles around cells that were added or removed
+
+    Parameters
+    ----------
+    grid : pixel_farm.field_grid.FieldGrid
+        The grid of the field
+    tiles : dict[tuple[int], tuple[int]]
+        The border tiles, as returned by border_tiles. It is changed.
+    cells : iterable[tuple[int]]
+        The (row, column) of the changed cells
+
+    Returns
+    -------
+    dict[tuple[int], tuple[int]]
+        The positions whose tiles changed, with their old rotations
+    """
+    changed = {}
+    for cell_row, cell_col in cells:
+        for row in range(cell_row - 1, cell_row + 2):
+            for col in range(cell_col - 1, cell_col + 2):
+                position = (row, col)
+                if position in changed:
+                    continue
+                old = tiles.get(position, ())
+                new = border_rotations(grid, row, col)
+                if old == new:
+                    continue
+                changed[position] = old
+                if new:
+                    tiles[position] = new
+                else:
+                    del tiles[position]
+    return changed
@@ -42,6 +42,15 @@ class Field(Base):
 
     sun : int
         How much sun the field received
+
+    The cells of configured fields keep their current state in the grids of
+    the Fields system, use Fields.get_field to get it. Their components are
+    used to load and save the state. fife_rpg stores the data of the
+    component itself, so it is a second copy of the state of the cell. The
+    Fields system writes the changed cells to it on each step, so it is
+    current after the step. It does not make a cell entity smaller, the
+    streaming of the Fields system keeps the number of cell entities low
+    instead.
     """
 
     def __init__(self):
@@ -36,11 +36,14 @@ class Tool(Base):
         If the tool can reach behind the user during using it.
     tool_type : str
         The type of the tool.
+    mask : str
+        The coverage mask of the tool, as used by pixel_farm.masks.get_mask.
+        The tool uses the selected rectangle if this is empty.
     """
 
     def __init__(self):
         Base.__init__(self, v_reach=int, h_reach=int, reach_behind=bool,
-                      tool_type=str)
+                      tool_type=str, mask=str)
 
     @classmethod
     def register(cls, name="Tool", auto_register=True):
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Loading of the yaml config files
+
+Each file is parsed only once and the parsed data is shared by everything
+that loads it. The data is also cached on disk, so it does not have to be
+parsed again on the next start as long as the file did not change.
+
+.. module:: config
+    :synopsis: Loading of the yaml config files
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+import hashlib
+import os
+import pickle
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+class ConfigSafeLoader(SafeLoader):
+    """The safe loader with the tags of the fife_rpg entity files. An
+    !Entity document is loaded as a dictionary."""
+
+
+ConfigSafeLoader.add_constructor(
+    "!Entity", lambda loader, node: loader.construct_mapping(node, deep=True))
+
+
+class ConfigLoader(object):
+    """Parses yaml files and keeps the parsed data
+
+    The returned data is shared and must not be changed.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        The directory of the disk cache. If this is None the cache of a file
+        is stored in the __pycache__ directory next to it.
+
+    Attributes
+    ----------
+    cache_dir : str
+        The directory of the disk cache
+    parsed : int
+        The number of times a file had to be parsed
+    cache_hits : int
+        The number of times a file was read from the disk cache
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.parsed = 0
+        self.cache_hits = 0
+        self.__trees = {}
+
+    def _cache_path(self, filepath, documents):
+        """Returns the path of the disk cache of a file"""
+        name = "%s.%s%s.pickle" % (
+            os.path.basename(filepath),
+            hashlib.sha1(filepath.encode("utf-8")).hexdigest()[:8],
+            ".all" if documents else "")
+        cache_dir = self.cache_dir
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.dirname(filepath), "__pycache__")
+        return os.path.join(cache_dir, name)
+
+    def _read_cache(self, cache_path, mtime):
+        """Returns the cached data, if it is valid for the modification
+        time of its file. Otherwise the hash of the file is checked."""
+        try:
+            with open(cache_path, "rb") as stream:
+                cached_mtime, digest, tree = pickle.load(stream)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return None, None
+        if cached_mtime == mtime:
+            return tree, None
+        return None, (digest, tree)
+
+    def _write_cache(self, cache_path, mtime, digest, tree):
+        """Writes the data of a file to the disk cache"""
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, "wb") as stream:
+                pickle.dump((mtime, digest, tree), stream,
+                            pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
+
+    def load(self, filepath):
+        """Returns the parsed data of a yaml file
+
+        The file is only parsed again if it was changed.
+
+        Parameters
+        ----------
+        filepath : str
+            The path to the yaml file
+
+        Returns
+        -------
+        object
+            The data of the file
+        """
+        return self._load(filepath, False)
+
+    def load_all(self, filepath):
+        """Returns the parsed data of each document of a yaml file, like the
+        entity files of fife_rpg
+
+        The file is only parsed again if it was changed.
+
+        Parameters
+        ----------
+        filepath : str
+            The path to the yaml file
+
+        Returns
+        -------
+        list
+            The data of each document
+        """
+        return self._load(filepath, True)
+
+    def _load(self, filepath, documents):
+        """Returns the parsed data of a yaml file, as a list of its
+        documents if documents is True"""
+        filepath = os.path.abspath(filepath)
+        mtime = os.stat(filepath).st_mtime_ns
+        known = self.__trees.get((filepath, documents))
+        if known is not None and known[0] == mtime:
+            return known[1]
+        cache_path = self._cache_path(filepath, documents)
+        tree, stale = self._read_cache(cache_path, mtime)
+        if tree is None:
+            with open(filepath, "rb") as stream:
+                content = stream.read()
+            digest = hashlib.sha1(content).hexdigest()
+            if stale is not None and stale[0] == digest:
+                tree = stale[1]
+                self.cache_hits += 1
+            elif documents:
+                tree = list(yaml.load_all(content, Loader=ConfigSafeLoader))
+                self.parsed += 1
+            else:
+                tree = yaml.load(content, Loader=ConfigSafeLoader)
+                self.parsed += 1
+            self._write_cache(cache_path, mtime, digest, tree)
+        else:
+            self.cache_hits += 1
+        self.__trees[filepath, documents] = (mtime, tree)
+        return tree
+
+    def clear(self):
+        """Forgets the data of all files. The disk cache is kept."""
+        self.__trees = {}
+
+
+#: The loader that is shared by the game
+LOADER = ConfigLoader()
+
+
+def load_config(filepath):
+    """Returns the parsed data of a yaml file using the shared loader
+
+    Parameters
+    ----------
+    filepath : str
+        The path to the yaml file
+
+    Returns
+    -------
+    object
+        The data of the file
+    """
+    return LOADER.load(filepath)
+
+
+def load_config_all(filepath):
+    """Returns the parsed data of each document of a yaml file using the
+    shared loader
+
+    Parameters
+    ----------
+    filepath : str
+        The path to the yaml file
+
+    Returns
+    -------
+    list
+        The data of each document
+    """
+    return LOADER.load_all(filepath)
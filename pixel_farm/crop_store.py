@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Columnar storage for the state of crops and the fields they are on
+
+.. module:: crop_store
+    :synopsis: Columnar storage for crop state
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+from array import array
+from operator import add
+
+
+def _zeros(length):
+    """Returns an integer column of the given length filled with zeros"""
+    return array("l", bytes(array("l").itemsize * length))
+
+
+class CropRecord(object):
+    """The state of a crop that has no entity, for example because its
+    cell was evicted. It has the attributes of the Crop component.
+
+    Parameters
+    ----------
+    fruit_id : str
+        The fruit of the crop
+    field_id : str
+        The identifier of the field the crop is on
+    """
+
+    __slots__ = ("fruit_id", "water", "sun", "days", "stage", "ripe",
+                 "harvested", "field_id")
+
+    def __init__(self, fruit_id, field_id):
+        self.fruit_id = fruit_id
+        self.field_id = field_id
+        self.water = 0
+        self.sun = 0
+        self.days = 0
+        self.stage = 0
+        self.ripe = False
+        self.harvested = False
+
+
+class CropStore(object):
+    """Stores the state of crops in parallel columns, one row per crop.
+
+    The store mirrors the Crop component of each crop and the water and sun
+    of the Field component the crop is on. Daily updates and stage transitions
+    are done on whole columns and written back to the components with
+    :meth:`push`.
+
+    Attributes
+    ----------
+    keys : list
+        The key of each row, usually the crop entity.
+    rows : dict
+        Maps a key to its row.
+    crops : list
+        The Crop component of each row.
+    fields : list
+        The Field component of each row.
+    fruit_id : list[str]
+        The fruit of each row.
+    water, sun, days, stage : array.array
+        The Crop values of each row.
+    ripe, harvested : array.array
+        The Crop flags of each row.
+    field_water, field_sun : array.array
+        The water and sun the field of each row received.
+    """
+
+    crop_columns = ("water", "sun", "days", "stage", "ripe", "harvested")
+
+    def __init__(self):
+        self.keys = []
+        self.rows = {}
+        self.crops = []
+        self.fields = []
+        self.fruit_id = []
+        self.water = array("l")
+        self.sun = array("l")
+        self.days = array("l")
+        self.stage = array("l")
+        self.ripe = array("b")
+        self.harvested = array("b")
+        self.field_water = array("l")
+        self.field_sun = array("l")
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def add(self, key, crop, field):
+        """Adds a crop to the store
+
+        Parameters
+        ----------
+        key : object
+            The key of the crop, usually the crop entity
+        crop : Crop
+            The Crop component of the crop
+        field : Field
+            The Field component of the field the crop is on
+
+        Returns
+        -------
+        int
+            The row of the crop
+        """
+        if key in self.rows:
+            row = self.rows[key]
+            self.crops[row] = crop
+            self.fields[row] = field
+            self.pull(key)
+            return row
+        row = len(self.keys)
+        self.rows[key] = row
+        self.keys.append(key)
+        self.crops.append(crop)
+        self.fields.append(field)
+        self.fruit_id.append(crop.fruit_id)
+        self.water.append(crop.water)
+        self.sun.append(crop.sun)
+        self.days.append(crop.days)
+        self.stage.append(crop.stage)
+        self.ripe.append(bool(crop.ripe))
+        self.harvested.append(bool(crop.harvested))
+        self.field_water.append(field.water)
+        self.field_sun.append(field.sun)
+        return row
+
+    def remove(self, key):
+        """Removes a crop from the store
+
+        The last row is moved into the place of the removed one, so rows of
+        other keys can change.
+
+        Parameters
+        ----------
+        key : object
+            The key of the crop
+        """
+        row = self.rows.pop(key)
+        last = len(self.keys) - 1
+        columns = [self.keys, self.crops, self.fields, self.fruit_id,
+                   self.field_water, self.field_sun]
+        columns.extend(getattr(self, name) for name in self.crop_columns)
+        for column in columns:
+            if row != last:
+                column[row] = column[last]
+            column.pop()
+        if row != last:
+            self.rows[self.keys[row]] = row
+
+    def pull(self, key):
+        """Reads the values of a single row from its components
+
+        Parameters
+        ----------
+        key : object
+            The key of the crop
+        """
+        row = self.rows[key]
+        crop = self.crops[row]
+        field = self.fields[row]
+        self.fruit_id[row] = crop.fruit_id
+        self.water[row] = crop.water
+        self.sun[row] = crop.sun
+        self.days[row] = crop.days
+        self.stage[row] = crop.stage
+        self.ripe[row] = bool(crop.ripe)
+        self.harvested[row] = bool(crop.harvested)
+        self.field_water[row] = field.water
+        self.field_sun[row] = field.sun
+
+    def pull_fields(self):
+        """Reads the water and sun of all fields.
+
+        Fields are changed by actions, so this has to be done before the
+        field values are used.
+        """
+        self.field_water = array("l", [field.water for field in self.fields])
+        self.field_sun = array("l", [field.sun for field in self.fields])
+
+    def push(self, rows=None, fields=True):
+        """Writes the values back to the components
+
+        Parameters
+        ----------
+        rows : iterable[int], optional
+            The rows to write. All rows are written if this is None.
+        fields : bool
+            Whether the water and sun of the fields are written as well.
+            They are only current after pull_fields or advance_day, so this
+            has to be False when the fields may have changed since then.
+        """
+        if rows is None:
+            rows = range(len(self.keys))
+        crops = self.crops
+        for row in rows:
+            crop = crops[row]
+            crop.water = self.water[row]
+            crop.sun = self.sun[row]
+            crop.days = self.days[row]
+            crop.stage = self.stage[row]
+            crop.ripe = bool(self.ripe[row])
+            crop.harvested = bool(self.harvested[row])
+            if fields:
+                field = self.fields[row]
+                field.water = self.field_water[row]
+                field.sun = self.field_sun[row]
+
+    def advance_day(self):
+        """Advance all crops by one day
+
+        The water and sun of the fields are moved to the crops.
+        """
+        length = len(self.keys)
+        self.days = array("l", [days + 1 for days in self.days])
+        self.water = array("l", map(add, self.water, self.field_water))
+        self.sun = array("l", map(add, self.sun, self.field_sun))
+        self.field_water = _zeros(length)
+        self.field_sun = _zeros(length)
+
+    def update_stages(self, fruits, rows=None):
+        """Moves the crops to their next stage if the requirements are met
+
+        Parameters
+        ----------
+        fruits : dict[str, pixel_farm.fruits.Fruit]
+            The fruits by identifier
+        rows : iterable[int], optional
+            The rows to check. All rows are checked if this is None.
+
+        Returns
+        -------
+        list[int]
+            The rows that were changed
+        """
+        stage_col = self.stage
+        days_col = self.days
+        water_col = self.water
+        sun_col = self.sun
+        ripe_col = self.ripe
+        harvested_col = self.harvested
+        fruit_ids = self.fruit_id
+        if rows is None:
+            rows = range(len(fruit_ids))
+        changed = []
+        for row in rows:
+            fruit = fruits[fruit_ids[row]]
+            stage = stage_col[row]
+            if harvested_col[row]:
+                if days_col[row] > 0:
+                    if fruit.regrows is not None:
+                        harvested_col[row] = False
+                        stage_col[row] = fruit.regrows
+                        changed.append(row)
+                        continue
+                else:
+                    stage_col[row] = fruit.harvested
+            elif stage >= fruit.last_stage or ripe_col[row]:
+                continue
+            elif (days_col[row] >= fruit.min_days[stage] and
+                  water_col[row] >= fruit.water[stage] and
+                  sun_col[row] >= fruit.sun[stage]):
+                sun_col[row] = 0
+                water_col[row] = 0
+                days_col[row] = 0
+                stage_col[row] = stage + 1
+                if stage + 1 == fruit.ripe:
+                    ripe_col[row] = True
+            if stage_col[row] != stage:
+                changed.append(row)
+        return changed
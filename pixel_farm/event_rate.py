@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Rates of received and processed events
+
+.. module:: event_rate
+    :synopsis: Rates of received and processed events
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+import time
+
+
+class EventRate(object):
+    """Counts the events that were received and the ones that were processed
+    and computes their rates per second
+
+    Parameters
+    ----------
+    window : float
+        The number of seconds over which the rates are computed
+
+    Attributes
+    ----------
+    window : float
+        The number of seconds over which the rates are computed
+    raw : int
+        The events received in the current window
+    processed : int
+        The events processed in the current window
+    raw_rate : float
+        The events received per second in the last window
+    processed_rate : float
+        The events processed per second in the last window
+    """
+
+    def __init__(self, window=1.0):
+        self.window = window
+        self.raw = 0
+        self.processed = 0
+        self.raw_rate = 0.0
+        self.processed_rate = 0.0
+        self.__start = None
+
+    def update(self, now=None):
+        """Computes the rates when the current window is over and starts the
+        next one
+
+        Parameters
+        ----------
+        now : float
+            The current time.perf_counter value. It is read if this is None.
+        """
+        if now is None:
+            now = time.perf_counter()
+        if self.__start is None:
+            self.__start = now
+            return
+        elapsed = now - self.__start
+        if elapsed < self.window:
+            return
+        self.raw_rate = self.raw / elapsed
+        self.processed_rate = self.processed / elapsed
+        self.raw = 0
+        self.processed = 0
+        self.__start = now
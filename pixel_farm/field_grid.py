@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Dense storage of the state of the cells of a field
+
+.. module:: field_grid
+    :synopsis: Dense storage of the state of field cells
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+from array import array
+from operator import add, gt, mul
+
+#: The attributes of a cell and the typecode of their column
+COLUMNS = (("plowed", "b"), ("has_plant", "b"), ("water", "l"), ("sun", "l"))
+
+#: Translates the bytes of a flag column to binary digits
+BINARY_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+class FieldGrid(object):
+    """The state of all cells of a configured field, stored in one typed
+    array per attribute and indexed by row and column.
+
+    Parameters
+    ----------
+    name : str
+        The identifier of the field
+    field_data : dict
+        The data of the field, as used by the Fields system
+
+    Attributes
+    ----------
+    name : str
+        The identifier of the field
+    rows, cols : int
+        The size of the field
+    vert_start, horz_start : int
+        The map position of the cell in row 0 and column 0
+    layer : str
+        The name of the layer the field is on
+    plowed, has_plant : array.array
+        The flags of each cell
+    water, sun : array.array
+        The water and sun each cell received
+    occupied : array.array
+        Whether each cell is part of the field. A field can have any shape
+        inside its rectangle. The shape is read from the optional "shape"
+        of the field data, a string per row in which "." marks positions
+        that are not part of the field.
+    """
+
+    def __init__(self, name, field_data):
+        self.name = name
+        self.rows = field_data["vert_size"]
+        self.cols = field_data["horz_size"]
+        self.vert_start = field_data.get("vert_start", 0)
+        self.horz_start = field_data.get("horz_start", 0)
+        self.layer = field_data.get("layer")
+        size = self.rows * self.cols
+        for attr, typecode in COLUMNS:
+            setattr(self, attr, array(typecode, bytes(
+                array(typecode).itemsize * size)))
+        shape = field_data.get("shape")
+        if shape is None:
+            self.occupied = array("b", [1]) * size
+        else:
+            if len(shape) != self.rows or any(
+                    len(line) != self.cols for line in shape):
+                raise ValueError("The shape of field %s does not match its "
+                                 "size" % name)
+            self.occupied = array("b", [
+                char != "." for line in shape for char in line])
+
+    def __len__(self):
+        return self.rows * self.cols
+
+    def index(self, row, col):
+        """Returns the index of a cell in the columns
+
+        Parameters
+        ----------
+        row, col : int
+            The row and column of the cell
+
+        Returns
+        -------
+        int
+        """
+        return row * self.cols + col
+
+    def cell(self, row, col):
+        """Returns a view of a cell
+
+        Parameters
+        ----------
+        row, col : int
+            The row and column of the cell
+
+        Returns
+        -------
+        FieldCell
+        """
+        return FieldCell(self, row * self.cols + col)
+
+    def occupied_cells(self, rows=None, cols=None):
+        """Returns the cells that are part of the field
+
+        Parameters
+        ----------
+        rows : range, optional
+            The rows to look at. All rows are used if this is None.
+        cols : range, optional
+            The columns to look at. All columns are used if this is None.
+
+        Returns
+        -------
+        list[tuple[int]]
+            The (row, column) of the cells, row by row
+        """
+        if rows is None:
+            rows = range(self.rows)
+        if cols is None:
+            cols = range(self.cols)
+        occupied = self.occupied
+        width = self.cols
+        return [(row, col) for row in rows for col in cols
+                if occupied[row * width + col]]
+
+    def position(self, row, col):
+        """Returns the map position of a cell
+
+        Parameters
+        ----------
+        row, col : int
+            The row and column of the cell
+
+        Returns
+        -------
+        tuple[int]
+            The x and y position
+        """
+        return self.horz_start + col, self.vert_start + row
+
+    def cell_at_position(self, x_pos, y_pos):
+        """Returns the row and column of the cell at a map position
+
+        Parameters
+        ----------
+        x_pos, y_pos : int
+            The map position
+
+        Returns
+        -------
+        tuple[int]
+            The row and column or None if the position is not a cell of the
+            field.
+        """
+        row = y_pos - self.vert_start
+        col = x_pos - self.horz_start
+        if (0 <= row < self.rows and 0 <= col < self.cols and
+                self.occupied[row * self.cols + col]):
+            return row, col
+        return None
+
+    def row_bits(self, attr, row):
+        """Returns the flags of a row as a bitset
+
+        Parameters
+        ----------
+        attr : str
+            The flag to read, "occupied", "plowed" or "has_plant"
+        row : int
+            The row
+
+        Returns
+        -------
+        int
+            The bitset, in which bit n is set if the flag of the cell in
+            column n is set
+        """
+        start = row * self.cols
+        flags = getattr(self, attr)[start:start + self.cols].tobytes()
+        if not flags:
+            return 0
+        return int(flags[::-1].translate(BINARY_DIGITS), 2)
+
+    def _clip(self, row, col, rows, cols):
+        """Clips a rectangle to the grid"""
+        top = max(row, 0)
+        left = max(col, 0)
+        bottom = min(row + rows, self.rows)
+        right = min(col + cols, self.cols)
+        return top, left, bottom, right
+
+    def read_rect(self, attr, row, col, rows, cols):
+        """Reads the values of an attribute in a rectangle
+
+        Parameters
+        ----------
+        attr : str
+            The attribute to read
+        row, col : int
+            The top left cell of the rectangle
+        rows, cols : int
+            The size of the rectangle
+
+        Returns
+        -------
+        list[array.array]
+            The values of each row of the rectangle that is on the grid
+        """
+        column = getattr(self, attr)
+        top, left, bottom, right = self._clip(row, col, rows, cols)
+        width = self.cols
+        return [column[cur_row * width + left:cur_row * width + right]
+                for cur_row in range(top, bottom)]
+
+    def fill_rect(self, attr, row, col, rows, cols, value):
+        """Sets an attribute to the same value in a rectangle
+
+        Parameters
+        ----------
+        attr : str
+            The attribute to set
+        row, col : int
+            The top left cell of the rectangle
+        rows, cols : int
+            The size of the rectangle
+        value : int
+            The new value
+        """
+        column = getattr(self, attr)
+        top, left, bottom, right = self._clip(row, col, rows, cols)
+        if right <= left:
+            return
+        width = self.cols
+        values = array(column.typecode, [value]) * (right - left)
+        for cur_row in range(top, bottom):
+            column[cur_row * width + left:cur_row * width + right] = values
+
+    def add_rect(self, attr, row, col, rows, cols, value):
+        """Adds a value to an attribute in a rectangle
+
+        Parameters
+        ----------
+        attr : str
+            The attribute to change
+        row, col : int
+            The top left cell of the rectangle
+        rows, cols : int
+            The size of the rectangle
+        value : int
+            The value to add
+        """
+        column = getattr(self, attr)
+        top, left, bottom, right = self._clip(row, col, rows, cols)
+        width = self.cols
+        for cur_row in range(top, bottom):
+            start = cur_row * width + left
+            end = cur_row * width + right
+            column[start:end] = array(column.typecode, [
+                old + value for old in column[start:end]])
+
+    def unplanted(self):
+        """Returns which cells are part of the field and have no plant
+
+        Returns
+        -------
+        array.array
+            A flag per cell, in the order of the columns
+        """
+        return array("b", map(gt, self.occupied, self.has_plant))
+
+    def add_scalar(self, attr, value, mask=None):
+        """Adds a value to an attribute of every cell of the field
+
+        Parameters
+        ----------
+        attr : str
+            The attribute to change
+        value : int
+            The value to add
+        mask : array.array, optional
+            A flag per cell that is set for the cells to change. All cells
+            of the field are changed if this is None.
+        """
+        column = getattr(self, attr)
+        if mask is None:
+            mask = self.occupied
+        if mask.count(0):
+            values = map(add, column, map(value.__mul__, mask))
+        else:
+            values = map(value.__add__, column)
+        setattr(self, attr, array(column.typecode, values))
+
+    def add_cells(self, attr, values, mask=None):
+        """Adds a value per cell to an attribute of every cell of the field
+
+        Parameters
+        ----------
+        attr : str
+            The attribute to change
+        values : array.array
+            The value of each cell, in the order of the columns
+        mask : array.array, optional
+            A flag per cell that is set for the cells to change. All cells
+            of the field are changed if this is None.
+        """
+        column = getattr(self, attr)
+        if mask is None:
+            mask = self.occupied
+        if mask.count(0):
+            values = map(mul, values, mask)
+        setattr(self, attr, array(column.typecode, map(add, column, values)))
+
+
+class FieldCell(object):
+    """A view of a single cell of a FieldGrid.
+
+    It has the same attributes as the Field component, so it can be used
+    wherever a Field component is expected.
+
+    Parameters
+    ----------
+    grid : FieldGrid
+        The grid of the cell
+    index : int
+        The index of the cell in the grid
+
+    Attributes
+    ----------
+    grid : FieldGrid
+        The grid of the cell
+    index : int
+        The index of the cell in the grid
+    """
+
+    __slots__ = ("grid", "index")
+
+    def __init__(self, grid, index):
+        self.grid = grid
+        self.index = index
+
+    def __bool__(self):
+        return True
+
+    @property
+    def row(self):
+        """The row of the cell"""
+        return self.index // self.grid.cols
+
+    @property
+    def col(self):
+        """The column of the cell"""
+        return self.index % self.grid.cols
+
+    @property
+    def plowed(self):
+        """Is the field plowed?"""
+        return bool(self.grid.plowed[self.index])
+
+    @plowed.setter
+    def plowed(self, value):
+        self.grid.plowed[self.index] = bool(value)
+
+    @property
+    def has_plant(self):
+        """Is there a plant on the field?"""
+        return bool(self.grid.has_plant[self.index])
+
+    @has_plant.setter
+    def has_plant(self, value):
+        self.grid.has_plant[self.index] = bool(value)
+
+    @property
+    def water(self):
+        """How much water the field received"""
+        return self.grid.water[self.index]
+
+    @water.setter
+    def water(self, value):
+        self.grid.water[self.index] = value
+
+    @property
+    def sun(self):
+        """How much sun the field received"""
+        return self.grid.sun[self.index]
+
+    @sun.setter
+    def sun(self, value):
+        self.grid.sun[self.index] = value
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""The water and sun the cells of the fields get each day
+
+The Weather and Irrigation systems give water and sun to the cells of the
+fields every day. Cells with a plant do not get it in the grid, their crop
+takes the input of the days that passed when it is looked at. The input of
+each day is known in advance, so crops do not have to be touched every day
+and can be advanced over many days at once.
+
+.. module:: field_input
+    :synopsis: The water and sun the cells of the fields get each day
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+
+class DailyInput(object):
+    """The water and sun a cell gets on each of the days after a start day
+
+    Parameters
+    ----------
+    water, sun : int
+        The water and sun the cell gets every day
+    sources : tuple[tuple]
+        The (totals, key, start) of input that changes from day to day.
+        totals.between(key, start, end) returns the water and sun of the
+        days from start to end.
+
+    Attributes
+    ----------
+    water, sun : int
+        The water and sun the cell gets every day
+    sources : tuple[tuple]
+        The (totals, key, start) of input that changes from day to day
+    """
+
+    def __init__(self, water=0, sun=0, sources=()):
+        self.water = water
+        self.sun = sun
+        self.sources = tuple(sources)
+
+    def __bool__(self):
+        return bool(self.water or self.sun or self.sources)
+
+    def __add__(self, other):
+        return DailyInput(self.water + other.water, self.sun + other.sun,
+                          self.sources + other.sources)
+
+    def totals(self, days):
+        """Returns the water and sun of the first days
+
+        Parameters
+        ----------
+        days : int
+            The number of days
+
+        Returns
+        -------
+        water, sun : int
+            The water and sun of the days
+        """
+        water = self.water * days
+        sun = self.sun * days
+        for totals, key, start in self.sources:
+            day_water, day_sun = totals.between(key, start, start + days)
+            water += day_water
+            sun += day_sun
+        return water, sun
+
+    def first_day(self, water, sun, start, end):
+        """Returns after how many days the totals reach a water and sun
+
+        Parameters
+        ----------
+        water, sun : int
+            The water and sun that are needed
+        start, end : int
+            The smallest and largest number of days to look at
+
+        Returns
+        -------
+        int
+            The smallest number of days from start to end whose totals are
+            at least the water and sun, or None if there is none.
+        """
+        if start > end:
+            return None
+        end_water, end_sun = self.totals(end)
+        if end_water < water or end_sun < sun:
+            return None
+        while start < end:
+            middle = (start + end) // 2
+            mid_water, mid_sun = self.totals(middle)
+            if mid_water >= water and mid_sun >= sun:
+                end = middle
+            else:
+                start = middle + 1
+        return start
+
+
+#: The input of a cell that gets no water and sun
+NO_INPUT = DailyInput()
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Layout and bulk creation of the entities of fields
+
+.. module:: field_layout
+    :synopsis: Layout and bulk creation of the entities of fields
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+
+def border_entities(field_name, field_data, tiles):
+    """Returns the border entities of a field
+
+    Parameters
+    ----------
+    field_name : str
+        The identifier of the field
+    field_data : dict
+        The data of the field, as used by the Fields system
+    tiles : dict[tuple[int], tuple[int]]
+        The rotations of the border tiles by (row, column), as returned by
+        pixel_farm.autotile.border_tiles
+
+    Returns
+    -------
+    identifiers : list[str]
+        The identifiers of the border entities
+    positions : list[tuple[int]]
+        The (x, y) map position of each border entity
+    rotations : list[int]
+        The rotation of each border entity
+    """
+    vert_start = field_data["vert_start"]
+    horz_start = field_data["horz_start"]
+    identifiers = []
+    positions = []
+    rotations = []
+    for (row, col), tile_rotations in tiles.items():
+        position = (horz_start + col, vert_start + row)
+        for rotation in tile_rotations:
+            identifiers.append(border_identifier(field_name, row, col,
+                                                 rotation))
+            positions.append(position)
+            rotations.append(rotation)
+    return identifiers, positions, rotations
+
+
+def border_identifier(field_name, row, col, rotation):
+    """Returns the identifier of a border entity
+
+    Parameters
+    ----------
+    field_name : str
+        The identifier of the field
+    row, col : int
+        The position of the border in the grid of the field
+    rotation : int
+        The rotation of the border tile
+
+    Returns
+    -------
+    str
+    """
+    return "%s_border_%d_%d_%d" % (field_name, row, col, rotation)
+
+
+def cell_entities(field_name, field_data, cells):
+    """Returns the cell entities of a field
+
+    Parameters
+    ----------
+    field_name : str
+        The identifier of the field
+    field_data : dict
+        The data of the field, as used by the Fields system
+    cells : iterable[tuple[int]]
+        The (row, column) of the cells
+
+    Returns
+    -------
+    identifiers : list[str]
+        The identifiers of the cell entities
+    positions : list[tuple[int]]
+        The (x, y) map position of each cell entity
+    """
+    vert_start = field_data["vert_start"]
+    horz_start = field_data["horz_start"]
+    identifiers = []
+    positions = []
+    for row, col in cells:
+        identifiers.append("%s_%d_%d" % (field_name, row, col))
+        positions.append((horz_start + col, vert_start + row))
+    return identifiers, positions
+
+
+def create_entities(world, template, identifiers, positions, rotations=None,
+                    agent_name="Agent"):
+    """Creates entities that share the same component data
+
+    The component data is built once. The data of the template is shared by
+    all entities, only the position and rotation of the agent are set for
+    each entity. Entities that already exist, for example from a loaded
+    game, are not changed. The agents are not updated, this has to be done
+    once after all entities of a map were created.
+
+    Parameters
+    ----------
+    world : fife_rpg.RPGWorld
+        The world the entities are created in
+    template : dict
+        The component data of the entities. It is not changed.
+    identifiers : list[str]
+        The identifiers of the entities
+    positions : list[tuple[int]]
+        The (x, y) map position of each entity
+    rotations : list[int], optional
+        The rotation of each entity. The rotation of the template is used if
+        this is None.
+    agent_name : str
+        The name of the component that has the position and rotation
+
+    Returns
+    -------
+    list[fife_rpg.RPGEntity]
+        The entities, in the order of the identifiers
+    """
+    comp_data = dict(template)
+    agent_data = comp_data[agent_name] = dict(template[agent_name])
+    get_entity = world.get_entity
+    get_or_create_entity = world.get_or_create_entity
+    if rotations is None:
+        rotations = (agent_data.get("rotation"),) * len(identifiers)
+    entities = []
+    for identifier, position, rotation in zip(identifiers, positions,
+                                              rotations):
+        entity = get_entity(identifier)
+        if entity is None:
+            agent_data["position"] = list(position)
+            if rotation is not None:
+                agent_data["rotation"] = rotation
+            entity = get_or_create_entity(identifier, comp_data)
+        entities.append(entity)
+    return entities
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""The rules for working on fields
+
+The functions work on any objects that have the attributes of the Field
+component, so they do not depend on fife.
+
+.. module:: field_rules
+    :synopsis: The rules for working on fields
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+
+def can_plow(field):
+    """Whether a field can be plowed
+
+    Parameters
+    ----------
+    field : Field
+        The field to check
+
+    Returns
+    -------
+    bool
+    """
+    return not field.plowed
+
+
+def plow(field):
+    """Plows a field
+
+    Parameters
+    ----------
+    field : Field
+        The field to plow
+    """
+    field.plowed = True
+
+
+def can_sow(field):
+    """Whether something can be sown on a field
+
+    Parameters
+    ----------
+    field : Field
+        The field to check
+
+    Returns
+    -------
+    bool
+    """
+    return field.plowed and not field.has_plant
+
+
+def add_water(field, water=1):
+    """Adds the specified amount of water to the field
+
+    Parameters
+    ----------
+    field : Field
+        The field to water
+    water : int
+        The amount of water
+    """
+    field.water += water
+
+
+def add_sun(field, sun=1):
+    """Adds the specified amount of sun to the field
+
+    Parameters
+    ----------
+    field : Field
+        The field that gets the sun
+    sun : int
+        The amount of sun
+    """
+    field.sun += sun
+
+
+def get_soil_gfx(field):
+    """Returns the graphic of the soil of a field
+
+    Parameters
+    ----------
+    field : Field
+        The field
+
+    Returns
+    -------
+    str
+        The name of the graphic
+    """
+    is_watered = field.water > 0
+    if field.plowed:
+        if is_watered:
+            return "plowed_soil_watered"
+        return "plowed_soil"
+    if is_watered:
+        return "soil_watered"
+    return "soil:01"
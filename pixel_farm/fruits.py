@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Fruit definitions and their growth tables
+
+.. module:: fruits
+    :synopsis: Fruit definitions and their growth tables
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+import logging
+import os
+import time
+from collections import namedtuple
+
+import yaml
+
+from pixel_farm.config import load_config
+
+logger = logging.getLogger(__name__)
+
+
+class Stage(namedtuple("Stage", ["min_days", "water", "sun", "gfx",
+                                 "namespace"])):
+    """A growth stage of a fruit
+
+    Attributes
+    ----------
+    min_days : int
+        The days a crop has to be in the stage before it can grow
+    water : int
+        The water a crop needs before it can grow
+    sun : int
+        The sun a crop needs before it can grow
+    gfx : str
+        The graphic of the stage
+    namespace : str
+        The namespace of the graphic, or None
+    """
+
+    __slots__ = ()
+
+
+class Fruit(namedtuple("Fruit", ["identifier", "stages", "min_days", "water",
+                                 "sun", "last_stage", "ripe", "harvested",
+                                 "regrows"])):
+    """The compiled growth table of a fruit
+
+    The thresholds of the stages are also stored as tuples indexed by stage,
+    so the growth checks do not need to go through the stage records.
+
+    Attributes
+    ----------
+    identifier : str
+        The identifier of the fruit
+    stages : tuple[Stage]
+        The stages of the fruit
+    min_days, water, sun : tuple[int]
+        The thresholds of each stage
+    last_stage : int
+        The index of the last stage
+    ripe : int
+        The stage at which the crop is ripe
+    harvested : int
+        The stage of a harvested crop
+    regrows : int
+        The stage a harvested crop goes back to, or None if it does not
+        regrow
+    """
+
+    __slots__ = ()
+
+
+def _get_stage_index(identifier, fruit_data, key, stage_count,
+                     optional=False):
+    """Returns a validated stage index from the fruit data"""
+    if key not in fruit_data:
+        if optional:
+            return None
+        raise ValueError("Fruit %s has no %s stage" % (identifier, key))
+    value = fruit_data[key]
+    if (not isinstance(value, int) or isinstance(value, bool) or
+            not 0 <= value < stage_count):
+        raise ValueError("Fruit %s: %s is not a valid stage (%r)" %
+                         (identifier, key, value))
+    return value
+
+
+def compile_fruit(identifier, fruit_data):
+    """Validates the data of a fruit and compiles it
+
+    Parameters
+    ----------
+    identifier : str
+        The identifier of the fruit
+    fruit_data : dict
+        The data of the fruit, with a list of stages and the ripe, harvested
+        and optional regrows stage indices.
+
+    Returns
+    -------
+    Fruit
+        The compiled fruit
+
+    Raises
+    ------
+    ValueError
+        If the data is not valid
+    """
+    if isinstance(fruit_data, Fruit):
+        return fruit_data
+    if not isinstance(fruit_data, dict):
+        raise ValueError("Fruit %s is not a mapping" % identifier)
+    stages_data = fruit_data.get("stages")
+    if not stages_data:
+        raise ValueError("Fruit %s has no stages" % identifier)
+    if not isinstance(stages_data, list):
+        raise ValueError("The stages of fruit %s are not a list" %
+                         identifier)
+    stages = []
+    for index, stage_data in enumerate(stages_data):
+        if not isinstance(stage_data, dict):
+            raise ValueError("Stage %d of fruit %s is not a mapping" %
+                             (index, identifier))
+        values = []
+        for key in ("min_days", "water", "sun"):
+            value = stage_data.get(key)
+            if (not isinstance(value, int) or isinstance(value, bool) or
+                    value < 0):
+                raise ValueError("Stage %d of fruit %s: %s is not a "
+                                 "non-negative integer (%r)" %
+                                 (index, identifier, key, value))
+            values.append(value)
+        if "gfx" not in stage_data:
+            raise ValueError("Stage %d of fruit %s has no gfx" %
+                             (index, identifier))
+        stages.append(Stage(values[0], values[1], values[2],
+                            stage_data["gfx"], stage_data.get("namespace")))
+    stage_count = len(stages)
+    return Fruit(identifier,
+                 tuple(stages),
+                 tuple(stage.min_days for stage in stages),
+                 tuple(stage.water for stage in stages),
+                 tuple(stage.sun for stage in stages),
+                 stage_count - 1,
+                 _get_stage_index(identifier, fruit_data, "ripe",
+                                  stage_count),
+                 _get_stage_index(identifier, fruit_data, "harvested",
+                                  stage_count),
+                 _get_stage_index(identifier, fruit_data, "regrows",
+                                  stage_count, True))
+
+
+def load_fruits(filepath):
+    """Loads and compiles the fruits from a yaml file
+
+    Parameters
+    ----------
+    filepath : str
+        The path to the yaml file
+
+    Returns
+    -------
+    dict[str, Fruit]
+        The compiled fruits by identifier
+
+    Raises
+    ------
+    ValueError
+        If the data of a fruit is not valid
+    """
+    data = load_config(filepath)
+    fruits = {}
+    for identifier, fruit_data in data["fruits"].items():
+        fruits[identifier] = compile_fruit(identifier, fruit_data)
+    return fruits
+
+
+class FruitTable(object):
+    """The fruits of a yaml file, reloaded when the file changes
+
+    Parameters
+    ----------
+    filepath : str
+        The path to the yaml file
+    check_interval : float
+        The minimum number of seconds between two checks of the file
+
+    Attributes
+    ----------
+    filepath : str
+        The path to the yaml file
+    fruits : dict[str, Fruit]
+        The compiled fruits by identifier
+    check_interval : float
+        The minimum number of seconds between two checks of the file
+    """
+
+    def __init__(self, filepath, check_interval=1.0):
+        self.filepath = filepath
+        self.check_interval = check_interval
+        self.__mtime = os.stat(filepath).st_mtime
+        self.__last_check = time.monotonic()
+        self.fruits = load_fruits(filepath)
+
+    def reload_if_changed(self):
+        """Reloads the fruits if the file was changed since it was loaded.
+
+        If the changed file is not valid the current fruits are kept and a
+        warning is logged, once for each change of the file.
+
+        Returns
+        -------
+        bool
+            True if the fruits were reloaded, False if not.
+        """
+        now = time.monotonic()
+        if now - self.__last_check < self.check_interval:
+            return False
+        self.__last_check = now
+        try:
+            mtime = os.stat(self.filepath).st_mtime
+        except OSError:
+            return False
+        if mtime == self.__mtime:
+            return False
+        self.__mtime = mtime
+        try:
+            self.fruits = load_fruits(self.filepath)
+        except (ValueError, KeyError, TypeError, AttributeError,
+                yaml.YAMLError) as error:
+            logger.warning("Could not reload %s: %s", self.filepath, error)
+            return False
+        return True
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""The rules by which crops grow
+
+The functions work on any objects that have the attributes of the Crop and
+Field components, so they do not depend on fife.
+
+.. module:: growth
+    :synopsis: The rules by which crops grow
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+from pixel_farm.field_input import NO_INPUT
+
+
+def advance_day(crop, field):
+    """Advance a crop by one day and move the water and sun of its field to it
+
+    Parameters
+    ----------
+    crop : Crop
+        The crop to advance
+    field : Field
+        The field the crop is on
+    """
+    crop.days += 1
+    take_field_input(crop, field)
+
+
+def take_field_input(crop, field):
+    """Moves the water and sun of a field to the crop on it
+
+    Parameters
+    ----------
+    crop : Crop
+        The crop that takes the water and sun
+    field : Field
+        The field the crop is on
+    """
+    crop.water += field.water
+    field.water = 0
+    crop.sun += field.sun
+    field.sun = 0
+
+
+def update_stage(crop, fruit):
+    """Moves a crop to its next stage if the requirements are met
+
+    Parameters
+    ----------
+    crop : Crop
+        The crop to update
+    fruit : pixel_farm.fruits.Fruit
+        The fruit of the crop
+
+    Returns
+    -------
+    bool
+        True if the stage or the harvested state of the crop changed
+    """
+    stage = crop.stage
+    harvested = crop.harvested
+    if harvested:
+        if crop.days > 0:
+            if fruit.regrows is not None:
+                crop.harvested = False
+                crop.stage = fruit.regrows
+        else:
+            crop.stage = fruit.harvested
+    elif stage >= fruit.last_stage or crop.ripe:
+        pass
+    elif (crop.days >= fruit.min_days[stage] and
+          crop.water >= fruit.water[stage] and
+          crop.sun >= fruit.sun[stage]):
+        crop.sun = 0
+        crop.water = 0
+        crop.days = 0
+        crop.stage = stage + 1
+        if stage + 1 == fruit.ripe:
+            crop.ripe = True
+    return crop.stage != stage or crop.harvested != harvested
+
+
+def days_until_change(crop, fruit, inputs=None, horizon=0):
+    """Predicts after how many days :func:`update_stage` will change a crop
+
+    The prediction assumes that the crop gets no more water or sun than its
+    daily input, so it has to be made again when it does.
+
+    Parameters
+    ----------
+    crop : Crop
+        The crop to check
+    fruit : pixel_farm.fruits.Fruit
+        The fruit of the crop
+    inputs : pixel_farm.field_input.DailyInput, optional
+        The water and sun the crop gets on the next days
+    horizon : int
+        The number of days of the inputs that are looked at. If the crop
+        does not change within them, horizon is returned, so the crop is
+        looked at again then.
+
+    Returns
+    -------
+    int
+        The number of days, 0 if the crop can change now, or None if it will
+        not change without more water or sun or without being harvested.
+    """
+    stage = crop.stage
+    if crop.harvested:
+        if crop.days > 0:
+            return 0 if fruit.regrows is not None else None
+        if stage != fruit.harvested:
+            return 0
+        return 1 if fruit.regrows is not None else None
+    if stage >= fruit.last_stage or crop.ripe:
+        return None
+    wait = max(0, fruit.min_days[stage] - crop.days)
+    water = fruit.water[stage] - crop.water
+    sun = fruit.sun[stage] - crop.sun
+    if water <= 0 and sun <= 0:
+        return wait
+    if not inputs or horizon <= 0:
+        return None
+    days = inputs.first_day(water, sun, wait, horizon)
+    return horizon if days is None else days
+
+
+def harvest(crop):
+    """Harvests a crop if it is ripe
+
+    Parameters
+    ----------
+    crop : Crop
+        The crop to harvest
+
+    Returns
+    -------
+    bool
+        True if the crop was harvested, False if it was not ripe
+    """
+    if not crop.ripe:
+        return False
+    crop.ripe = False
+    crop.harvested = True
+    crop.days = 0
+    crop.water = 0
+    crop.sun = 0
+    return True
+
+
+def fast_forward(crop, fruit, field, days, inputs=None):
+    """Advance a crop by a number of days in one go
+
+    The result is the same as calling :func:`advance_day` and
+    :func:`update_stage` for each day and giving the crop its daily input,
+    but the crop jumps from one stage to the next instead of going through
+    each day. The field gives its water and sun on the first day, after
+    that the crop only gets the daily input.
+
+    Parameters
+    ----------
+    crop : Crop
+        The crop to advance
+    fruit : pixel_farm.fruits.Fruit
+        The fruit of the crop
+    field : Field
+        The field the crop is on
+    days : int
+        The number of days to advance
+    inputs : pixel_farm.field_input.DailyInput, optional
+        The water and sun the crop gets on each of the days
+    """
+    if days <= 0:
+        return
+    if inputs is None:
+        inputs = NO_INPUT
+    advance_day(crop, field)
+    water, sun = inputs.totals(1)
+    crop.water += water
+    crop.sun += sun
+    update_stage(crop, fruit)
+    day = 1
+    while day < days:
+        stage = crop.stage
+        # A harvested crop that regrows did so on the first day
+        if crop.harvested or stage >= fruit.last_stage or crop.ripe:
+            break
+        base_water, base_sun = inputs.totals(day)
+        change = inputs.first_day(
+            fruit.water[stage] - crop.water + base_water,
+            fruit.sun[stage] - crop.sun + base_sun,
+            day + max(1, fruit.min_days[stage] - crop.days), days)
+        if change is None:
+            break
+        water, sun = inputs.totals(change)
+        crop.water += water - base_water
+        crop.sun += sun - base_sun
+        crop.days += change - day
+        day = change
+        update_stage(crop, fruit)
+    base_water, base_sun = inputs.totals(day)
+    water, sun = inputs.totals(days)
+    crop.water += water - base_water
+    crop.sun += sun - base_sun
+    crop.days += days - day
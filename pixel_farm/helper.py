@@ -6,6 +6,8 @@
 .. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
 """
 
+from functools import lru_cache
+
 from fife import fife
 
 from fife_rpg.actions.base import BaseAction
@@ -135,10 +137,17 @@ def sweep_yield(rect, yield_center=True):
     yield_center : bool
         Whether to include the center coordinates(0,0) or not.
     """
-    x_start = rect.getX()
-    x_end = rect.right()
-    y_start = rect.bottom() - 1
-    y_end = rect.getY() - 1
+    for coords in _sweep_coords(rect.getX(), rect.getY(), rect.getW(),
+                                rect.getH()):
+        yield coords
+
+
+def _sweep_coords(x_start, y_pos, width, height):
+    """Yields the coordinates of sweep_yield for a rectangle given by its
+    position and size"""
+    x_end = x_start + width
+    y_start = y_pos + height - 1
+    y_end = y_pos - 1
     if y_end < 0 and y_start > 0 or y_start < 0 and y_end > 0:
         for x in range(x_start, x_end, 1):
             for y in range(0, y_end, -1):
@@ -156,6 +165,60 @@ def sweep_yield(rect, yield_center=True):
                 yield y, x
 
 
+@lru_cache(maxsize=256)
+def _rotated_offsets(x_pos, y_pos, width, height, direction, sweep):
+    """Returns the rotated offsets of a rectangle given by its position and
+    size"""
+    if not sweep:
+        cells = ((row, col)
+                 for row in range(y_pos, y_pos + height)
+                 for col in range(x_pos, x_pos + width))
+    elif width == 1 and height == 1:
+        cells = ((0, 0),)
+    else:
+        cells = _sweep_coords(x_pos, y_pos, width, height)
+    return tuple((y, x) + get_rotated_cell_offset_coord(y, x, direction)
+                 for y, x in cells)
+
+
+def get_rotated_offsets(rect, direction, sweep=False):
+    """Returns the cells of a rectangle with their offsets rotated to match
+    the direction.
+
+    The results are cached by the geometry of the rectangle and the
+    direction, use rotated_offsets_cache_info to get the hits and misses.
+
+    Parameters
+    ----------
+    rect : fife.Rect
+        The rectangle of the cells
+    direction : int
+        The direction to rotate to. (0: Up, 1: Right, 2: Down, 3: Left)
+    sweep : bool
+        If True the cells are in the order of sweep_yield, without the
+        center, and a rectangle of a single cell only contains the center.
+        If False the cells are row by row.
+
+    Returns
+    -------
+    tuple[tuple[int]]
+        The (y, x, rotated y, rotated x) of each cell
+    """
+    return _rotated_offsets(rect.getX(), rect.getY(), rect.getW(),
+                            rect.getH(), direction, sweep)
+
+
+def rotated_offsets_cache_info():
+    """Returns the statistics of the cache of get_rotated_offsets
+
+    Returns
+    -------
+    functools._CacheInfo
+        The hits, misses, maxsize and currsize of the cache
+    """
+    return _rotated_offsets.cache_info()
+
+
 def play_and_execute(instance, animation, direction, action):
     """Play an animation on the instance and do the action
 
@@ -171,7 +234,13 @@ def play_and_execute(instance, animation, direction, action):
         The direction the instance should face for the animation.
 
     action : BaseAction
-        The action to execute
+        The action to execute. It is queued in the ActionExecutor system if
+        that is registered, so it can run over several frames.
     """
     instance.actOnce(animation, direction)
-    action.execute()
+    executor = getattr(action.application.world.systems, "ActionExecutor",
+                       None)
+    if executor is None:
+        action.execute()
+    else:
+        executor.add(action)
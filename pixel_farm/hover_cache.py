@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Cache of the results of mouse hover queries
+
+.. module:: hover_cache
+    :synopsis: Cache of the results of mouse hover queries
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+
+class HoverCache(object):
+    """Keeps the results of hover queries for one frame
+
+    The results are stored per query and key. They are dropped with clear
+    once per frame, so the cache does not grow while the view stays the
+    same. All results are also dropped when the state of the view, which
+    has to change when the camera moves or the world changes, is different
+    from the one they were computed for.
+
+    Attributes
+    ----------
+    state : hashable
+        The state of the view the results are valid for
+    hits : int
+        The number of queries that were answered from the cache
+    misses : int
+        The number of queries that had to be computed
+    """
+
+    def __init__(self):
+        self.state = None
+        self.hits = 0
+        self.misses = 0
+        self.__results = {}
+
+    def validate(self, state):
+        """Drops all results if the state of the view changed
+
+        Parameters
+        ----------
+        state : hashable
+            The current state of the view
+        """
+        if state != self.state:
+            self.state = state
+            self.__results = {}
+
+    def clear(self):
+        """Drops all results"""
+        self.state = None
+        self.__results = {}
+
+    def get(self, query, key, compute):
+        """Returns the result of a query, computing it if it is not cached
+
+        Parameters
+        ----------
+        query : str
+            The name of the query
+        key : hashable
+            The arguments of the query
+        compute : callable
+            Called without arguments to compute the result
+
+        Returns
+        -------
+        object
+            The result
+        """
+        results = self.__results.setdefault(query, {})
+        try:
+            result = results[key]
+        except KeyError:
+            self.misses += 1
+            result = results[key] = compute()
+        else:
+            self.hits += 1
+        return result
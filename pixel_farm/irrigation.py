@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""The water sprinklers give to the fields
+
+The coverage of a sprinkler is computed once, when it is added. The water
+of all sprinklers is summed per cell, so a day of irrigation adds to each
+covered cell once, no matter how many sprinklers cover it. Cells with a plant
+are skipped, their crop takes the water from the totals.
+
+.. module:: irrigation
+    :synopsis: The water sprinklers give to the fields
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+from array import array
+from itertools import chain, compress
+from operator import add, not_
+
+#: The length from which a run of covered cells is changed as one slice.
+#: Shorter runs are faster to change cell by cell.
+MIN_SLICE = 16
+
+
+def sprinkler_coverage(grid, mask, x_pos, y_pos):
+    """Returns the cells of a field a sprinkler covers
+
+    Cells that are not part of the field are included, so the coverage
+    stays valid when the shape of the field changes.
+
+    Parameters
+    ----------
+    grid : pixel_farm.field_grid.FieldGrid
+        The grid of the field
+    mask : pixel_farm.masks.CoverageMask
+        The mask of the sprinkler
+    x_pos, y_pos : int
+        The map position of the sprinkler
+
+    Returns
+    -------
+    array.array
+        The indices of the covered cells in the grid
+    """
+    full_row = (1 << grid.cols) - 1
+    cells = mask.intersect(0, grid, y_pos - grid.vert_start,
+                           x_pos - grid.horz_start, lambda row: full_row)
+    cols = grid.cols
+    return array("l", [row * cols + col for _, row, col in cells])
+
+
+class IrrigationMap(object):
+    """The water the sprinklers give each cell of the fields per day
+
+    The covered cells of a field are split into runs, the parts of a row in
+    which every cell gets water. A day of irrigation skips each long run
+    that is planted, changes the long runs without plants and gaps in the
+    field with one slice update and the other cells one by one.
+
+    Attributes
+    ----------
+    totals : dict[str, array.array]
+        The water of each cell per day, by the name of the field
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self.__runs = {}
+
+    def clear(self):
+        """Removes all sprinklers"""
+        self.totals = {}
+        self.__runs = {}
+
+    def add(self, grid, cells, water):
+        """Adds the water of a sprinkler to the cells it covers
+
+        Parameters
+        ----------
+        grid : pixel_farm.field_grid.FieldGrid
+            The grid of the field
+        cells : array.array
+            The indices of the covered cells, as returned by
+            sprinkler_coverage
+        water : int
+            The water the sprinkler gives per day. Use a negative value to
+            remove a sprinkler.
+        """
+        totals = self.totals.get(grid.name)
+        if totals is None:
+            totals = self.totals[grid.name] = array("l", bytes(
+                array("l").itemsize * len(grid)))
+        for index in cells:
+            totals[index] += water
+        self.__runs.pop(grid.name, None)
+
+    def runs(self, grid):
+        """Returns the covered cells of a field, the long runs of them and
+        the other cells
+
+        Parameters
+        ----------
+        grid : pixel_farm.field_grid.FieldGrid
+            The grid of the field
+
+        Returns
+        -------
+        runs : list[tuple]
+            The (start, end, water) of each run of at least MIN_SLICE cells:
+            the index of its first cell, the index after its last cell and
+            the water of each of its cells per day
+        cells : list[int]
+            The indices of the covered cells that are not in a long run
+        water : list[int]
+            The water of each of these cells per day
+        """
+        runs = self.__runs.get(grid.name)
+        if runs is not None:
+            return runs
+        totals = self.totals.get(grid.name, ())
+        cols = grid.cols
+        long_runs = []
+        cells = []
+        start = end = None
+        for index in chain(compress(range(len(totals)), totals), (None,)):
+            if index is not None and index == end and index % cols:
+                end += 1
+                continue
+            if start is not None:
+                if end - start < MIN_SLICE:
+                    cells.extend(range(start, end))
+                else:
+                    long_runs.append((start, end, totals[start:end]))
+            start = index
+            end = None if index is None else index + 1
+        runs = self.__runs[grid.name] = (
+            long_runs, cells, [totals[index] for index in cells])
+        return runs
+
+    def apply(self, grids, days=1):
+        """Adds the water of a number of days to the fields. Only the
+        covered cells without a plant are changed.
+
+        Parameters
+        ----------
+        grids : dict[str, pixel_farm.field_grid.FieldGrid]
+            The grids of the fields, by name
+        days : int
+            The number of days
+
+        Returns
+        -------
+        dict[str, list[int]]
+            The indices of the cells that were dry and got water, by the
+            name of the field
+        """
+        wetted = {}
+        for name in self.totals:
+            grid = grids.get(name)
+            if grid is None:
+                continue
+            column = grid.water
+            occupied = grid.occupied
+            has_plant = grid.has_plant
+            long_runs, cells, water = self.runs(grid)
+            changed = []
+            cell_lists = [cells]
+            water_lists = [water]
+            for start, end, run_water in long_runs:
+                plants = has_plant[start:end]
+                if 1 in plants and 0 not in plants:
+                    continue
+                if 1 in plants or 0 in occupied[start:end]:
+                    cell_lists.append(range(start, end))
+                    water_lists.append(run_water)
+                    continue
+                old = column[start:end]
+                if 0 in old:
+                    changed.extend(compress(range(start, end),
+                                            map(not_, old)))
+                if days != 1:
+                    run_water = map(days.__mul__, run_water)
+                column[start:end] = array(column.typecode,
+                                          list(map(add, old, run_water)))
+            if len(cell_lists) > 1:
+                cells = chain.from_iterable(cell_lists)
+                water = chain.from_iterable(water_lists)
+            if days != 1:
+                water = map(days.__mul__, water)
+            for index, amount in zip(cells, water):
+                if occupied[index] and not has_plant[index]:
+                    old = column[index]
+                    if not old:
+                        changed.append(index)
+                    column[index] = old + amount
+            if changed:
+                wetted[name] = changed
+        return wetted
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Coverage masks of tools
+
+A mask is a set of cell offsets around the cell a tool is used on. For
+each direction the rotated offsets are stored as one bitset per row, which
+are intersected with the bitsets of the rows of a field.
+
+.. module:: masks
+    :synopsis: Coverage masks of tools
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+from pixel_farm.helper import get_rotated_cell_offset_coord
+
+
+class MaskRotation(namedtuple("MaskRotation", ["top", "left", "rows",
+                                               "index"])):
+    """The bitsets of a mask rotated to one direction
+
+    Attributes
+    ----------
+    top, left : int
+        The offset of the first row and column of the bitsets
+    rows : tuple[int]
+        The bitset of each row. Bit n is the column left + n.
+    index : dict[tuple[int], int]
+        The index of the cell of each rotated (y, x) offset
+    """
+
+    __slots__ = ()
+
+
+class CoverageMask(object):
+    """The cells a tool covers around the cell it is used on
+
+    Parameters
+    ----------
+    offsets : iterable[tuple[int]]
+        The (y, x) offset of each covered cell, for direction 0
+    key : hashable, optional
+        The key of the mask in plans. The offsets are used if this is None.
+
+    Attributes
+    ----------
+    cells : tuple[tuple[int]]
+        The (x, y) offset of each cell for direction 0, nearest first. This
+        is the order the cells are worked on.
+    key : hashable
+        The key of the mask in plans
+    rotations : tuple[MaskRotation]
+        The bitsets of each direction
+    """
+
+    def __init__(self, offsets, key=None):
+        offsets = sorted(set(offsets), key=lambda offset: (
+            offset[0] * offset[0] + offset[1] * offset[1], offset))
+        self.cells = tuple((x_pos, y_pos) for y_pos, x_pos in offsets)
+        self.key = tuple(offsets) if key is None else key
+        self.rotations = tuple(self._rotate(offsets, direction)
+                               for direction in range(4))
+
+    def __len__(self):
+        return len(self.cells)
+
+    @staticmethod
+    def _rotate(offsets, direction):
+        """Returns the bitsets of the offsets rotated to a direction"""
+        rotated = [get_rotated_cell_offset_coord(y_pos, x_pos, direction)
+                   for y_pos, x_pos in offsets]
+        if not rotated:
+            return MaskRotation(0, 0, (), {})
+        top = min(y_pos for y_pos, _ in rotated)
+        left = min(x_pos for _, x_pos in rotated)
+        rows = [0] * (max(y_pos for y_pos, _ in rotated) - top + 1)
+        for y_pos, x_pos in rotated:
+            rows[y_pos - top] |= 1 << (x_pos - left)
+        index = {offset: cell for cell, offset in enumerate(rotated)}
+        return MaskRotation(top, left, tuple(rows), index)
+
+    def intersect(self, direction, grid, row, col, row_bits):
+        """Returns the cells of a grid that are covered by the mask and set
+        in a bitset of the grid
+
+        Parameters
+        ----------
+        direction : int
+            The direction of the mask
+        grid : pixel_farm.field_grid.FieldGrid
+            The grid
+        row, col : int
+            The grid position the mask is used on. It can be outside of the
+            grid.
+        row_bits : callable
+            Returns the bitset of a row of the grid, in which bit n is the
+            column n
+
+        Returns
+        -------
+        list[tuple[int]]
+            The (cell index, row, column) of each covered cell
+        """
+        rotation = self.rotations[direction]
+        index = rotation.index
+        first_row = row + rotation.top
+        shift = col + rotation.left
+        cells = []
+        for mask_row, mask_bits in enumerate(rotation.rows):
+            grid_row = first_row + mask_row
+            if not 0 <= grid_row < grid.rows:
+                continue
+            bits = row_bits(grid_row)
+            if shift >= 0:
+                covered = (bits >> shift) & mask_bits
+            else:
+                covered = (bits << -shift) & mask_bits
+            while covered:
+                lowest = covered & -covered
+                covered ^= lowest
+                mask_col = lowest.bit_length() - 1
+                cells.append((
+                    index[rotation.top + mask_row, rotation.left + mask_col],
+                    grid_row, shift + mask_col))
+        return cells
+
+
+def rect_mask(x_pos, y_pos, width, height):
+    """Returns a mask of a rectangle
+
+    Parameters
+    ----------
+    x_pos, y_pos : int
+        The offset of the top left cell
+    width, height : int
+        The size of the rectangle
+
+    Returns
+    -------
+    CoverageMask
+    """
+    return CoverageMask(((row, col)
+                         for row in range(y_pos, y_pos + height)
+                         for col in range(x_pos, x_pos + width)),
+                        ("rect", x_pos, y_pos, width, height))
+
+
+def cross_mask(reach):
+    """Returns a mask of a cross, like the spray of a sprinkler
+
+    Parameters
+    ----------
+    reach : int
+        The cells covered in each direction
+
+    Returns
+    -------
+    CoverageMask
+    """
+    offsets = [(0, 0)]
+    for distance in range(1, reach + 1):
+        offsets.extend(((-distance, 0), (distance, 0), (0, -distance),
+                        (0, distance)))
+    return CoverageMask(offsets, ("cross", reach))
+
+
+def circle_mask(radius):
+    """Returns a mask of a circle
+
+    Parameters
+    ----------
+    radius : int
+        The radius of the circle in cells
+
+    Returns
+    -------
+    CoverageMask
+    """
+    limit = radius * radius
+    return CoverageMask(((row, col)
+                         for row in range(-radius, radius + 1)
+                         for col in range(-radius, radius + 1)
+                         if row * row + col * col <= limit),
+                        ("circle", radius))
+
+
+def parse_mask(pattern):
+    """Returns the mask of a pattern
+
+    Parameters
+    ----------
+    pattern : str
+        The rows of the mask for direction 0, separated by "/". A "#" marks
+        a covered cell and a "." a cell that is not covered. The cell the
+        tool is used on is marked with "O" if it is covered and "o" if not.
+        It is the center of the pattern if it is not marked.
+
+    Returns
+    -------
+    CoverageMask
+
+    Raises
+    ------
+    ValueError
+        If the pattern contains unknown characters
+    """
+    lines = pattern.split("/")
+    origin = None
+    covered = []
+    for row, line in enumerate(lines):
+        for col, char in enumerate(line):
+            if char in "oO":
+                origin = (row, col)
+            elif char not in "#.":
+                raise ValueError("Unknown character %r in mask %r" % (
+                    char, pattern))
+            if char in "#O":
+                covered.append((row, col))
+    if origin is None:
+        origin = ((len(lines) - 1) // 2,
+                  (max(len(line) for line in lines) - 1) // 2)
+    return CoverageMask(((row - origin[0], col - origin[1])
+                         for row, col in covered), ("pattern", pattern))
+
+
+@lru_cache(maxsize=None)
+def get_mask(spec):
+    """Returns the mask of a tool. The masks are only computed once.
+
+    Parameters
+    ----------
+    spec : str
+        "cross:<reach>", "circle:<radius>" or a pattern for parse_mask
+
+    Returns
+    -------
+    CoverageMask
+    """
+    shape, _, size = spec.partition(":")
+    if shape == "cross":
+        return cross_mask(int(size))
+    elif shape == "circle":
+        return circle_mask(int(size))
+    return parse_mask(spec)
@@ -31,10 +31,13 @@ from pixel_farm.actions.plow import Plow
 from pixel_farm.actions.sow import Sow
 from pixel_farm.helper import play_and_execute
 from .actions.water import Water
-from .components.field import Field
 from .components.tool import Tool
+from .field_rules import add_sun
+from .event_rate import EventRate
 from .gui.selection_grid import SelectionGrid
-from .helper import get_offset_rect, get_rotated_cell_offset_coord
+from .hover_cache import HoverCache
+from .helper import get_offset_rect, get_rotated_offsets
+from .masks import get_mask
 
 TOOLS = Enum(("WateringCan", "Plow", "Seed"))
 
@@ -64,21 +67,11 @@ class Listener(GameSceneListener, fife.IKeyListener):
 
     def mouseMoved(self, event):  # pylint: disable=W0221
         GameSceneListener.mouseMoved(self, event)
-        application = self.gamecontroller.application
-        point = fife.ScreenPoint(event.getX(), event.getY())
-        game_map = application.current_map
-        instances = game_map.get_instances_at(
-            point,
-            game_map.get_layer("fields"))
-        self.gamecontroller.selected = None
-        if instances:
-            instance = instances[0]
-            entity = application.world.get_entity(instance.getId())
-            self.gamecontroller.selected = entity
-            self.gamecontroller.update_selector(instance)
+        self.gamecontroller.move_mouse(event.getX(), event.getY())
 
     def mousePressed(self, event):
         GameSceneListener.mousePressed(self, event)
+        self.gamecontroller.process_mouse()
         selected = self.gamecontroller.selected
         player = self.gamecontroller.application.world.get_entity(
             "PlayerCharacter")
@@ -106,7 +99,8 @@ class Listener(GameSceneListener, fife.IKeyListener):
                 direction = 270
             else:
                 direction = 180
-            if rect.getH() == 1 and rect.getW() == 1:
+            area = self.gamecontroller.get_area(rect)
+            if area is rect and rect.getH() == 1 and rect.getW() == 1:
                 layer_coords = location.getLayerCoordinates()
                 if self.gamecontroller.selection_direction == 0:
                     layer_coords.y += 1
@@ -122,20 +116,21 @@ class Listener(GameSceneListener, fife.IKeyListener):
                 world = self.gamecontroller.application.world
                 watering_can = world.get_entity("WateringCan")
                 action = Water(self.gamecontroller.application,
-                               selected, rect,
+                               selected, area,
                                watering_can.WaterContainer,
                                self.gamecontroller.selection_direction)
             elif self.gamecontroller.tool.tool_type == TOOLS.Seed:
                 world = self.gamecontroller.application.world
                 seed_bag = world.get_entity("SeedBag")
                 action = Sow(self.gamecontroller.application,
-                             selected, rect, seed_bag.SeedContainer,
+                             selected, area, seed_bag.SeedContainer,
                              self.gamecontroller.selection_direction)
             elif self.gamecontroller.tool.tool_type == TOOLS.Plow:
                 action = Plow(self.gamecontroller.application, selected,
-                              rect,
+                              area,
                               self.gamecontroller.selection_direction)
             if action is not None:
+                action.plan = self.gamecontroller.plan
                 approach_and_execute(player, location,
                                      callback=lambda: play_and_execute(
                                          player.FifeAgent.instance, "stand",
@@ -164,15 +159,17 @@ class Listener(GameSceneListener, fife.IKeyListener):
             self.gamecontroller.tool = None
         elif key == fife.Key.S:
             if selected:
-                selected.Field.sun += 1
-                print(selected.Field.sun)
+                field = world.systems.fields.get_field(selected)
+                add_sun(field)
+                world.systems.fields.mark_dirty(selected)
+                world.systems.Crops.field_changed(selected)
+                print(field.sun)
         elif key == fife.Key.D:
             if selected:
                 application = self.gamecontroller.application
                 world = application.world
                 world.systems.Crops.advance_day()
-                identifier = "%s_crop" % selected.identifier
-                crop = world.get_entity(identifier)
+                crop = world.systems.Crops.crop_for_field(selected)
                 if crop:
                     print("water %d. sun %d, days %d" % (crop.Crop.water,
                                                          crop.Crop.sun,
@@ -182,16 +179,13 @@ class Listener(GameSceneListener, fife.IKeyListener):
             if selected:
                 application = self.gamecontroller.application
                 world = application.world
-                identifier = "%s_crop" % selected.identifier
-                crop = world.get_entity(identifier)
-                if crop.Crop.ripe:
-                    crop.Crop.ripe = False
-                    crop.Crop.harvested = True
-                    crop.Crop.days = 0
-                    crop.Crop.water = 0
-                    crop.Crop.sun = 0
+                crop = world.systems.Crops.crop_for_field(selected)
+                if crop:
+                    world.systems.Crops.harvest(crop)
         elif key == fife.Key.R:
             self.gamecontroller.rotate_selection(True)
+        elif key == fife.Key.F:
+            self.gamecontroller.toggle_stats()
 
 
 class Controller(GameSceneController):
@@ -201,6 +195,12 @@ class Controller(GameSceneController):
             self, view, application, outliner, listener)
         self.selected = None
         self.selection_direction = 0
+        self.plan = None
+        self.selector_rebuilds = 0
+        self.__selector_key = None
+        self.hover = HoverCache()
+        self.mouse_position = None
+        self.mouse_rate = EventRate()
         self.__tool = None
         self.tool = None
 
@@ -225,8 +225,37 @@ class Controller(GameSceneController):
 
     def step(self, time_delta):
         GameSceneController.step(self, time_delta)
+        self.hover.validate(self.get_view_state())
+        self.process_mouse()
         self.update_selector()
         self.view.select_grid.update_grid()
+        self.mouse_rate.update()
+        self.hover.clear()
+        if self.view.stats.isVisible():
+            self.view.stats.setText(self.stats_text())
+
+    def toggle_stats(self):
+        """Shows or hides the statistics window"""
+        stats = self.view.stats
+        stats.setVisible(not stats.isVisible())
+
+    def stats_text(self):
+        """Returns the text of the statistics window
+
+        Returns
+        -------
+        str
+        """
+        lines = []
+        executor = getattr(self.application.world.systems, "ActionExecutor",
+                           None)
+        if executor is not None:
+            lines.append(executor.frame_cost_text())
+        lines.append("selector: %d rebuilds" % self.selector_rebuilds)
+        mouse_rate = self.mouse_rate
+        lines.append("mouse: %.0f events/s, %.0f processed/s" % (
+            mouse_rate.raw_rate, mouse_rate.processed_rate))
+        return "\n".join(lines)
 
     def on_activate(self):
         super(Controller, self).on_activate()
@@ -254,6 +283,103 @@ class Controller(GameSceneController):
             else:
                 self.selection_direction = 3
 
+    def get_view_state(self):
+        """Returns the state of the camera and the fields. The results of
+        hover queries of a frame are dropped when it changes.
+
+        Returns
+        -------
+        tuple
+        """
+        game_map = self.application.current_map
+        camera = game_map.camera
+        coords = camera.getLocation().getMapCoordinates()
+        return (game_map.name, coords.x, coords.y, camera.getZoom(),
+                camera.getRotation(), camera.getTilt(),
+                self.application.world.systems.fields.version)
+
+    def hover_query(self, query, key, compute):
+        """Returns the result of a hover query. Each query is only computed
+        once per key and frame, the results are dropped at the end of each
+        step and when the camera or the fields change.
+
+        Parameters
+        ----------
+        query : str
+            The name of the query
+        key : hashable
+            The arguments of the query
+        compute : callable
+            Called without arguments to compute the result
+
+        Returns
+        -------
+        object
+            The result
+        """
+        self.hover.validate(self.get_view_state())
+        return self.hover.get(query, key, compute)
+
+    def move_mouse(self, screen_x, screen_y):
+        """Records the position the mouse was moved to. The field under
+        the mouse is picked by process_mouse, once per step.
+
+        Parameters
+        ----------
+        screen_x, screen_y : int
+            The screen position
+        """
+        self.mouse_position = (screen_x, screen_y)
+        self.mouse_rate.raw += 1
+
+    def process_mouse(self):
+        """Selects the field under the last recorded mouse position and
+        updates the selector for it. Earlier positions are dropped.
+
+        mouse_rate holds the rates of the recorded and the processed mouse
+        moves.
+
+        Returns
+        -------
+        bool
+            True if a mouse move was processed
+        """
+        position = self.mouse_position
+        if position is None:
+            return False
+        self.mouse_position = None
+        self.mouse_rate.processed += 1
+        entity = self.pick_field(*position)
+        self.selected = entity
+        if entity is not None:
+            self.update_selector(entity.FifeAgent.instance)
+        return True
+
+    def pick_field(self, screen_x, screen_y, layer="fields"):
+        """Returns the field entity at a screen position
+
+        Parameters
+        ----------
+        screen_x, screen_y : int
+            The screen position
+        layer : str
+            The name of the layer of the fields
+
+        Returns
+        -------
+        fife_rpg.RPGEntity
+            The field entity or None if there is no field at the position.
+        """
+        application = self.application
+
+        def pick():
+            location = application.screen_coords_to_map_coords(
+                [screen_x, screen_y], layer)
+            coords = location.getLayerCoordinates()
+            return application.world.systems.fields.field_at(
+                layer, coords.x, coords.y)
+        return self.hover_query("pick", (screen_x, screen_y, layer), pick)
+
     def get_instances_at_offset(self, instance, y_pos, x_pos):
         """Returns all instances at the offset position from the instance
 
@@ -280,6 +406,43 @@ class Controller(GameSceneController):
         offset_instances = camera.getMatchingInstances(location)
         return offset_instances
 
+    def get_fields(self, instance, rect):
+        """Returns the field entities near the instance in the given
+        rectangle.
+
+        The (0, 0) position of the rectangle. is where the instance is. It does
+        not need to be inside the rectangle.
+
+        Parameters
+        ----------
+        instance : fife.Instance
+            The instance which is the origin point of the rectangle.
+        rect : fife.Rect
+            The rectangle inside which the fields should be.
+
+        Returns
+        -------
+        list[fife_rpg.RPGEntity]
+            The field entities inside the rectangle. The list is shared
+            with later calls, as long as the view does not change, so it
+            must not be changed.
+        """
+        fields_system = self.application.world.systems.fields
+        direction = self.selection_direction
+
+        def find_fields():
+            origin = instance.getLocation().getLayerCoordinates()
+            entities = []
+            for _, _, y_pos, x_pos in get_rotated_offsets(rect, direction):
+                offset_fields = fields_system.fields_at(origin.x + x_pos,
+                                                        origin.y + y_pos)
+                if offset_fields:
+                    entities.append(offset_fields[0])
+            return entities
+        key = (instance.getFifeId(), rect.getX(), rect.getY(), rect.getW(),
+               rect.getH(), direction)
+        return self.hover_query("fields", key, find_fields)
+
     def get_instances(self, instance, rect):
         """Returns all the instances near the instance in the given rectangle.
 
@@ -298,31 +461,100 @@ class Controller(GameSceneController):
         list[fife.Instance]
             The instances inside the rectangle
         """
+        return [entity.FifeAgent.instance
+                for entity in self.get_fields(instance, rect)]
 
-        application = self.application
-        start_row = rect.getY()
-        start_col = rect.getX()
-        width = rect.getW()
-        height = rect.getH()
-        world = application.world
-        instances = []
-        for row in range(start_row, start_row + height):
-            for col in range(start_col, start_col + width):
-                y_pos, x_pos = get_rotated_cell_offset_coord(
-                    row, col, self.selection_direction)
-                offset_instances = self.get_instances_at_offset(
-                    instance, y_pos, x_pos)
-                if len(offset_instances) == 0:
-                    continue
-                offset_instance = offset_instances[0]
-                entity = world.get_entity(offset_instance.getId())
-                if not entity or not getattr(entity, Field.registered_as):
-                    continue
-                instances.append(offset_instance)
-
-        return instances
+    def get_tool_action(self):
+        """Returns the action of the current tool and the container it takes
+        its resources from
+
+        Returns
+        -------
+        action : type
+            The class of the action, or None if there is no tool
+        container : fife_rpg.components.base.Base
+            The container of the action, or None if it needs none
+
+        Raises
+        ------
+        ValueError
+            If the tool has an unknown tool type
+        """
+        if self.tool is None:
+            return None, None
+        world = self.application.world
+        tool_type = self.tool.tool_type
+        if tool_type == TOOLS.WateringCan:
+            return Water, world.get_entity("WateringCan").WaterContainer
+        elif tool_type == TOOLS.Seed:
+            return Sow, world.get_entity("SeedBag").SeedContainer
+        elif tool_type == TOOLS.Plow:
+            return Plow, None
+        raise ValueError("%s is not a valid tool type" % tool_type)
+
+    def get_area(self, rect):
+        """Returns the area the current tool works on
+
+        Parameters
+        ----------
+        rect : fife.Rect
+            The selected rectangle
+
+        Returns
+        -------
+        fife.Rect or pixel_farm.masks.CoverageMask
+            The mask of the tool, or the rectangle if the tool has no mask
+        """
+        if self.tool is not None and self.tool.mask:
+            return get_mask(self.tool.mask)
+        return rect
+
+    def get_plan(self, action, container, instance, rect):
+        """Returns the plan of an action in the given rectangle. The last
+        plan is reused if the mouse cell, rectangle, direction, resources
+        and fields did not change.
+
+        Parameters
+        ----------
+        action : type
+            The class of the action
+        container : fife_rpg.components.base.Base
+            The container of the action, or None if it needs none
+        instance : fife.Instance
+            The instance which is the origin point of the rectangle.
+        rect : fife.Rect or pixel_farm.masks.CoverageMask
+            The rectangle or mask of the fields
+
+        Returns
+        -------
+        pixel_farm.actions.plan.ActionPlan
+        """
+        fields_system = self.application.world.systems.fields
+        origin = instance.getLocation().getLayerCoordinates()
+        map_name = self.application.current_map.name
+        resources = action.available_resources(container)
+        key = action.plan_key(fields_system, origin, rect,
+                              self.selection_direction, resources, map_name)
+        if self.plan is None or self.plan.key != key:
+            self.plan = action.make_plan(fields_system, origin, rect,
+                                         self.selection_direction, resources,
+                                         map_name)
+        return self.plan
 
     def update_selector(self, instance=None):
+        """Draws the selector around the cells the current tool would work
+        on.
+
+        The selector is only drawn again when the hovered instance, the
+        selected rectangle, the tool, the direction or the fields changed.
+        selector_rebuilds counts how often it was drawn.
+
+        Parameters
+        ----------
+        instance : fife.Instance
+            The hovered instance. The instance of the selected entity is
+            used if this is None.
+        """
         application = self.application
         game_map = application.current_map
         camera = game_map.camera
@@ -332,13 +564,6 @@ class Controller(GameSceneController):
                 instance = self.selected.FifeAgent.instance
             else:
                 return
-        generic = fife.GenericRenderer.getInstance(camera)
-        inst_renderer = fife.InstanceRenderer.getInstance(camera)
-
-        generic.setPipelinePosition(inst_renderer.getPipelinePosition() + 1)
-        generic.removeAll("Selector")
-        generic.setEnabled(True)
-        generic.activateAllLayers(game_map.fife_map)
 
         mouse_cell = self.view.select_grid.mouse_cell
         cell_rect = self.view.select_grid.cell_rect
@@ -348,20 +573,53 @@ class Controller(GameSceneController):
                          int(cell_rect.getWidth()) + 1,
                          int(cell_rect.getHeight() + 1))
         rect = get_offset_rect(rect, mouse_pos)
-        width = rect.getW()
-        height = rect.getH()
 
-        instances = self.get_instances(instance, rect)
-        if len(instances) == 0:
+        action, container = self.get_tool_action()
+        if action is None:
+            plan = None
+            key = (game_map.name, instance.getFifeId(), rect.getX(),
+                   rect.getY(), rect.getW(), rect.getH(),
+                   self.selection_direction,
+                   application.world.systems.fields.version)
+        else:
+            plan = self.get_plan(action, container, instance,
+                                 self.get_area(rect))
+            key = (game_map.name, instance.getFifeId(), plan.key)
+        if key == self.__selector_key:
+            return
+        self.__selector_key = key
+        self.selector_rebuilds += 1
+
+        generic = fife.GenericRenderer.getInstance(camera)
+        inst_renderer = fife.InstanceRenderer.getInstance(camera)
+
+        generic.setPipelinePosition(inst_renderer.getPipelinePosition() + 1)
+        generic.removeAll("Selector")
+        generic.setEnabled(True)
+        generic.activateAllLayers(game_map.fife_map)
+
+        if plan is None:
+            targets = [(entity, True)
+                       for entity in self.get_fields(instance, rect)]
+            covered = len(targets)
+            cells = rect.getW() * rect.getH()
+        else:
+            targets = [(entity, plan.is_valid(index, valid))
+                       for index, entity, valid in plan.targets]
+            covered = plan.covered
+            cells = len(plan.cells)
+        if covered == 0:
             color = [255, 0, 0]
-            if not self.selected.Field:
+            if not application.world.systems.fields.get_field(
+                    self.selected):
                 return
-        elif len(instances) < height * width:
+        elif covered < cells:
             color = [255, 255, 0]
         else:
             color = [255, 255, 255]
-        for offset_instance in instances:
-            cell_color = color
+        for entity, valid in targets:
+            offset_instance = entity.FifeAgent.instance
+            cell_color = color if valid else [255, 0, 0]
             quad_node1 = fife.RendererNode(offset_instance)
             quad_node1.setRelative(fife.Point(-16, -16))
             quad_node2 = fife.RendererNode(offset_instance)
@@ -370,22 +628,6 @@ class Controller(GameSceneController):
             quad_node3.setRelative(fife.Point(16, 16))
             quad_node4 = fife.RendererNode(offset_instance)
             quad_node4.setRelative(fife.Point(16, -16))
-            entity = self.application.world.get_entity(offset_instance.getId())
-            if self.tool is None:
-                pass
-            else:
-                tool_type = self.tool.tool_type
-                if tool_type == TOOLS.WateringCan:
-                    tool_action = Water
-                elif tool_type == TOOLS.Seed:
-                    tool_action = Sow
-                elif tool_type == TOOLS.Plow:
-                    tool_action = Plow
-                else:
-                    raise ValueError("%s is not a valid tool type" % (
-                        tool_type))
-                if not tool_action.can_execute_on(entity):
-                    cell_color = [255, 0, 0]
             generic.addLine("Selector", quad_node1, quad_node2,
                             *cell_color)
             generic.addLine("Selector", quad_node2, quad_node3,
@@ -418,6 +660,9 @@ class View(GameSceneView):
 
     select_grid : PyCEGUI.GridLayoutContainer
         The selection grid
+
+    stats : PyCEGUI.Window
+        The window that shows the statistics, toggled with the F key
     """
 
     def __init__(self, application):
@@ -428,3 +673,4 @@ class View(GameSceneView):
         self.ingame = ingame
         select_grid = ingame.getChild("SelectGrid")
         self.select_grid = SelectionGrid(select_grid)
+        self.stats = ingame.getChild("Stats")
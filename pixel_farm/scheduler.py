@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Scheduling of crop stage transitions
+
+.. module:: scheduler
+    :synopsis: Scheduling of crop stage transitions
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+import heapq
+from itertools import count
+
+
+class GrowthScheduler(object):
+    """Keeps crops in a priority queue ordered by the day they can change.
+
+    The scheduler also counts the days, so the days of a crop only need to be
+    updated when the crop is looked at: :meth:`elapsed` returns the days
+    that passed since the crop was last synced.
+
+    Attributes
+    ----------
+    day : int
+        The current day
+    """
+
+    def __init__(self):
+        self.day = 0
+        self.__heap = []
+        self.__due = {}
+        self.__synced = {}
+        self.__counter = count()
+
+    def __len__(self):
+        return len(self.__due)
+
+    def __contains__(self, key):
+        return key in self.__synced
+
+    def add(self, key):
+        """Adds a crop to the scheduler, synced to the current day
+
+        Parameters
+        ----------
+        key : object
+            The key of the crop
+        """
+        self.__synced[key] = self.day
+
+    def remove(self, key):
+        """Removes a crop from the scheduler
+
+        Parameters
+        ----------
+        key : object
+            The key of the crop
+        """
+        self.__synced.pop(key, None)
+        self.__due.pop(key, None)
+
+    def keys(self):
+        """Returns the keys of all crops in the scheduler"""
+        return list(self.__synced.keys())
+
+    def elapsed(self, key):
+        """Returns the days that passed since the crop was last synced
+
+        Parameters
+        ----------
+        key : object
+            The key of the crop
+
+        Returns
+        -------
+        int
+        """
+        return self.day - self.__synced[key]
+
+    def mark_synced(self, key):
+        """Marks a crop as synced to the current day
+
+        Parameters
+        ----------
+        key : object
+            The key of the crop
+        """
+        self.__synced[key] = self.day
+
+    def schedule(self, key, days):
+        """Schedules a crop to be due in a number of days.
+
+        An earlier schedule of the crop is replaced.
+
+        Parameters
+        ----------
+        key : object
+            The key of the crop
+        days : int
+            The number of days from now, or None if the crop should not be
+            scheduled.
+        """
+        if days is None:
+            self.__due.pop(key, None)
+            return
+        due = self.day + days
+        self.__due[key] = due
+        heapq.heappush(self.__heap, (due, next(self.__counter), key))
+
+    def advance_day(self, days=1):
+        """Advances the current day
+
+        Parameters
+        ----------
+        days : int
+            The number of days to advance
+        """
+        self.day += days
+
+    def pop_due(self):
+        """Removes the crops that are due from the queue and returns them
+
+        Returns
+        -------
+        list
+            The keys of the crops that are due
+        """
+        heap = self.__heap
+        due_keys = []
+        while heap and heap[0][0] <= self.day:
+            due, _, key = heapq.heappop(heap)
+            if self.__due.get(key) != due:
+                continue
+            del self.__due[key]
+            due_keys.append(key)
+        return due_keys
@@ -0,0 +1,539 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Headless simulation of the farm
+
+Runs the Crops, Fields and Weather systems and the Plow, Sow and Water
+actions against an in-memory world, without a window or any rendering. It
+can be used from the command line to measure how fast crops can be
+simulated::
+
+    python -m pixel_farm.sim --fields 50 --size 100x100 --days 120
+
+With --check the farm is simulated in every mode of the Crops system and
+the state of the crops and cells is compared with the one of the
+components mode after each day.
+
+.. module:: sim
+    :synopsis: Headless simulation of the farm
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+import argparse
+import sys
+import time
+from collections import namedtuple
+from types import SimpleNamespace
+
+from fife import fife
+from fife_rpg.components.agent import Agent
+
+from pixel_farm.actions.plow import Plow
+from pixel_farm.actions.sow import Sow
+from pixel_farm.actions.water import Water
+from pixel_farm.components.crop import Crop
+from pixel_farm.components.field import Field
+from pixel_farm.components.seed_container import SeedContainer
+from pixel_farm.components.water_container import WaterContainer
+from pixel_farm.systems.crops import Crops
+from pixel_farm.systems.fields import Fields
+from pixel_farm.systems.weather import Weather
+from pixel_farm.weather import WeatherModel
+
+#: The ways the Crops system can update the crops. Each is a tuple of the
+#: arguments of use_store, use_dirty_set and use_scheduler.
+CROP_MODES = {
+    "components": (False, False, False),
+    "dirty": (False, True, False),
+    "store": (True, False, False),
+    "store+dirty": (True, True, False),
+    "scheduler": (False, False, True),
+}
+
+#: The values of the components that are not given when an entity is made
+COMPONENT_DEFAULTS = (
+    (Crop, {"fruit_id": "", "water": 0, "sun": 0, "days": 0, "stage": 0,
+            "ripe": False, "harvested": False, "field_id": ""}),
+    (Field, {"plowed": False, "has_plant": False, "water": 0, "sun": 0}),
+    (SeedContainer, {"max_seed": 0, "seed": 0, "crop": ""}),
+    (WaterContainer, {"max_water": 0, "water": 0}),
+)
+
+#: The layer coordinates of the cell a field action is used on
+Position = namedtuple("Position", ["x", "y"])
+
+
+def register_components():
+    """Registers the components the simulation uses, if they are not
+    registered yet"""
+    for component in (Agent,) + tuple(component for component, _ in
+                                      COMPONENT_DEFAULTS):
+        if getattr(component, "registered_as", None) is None:
+            component.register()
+
+
+class HeadlessEntity(object):
+    """An entity of the in-memory world
+
+    Its components are attributes. Components the entity does not have are
+    None.
+
+    Parameters
+    ----------
+    world : HeadlessWorld
+        The world of the entity
+    identifier : str
+        The identifier of the entity
+    """
+
+    def __init__(self, world, identifier):
+        self.world = world
+        self.identifier = identifier
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return None
+
+    def delete(self):
+        """Removes the entity from its world"""
+        self.world.delete_entity(self)
+
+
+class _ComponentQuery(object):
+    """Returns the entities that have a component, by the name of the
+    component"""
+
+    def __init__(self, entities):
+        self.__entities = entities
+
+    def __getattr__(self, name):
+        return list(self.__entities.get(name, {}).values())
+
+
+class HeadlessWorld(object):
+    """An in-memory world with the parts of the fife_rpg world the systems
+    and actions use
+
+    Parameters
+    ----------
+    application : HeadlessApplication
+        The application of the world
+
+    Attributes
+    ----------
+    application : HeadlessApplication
+        The application of the world
+    systems : types.SimpleNamespace
+        The systems, by the name they are registered under
+    entities : dict[str, HeadlessEntity]
+        The entities, by identifier
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.systems = SimpleNamespace()
+        self.entities = {}
+        self.__components = {}
+        self.__defaults = {}
+
+    def __getitem__(self, selector):
+        return _ComponentQuery(self.__components)
+
+    def add_system(self, name, system):
+        """Adds a system to the world
+
+        Parameters
+        ----------
+        name : str
+            The name of the system
+        system : fife_rpg.systems.Base
+            The system
+        """
+        system.world = self
+        setattr(self.systems, name, system)
+
+    def get_entity(self, identifier):
+        """Returns the entity with the identifier or None"""
+        return self.entities.get(identifier)
+
+    def get_or_create_entity(self, identifier, comp_data):
+        """Returns the entity with the identifier, it is made if it does not
+        exist
+
+        Parameters
+        ----------
+        identifier : str
+            The identifier of the entity
+        comp_data : dict
+            The data of each component of the entity, by component name
+
+        Returns
+        -------
+        HeadlessEntity
+        """
+        entity = self.entities.get(identifier)
+        if entity is not None:
+            return entity
+        if not self.__defaults:
+            self.__defaults = dict((component.registered_as, defaults)
+                                   for component, defaults in
+                                   COMPONENT_DEFAULTS)
+        entity = self.entities[identifier] = HeadlessEntity(self, identifier)
+        for name, data in comp_data.items():
+            values = dict(self.__defaults.get(name, {}))
+            values.update(data)
+            setattr(entity, name, SimpleNamespace(**values))
+            self.__components.setdefault(name, {})[identifier] = entity
+        return entity
+
+    def delete_entity(self, entity):
+        """Removes an entity and its components
+
+        Parameters
+        ----------
+        entity : HeadlessEntity
+            The entity
+        """
+        identifier = entity.identifier
+        self.entities.pop(identifier, None)
+        for entities in self.__components.values():
+            entities.pop(identifier, None)
+
+    def step(self, time_delta):
+        """Steps the systems in the order they were added"""
+        for system in vars(self.systems).values():
+            system.step(time_delta)
+
+
+class HeadlessApplication(object):
+    """The parts of the application the systems and actions use, without
+    an engine
+
+    Attributes
+    ----------
+    world : HeadlessWorld
+        The world of the application
+    current_map : None
+        No map is loaded, so the fields are not streamed
+    """
+
+    def __init__(self):
+        self.current_map = None
+        self.world = HeadlessWorld(self)
+
+    def update_agents(self, game_map):
+        """The agents are not shown, so there is nothing to update"""
+        pass
+
+
+class HeadlessFarm(object):
+    """A farm that is simulated by the systems of the game
+
+    Each day every ripe crop is harvested and the Plow, Sow and Water
+    actions are used on every field. Then the systems are stepped, the day
+    is advanced and the systems are stepped again.
+
+    Parameters
+    ----------
+    fields : dict
+        The data of the fields by field name, as used by the Fields system
+    mode : str
+        How the Crops system updates the crops, a key of CROP_MODES
+    weather_seed : int
+        The seed of the weather
+    fruits_file : str
+        The file the fruits are loaded from
+
+    Attributes
+    ----------
+    application : HeadlessApplication
+        The application of the world
+    world : HeadlessWorld
+        The world of the farm
+    crops : pixel_farm.systems.crops.Crops
+        The Crops system
+    fields : pixel_farm.systems.fields.Fields
+        The Fields system
+    day : int
+        The number of days that were simulated
+    crop_ticks : int
+        The number of crops the Crops system evaluated
+    """
+
+    def __init__(self, fields, mode="scheduler", weather_seed=0,
+                 fruits_file="fruits.yaml"):
+        register_components()
+        self.application = HeadlessApplication()
+        world = self.world = self.application.world
+        weather = Weather()
+        weather.model = WeatherModel(seed=weather_seed)
+        world.add_system("Weather", weather)
+        self.fields = Fields()
+        world.add_system("fields", self.fields)
+        self.crops = Crops()
+        world.add_system("Crops", self.crops)
+        self.crops.load_config(fruits_file)
+        use_store, use_dirty_set, use_scheduler = CROP_MODES[mode]
+        self.crops.use_store(use_store)
+        self.crops.use_dirty_set(use_dirty_set)
+        self.crops.use_scheduler(use_scheduler)
+        self.fields.set_fields(fields)
+        self.seed_bag = getattr(world.get_or_create_entity(
+            "SeedBag", {SeedContainer.registered_as: {}}),
+            SeedContainer.registered_as)
+        self.watering_can = getattr(world.get_or_create_entity(
+            "WateringCan", {WaterContainer.registered_as: {}}),
+            WaterContainer.registered_as)
+        self.day = 0
+        self.crop_ticks = 0
+        self.step()
+
+    def step(self):
+        """Steps the systems once, like a frame of the game"""
+        self.world.step(0)
+        self.crop_ticks += self.crops.evaluated_crops
+
+    def use_action(self, action, field_name):
+        """Uses a field action on a whole field
+
+        Parameters
+        ----------
+        action : pixel_farm.actions.basefieldaction.BaseFieldAction
+            The action. Its rectangle is replaced by the one of the field.
+        field_name : str
+            The identifier of the field
+        """
+        grid = self.fields.grids[field_name]
+        origin = Position(grid.horz_start - 1, grid.vert_start)
+        action.rect = fife.Rect(1, 0, grid.cols, grid.rows)
+        action.apply_plan(action.make_plan(
+            self.fields, origin, action.rect, action.direction,
+            action.resources, self.fields.fields[field_name]["map"]))
+
+    def plow(self, field_name):
+        """Plows a field"""
+        self.use_action(Plow(self.application, None, None, 0), field_name)
+
+    def sow(self, field_name, fruit):
+        """Sows a fruit on a field"""
+        seed_bag = self.seed_bag
+        seed_bag.crop = fruit
+        seed_bag.seed = len(self.fields.grids[field_name])
+        self.use_action(Sow(self.application, None, None, seed_bag, 0),
+                        field_name)
+
+    def water(self, field_name):
+        """Waters a field"""
+        watering_can = self.watering_can
+        watering_can.water = len(self.fields.grids[field_name])
+        self.use_action(Water(self.application, None, None, watering_can,
+                              0), field_name)
+
+    def harvest(self):
+        """Harvests every ripe crop
+
+        Returns
+        -------
+        int
+            The number of harvested crops
+        """
+        crop_c_name = Crop.registered_as
+        count = 0
+        for entity in getattr(self.world[...], crop_c_name):
+            if getattr(entity, crop_c_name).ripe:
+                count += self.crops.harvest(entity)
+        return count
+
+    def run_day(self, fruit):
+        """Simulates a day of farming
+
+        Parameters
+        ----------
+        fruit : str
+            The identifier of the fruit to plant
+        """
+        self.harvest()
+        for field_name in self.fields.grids:
+            self.plow(field_name)
+            self.sow(field_name, fruit)
+            self.water(field_name)
+        self.step()
+        self.crops.advance_day()
+        self.step()
+        self.day += 1
+
+    def state(self):
+        """Returns the state of the crops and the cells, to compare farms
+
+        Returns
+        -------
+        crops : list[tuple]
+            The identifier and the Crop values of each crop
+        cells : dict[str, tuple]
+            The plowed, has_plant, water and sun columns of each field
+        """
+        self.crops.sync_crops()
+        crop_c_name = Crop.registered_as
+        crops = []
+        for entity in getattr(self.world[...], crop_c_name):
+            crop = getattr(entity, crop_c_name)
+            crops.append((entity.identifier, crop.fruit_id, crop.stage,
+                          crop.water, crop.sun, crop.days, bool(crop.ripe),
+                          bool(crop.harvested)))
+        crops.sort()
+        cells = {}
+        for field_name, grid in self.fields.grids.items():
+            cells[field_name] = (list(grid.plowed), list(grid.has_plant),
+                                 list(grid.water), list(grid.sun))
+        return crops, cells
+
+
+def check_modes(fields, days, fruit, weather_seed=0,
+                fruits_file="fruits.yaml"):
+    """Simulates the same farm in every mode of the Crops system and
+    compares the results with the ones of the components mode
+
+    Parameters
+    ----------
+    fields : dict
+        The data of the fields by field name
+    days : int
+        The number of days to simulate
+    fruit : str
+        The identifier of the fruit to plant
+    weather_seed : int
+        The seed of the weather
+    fruits_file : str
+        The file the fruits are loaded from
+
+    Returns
+    -------
+    dict[str, int]
+        The first day after which the state differed from the one of the
+        components mode, or None if it was always the same, by mode
+    """
+    farms = dict((mode, HeadlessFarm(fields, mode, weather_seed,
+                                     fruits_file))
+                 for mode in CROP_MODES)
+    reference = farms.pop("components")
+    first_diff = dict((mode, None) for mode in farms)
+    for day in range(1, days + 1):
+        reference.run_day(fruit)
+        expected = reference.state()
+        for mode, farm in farms.items():
+            farm.run_day(fruit)
+            if first_diff[mode] is None and farm.state() != expected:
+                first_diff[mode] = day
+    return first_diff
+
+
+def make_fields(count, rows, cols):
+    """Creates the configuration of square fields next to each other
+
+    Parameters
+    ----------
+    count : int
+        The number of fields
+    rows, cols : int
+        The size of each field
+
+    Returns
+    -------
+    dict
+        The field data by field name, as used by the Fields system
+    """
+    fields = {}
+    for index in range(count):
+        fields["field_%d" % (index + 1)] = {
+            "map": "farm",
+            "layer": "fields",
+            "vert_start": 0,
+            "vert_size": rows,
+            "horz_start": index * (cols + 2),
+            "horz_size": cols,
+        }
+    return fields
+
+
+def parse_size(value):
+    """Parses a size in the form ROWSxCOLS"""
+    try:
+        rows, cols = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("%r is not a size like 100x100" %
+                                         value)
+    return rows, cols
+
+
+def main(args=None):
+    """Runs the simulation from the command line"""
+    parser = argparse.ArgumentParser(
+        prog="python -m pixel_farm.sim",
+        description="Simulate the farm without rendering and report the "
+                    "throughput.")
+    parser.add_argument("--fields", type=int, default=1,
+                        help="number of fields")
+    parser.add_argument("--size", type=parse_size, default=(15, 15),
+                        help="size of each field as ROWSxCOLS")
+    parser.add_argument("--days", type=int, default=30,
+                        help="number of days to simulate")
+    parser.add_argument("--fruit", default="tomato",
+                        help="the fruit that is planted")
+    parser.add_argument("--fruits-file", default="fruits.yaml",
+                        help="the file the fruits are loaded from")
+    parser.add_argument("--mode", choices=sorted(CROP_MODES),
+                        default="scheduler",
+                        help="how the Crops system updates the crops")
+    parser.add_argument("--weather-seed", type=int, default=0,
+                        help="the seed of the weather")
+    parser.add_argument("--check", action="store_true",
+                        help="compare the modes instead of measuring")
+    options = parser.parse_args(args)
+
+    rows, cols = options.size
+    if options.check:
+        first_diff = check_modes(make_fields(options.fields, rows, cols),
+                                 options.days, options.fruit,
+                                 options.weather_seed, options.fruits_file)
+        for mode, day in sorted(first_diff.items()):
+            if day is None:
+                print("%s: same as components" % mode)
+            else:
+                print("%s: differs from components after day %d" % (mode,
+                                                                    day))
+        return 1 if any(day is not None for day in first_diff.values()) \
+            else 0
+
+    farm = HeadlessFarm(make_fields(options.fields, rows, cols),
+                        options.mode, options.weather_seed,
+                        options.fruits_file)
+
+    start = time.perf_counter()
+    for _ in range(options.days):
+        farm.run_day(options.fruit)
+    elapsed = time.perf_counter() - start
+
+    crop_count = len(getattr(farm.world[...], Crop.registered_as))
+    print("%d fields of %dx%d cells, %d crops, %d days in %.2fs (%s)" % (
+        options.fields, rows, cols, crop_count, farm.day, elapsed,
+        options.mode))
+    if elapsed > 0:
+        print("%.2f days/sec, %.0f crop-ticks/sec" % (
+            farm.day / elapsed, farm.crop_ticks / elapsed))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
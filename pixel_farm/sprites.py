@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Change detection for the graphics of entities
+
+.. module:: sprites
+    :synopsis: Change detection for the graphics of entities
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+
+class SpriteStates(object):
+    """Remembers the graphics that were set on entities and only sets them
+    again when they changed.
+
+    Changes are collected with :meth:`set` and applied together with
+    :meth:`flush`, which should be called once per frame.
+
+    Parameters
+    ----------
+    agent_name : str
+        The name of the component that has the gfx and namespace attributes
+
+    Attributes
+    ----------
+    agent_name : str
+        The name of the component that has the gfx and namespace attributes
+    pushed : int
+        The number of entities that were updated by the last flush
+    """
+
+    def __init__(self, agent_name="Agent"):
+        self.agent_name = agent_name
+        self.pushed = 0
+        self.__last = {}
+        self.__pending = {}
+
+    def set(self, entity, gfx, namespace=None):
+        """Sets the graphic an entity should have
+
+        Parameters
+        ----------
+        entity : fife_rpg.RPGEntity
+            The entity
+        gfx : str
+            The name of the graphic
+        namespace : str, optional
+            The namespace of the graphic. The namespace of the entity is not
+            changed if this is None.
+        """
+        state = (gfx, namespace)
+        if self.__last.get(entity) == state:
+            self.__pending.pop(entity, None)
+        else:
+            self.__pending[entity] = state
+
+    def forget(self, entity):
+        """Forgets the graphic of an entity, for example when it was deleted
+
+        Parameters
+        ----------
+        entity : fife_rpg.RPGEntity
+            The entity
+        """
+        self.__last.pop(entity, None)
+        self.__pending.pop(entity, None)
+
+    def flush(self):
+        """Sets the changed graphics on the entities
+
+        Returns
+        -------
+        int
+            The number of entities that were updated
+        """
+        pending = self.__pending
+        last = self.__last
+        agent_name = self.agent_name
+        for entity, state in pending.items():
+            gfx, namespace = state
+            agent = getattr(entity, agent_name)
+            agent.gfx = gfx
+            if namespace is not None:
+                agent.namespace = namespace
+            last[entity] = state
+        self.pushed = len(pending)
+        self.__pending = {}
+        return self.pushed
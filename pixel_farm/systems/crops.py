@@ -23,60 +23,89 @@
 
 from fife_rpg.components.agent import Agent
 from fife_rpg.systems import Base
-from pixel_farm.components.crop import Crop, add_days
-from pixel_farm.components.field import Field
+from pixel_farm.components.crop import Crop
+from pixel_farm.crop_store import CropRecord, CropStore
+from pixel_farm.field_input import NO_INPUT
+from pixel_farm.fruits import FruitTable, compile_fruit
+from pixel_farm.scheduler import GrowthScheduler
+from pixel_farm.sprites import SpriteStates
+from pixel_farm import growth
+
+#: The systems that add sun and water to the fields each day
+FIELD_INPUT_SYSTEMS = ("Weather", "Irrigation")
+
+#: The number of days of field input that are looked at when a crop is
+#: scheduled
+INPUT_HORIZON = 28
 
 
 class Crops(Base):
 
-    "This system manages the crops on the fields."
+    """This system manages the crops on the fields.
+
+    Attributes
+    ----------
+    fruits : dict[str, pixel_farm.fruits.Fruit]
+        The compiled fruits, by identifier
+
+    fruit_table : pixel_farm.fruits.FruitTable
+        The fruits loaded from the config file. It is checked for changes on
+        each step.
+
+    store : CropStore
+        The columnar store of the crops, if it is used. When this is set the
+        daily update and the stage transitions are done on the store and
+        written back to the components.
+
+    dirty : set
+        The crop entities that changed since the last step, if only changed
+        crops should be evaluated. When this is None every crop is evaluated
+        on every step.
+
+    scheduler : GrowthScheduler
+        The scheduler of the stage transitions, if it is used. When this is
+        set a crop is only looked at on the day it is predicted to change or
+        when its field got water or sun. The days and the daily field input
+        of the other crops are only added by sync_crops.
+
+    evaluated_crops : int
+        The number of crops that were evaluated in the last step.
+
+    day : int
+        The number of days the crops were advanced.
+
+    sprites : pixel_farm.sprites.SpriteStates
+        The graphics of the crops. Only changed graphics are set on the
+        agents, once per step. sprites.pushed is the number of crops whose
+        graphics were set in the last step.
+
+    The system keeps an index of which crop is on which field, so crops and
+    their fields can be found without looking up their identifiers.
+
+    The systems in FIELD_INPUT_SYSTEMS give the fields water and sun every
+    day. The cells with a plant do not get it, the crops take the input of
+    each day from the cell_input of the systems instead. Because the input
+    is known in advance, the scheduler and advance_days still only look at
+    a crop when it can change.
+    """
 
     def __init__(self):
         Base.__init__(self)
         self.fruits = {}
-        # Just for testing
-        tomato = {}
-        stages = []
-        stage = {}
-        stage["min_days"] = 3
-        stage["water"] = 4
-        stage["sun"] = 4
-        stage["gfx"] = "tomato_1"
-        stage["namespace"] = "LPC"
-        stages.append(stage)
-        stage = {}
-        stage["min_days"] = 2
-        stage["water"] = 4
-        stage["sun"] = 5
-        stage["gfx"] = "tomato_2"
-        stage["namespace"] = "LPC"
-        stages.append(stage)
-        stage = {}
-        stage["min_days"] = 2
-        stage["water"] = 3
-        stage["sun"] = 6
-        stage["gfx"] = "tomato_3"
-        stage["namespace"] = "LPC"
-        stages.append(stage)
-        stage = {}
-        stage["min_days"] = 2
-        stage["water"] = 0
-        stage["sun"] = 0
-        stage["gfx"] = "tomato_4"
-        stage["namespace"] = "LPC"
-        stages.append(stage)
-        stage = {}
-        stage["min_days"] = 2
-        stage["water"] = 0
-        stage["sun"] = 0
-        stage["gfx"] = "tomato_5"
-        stage["namespace"] = "LPC"
-        stages.append(stage)
-        tomato["stages"] = stages
-        tomato["ripe"] = 3
-        tomato["harvested"] = 4
-        tomato["regrows"] = 2
-        self.fruits["tomato"] = tomato
+        self.store = None
+        self.dirty = None
+        self.scheduler = None
+        self.evaluated_crops = 0
+        self.day = 0
+        self.sprites = SpriteStates(Agent.registered_as)
+        self.__fed_crops = set()
+        self.fruit_table = None
+        self.__added_fruits = {}
+        self.__field_crops = None
+        self.__crop_fields = None
+        self.__index_misses = set()
+        self.__offscreen = {}
+        self.load_config()
 
     @classmethod
     def register(cls, name="Crops"):
@@ -90,10 +119,421 @@ class Crops(Base):
         """
         return super(Crops, cls).register(name)
 
+    def load_config(self, filepath="fruits.yaml"):
+        """Loads the fruits from a yaml file
+
+        Args:
+
+            filepath: The path to the config file
+        """
+        self.fruit_table = FruitTable(filepath)
+        self._update_fruits()
+
+    def _update_fruits(self):
+        """Combines the fruits of the table with the ones added directly.
+        Fruits that are no longer in the table are kept, so their crops can
+        still grow."""
+        fruits = dict(self.fruits)
+        fruits.update(self.fruit_table.fruits)
+        fruits.update(self.__added_fruits)
+        self.fruits = fruits
+
+    def _reload_fruits(self):
+        """Updates the fruits after the table was reloaded and brings the
+        crops in line with them. Stages that no longer exist are replaced
+        by the last stage, the transitions are scheduled again and the
+        graphics of the crops are set again."""
+        self.sync_crops()
+        self._update_fruits()
+        crop_c_name = Crop.registered_as
+        for entity in getattr(self.world[...], crop_c_name):
+            crop = getattr(entity, crop_c_name)
+            last_stage = self.fruits[crop.fruit_id].last_stage
+            if crop.stage > last_stage:
+                crop.stage = last_stage
+            if self.store is not None and entity in self.store:
+                self.store.pull(entity)
+            if self.scheduler is not None and entity in self.scheduler:
+                self._schedule(entity, crop)
+            self._update_gfx(entity, crop)
+            self.mark_dirty(entity)
+
+    def load_settings(self, settings):
+        """Reads from the settings how the crops are kept and updated
+
+        Args:
+
+            settings: The fife.extensions.fife_settings.Setting object of the
+            application. The CropStore, DirtyCrops and CropScheduler values
+            of the pixel-farm module are used. The scheduler is used if it
+            is not set, the others are not.
+        """
+        self.use_store(settings.get("pixel-farm", "CropStore", False))
+        self.use_dirty_set(settings.get("pixel-farm", "DirtyCrops", False))
+        self.use_scheduler(settings.get("pixel-farm", "CropScheduler", True))
+
+    def use_store(self, use=True):
+        """Sets whether the crops should be kept in a columnar store
+
+        Args:
+
+            use: True to use a store, False to work on the components directly
+        """
+        if not use:
+            self.store = None
+            return
+        if self.store is not None:
+            return
+        self.store = CropStore()
+        crop_c_name = Crop.registered_as
+        for entity in getattr(self.world[...], crop_c_name):
+            self._add_to_store(entity)
+        for row in range(len(self.store)):
+            self._update_gfx(self.store.keys[row], self.store.crops[row])
+
+    def use_dirty_set(self, use=True):
+        """Sets whether only changed crops should be evaluated on each step
+
+        Args:
+
+            use: True to evaluate only changed crops, False to evaluate every
+            crop on every step
+        """
+        if not use:
+            self.dirty = None
+            return
+        if self.dirty is not None:
+            return
+        self.dirty = set(getattr(self.world[...], Crop.registered_as))
+
+    def use_scheduler(self, use=True):
+        """Sets whether the stage transitions should be scheduled
+
+        Args:
+
+            use: True to schedule the transitions, False to check the crops
+            every day
+        """
+        if not use:
+            if self.scheduler is not None:
+                self.sync_crops()
+                self.scheduler = None
+            return
+        if self.scheduler is not None:
+            return
+        self.scheduler = GrowthScheduler()
+        self.__fed_crops = set()
+        for entity in getattr(self.world[...], Crop.registered_as):
+            field_entity = self.field_for_crop(entity)
+            if field_entity is None:
+                continue
+            self.scheduler.add(entity)
+            self._schedule(entity, getattr(entity, Crop.registered_as))
+            field = self.world.systems.fields.get_field(field_entity)
+            if field.water or field.sun:
+                self.__fed_crops.add(entity)
+
+    def _schedule(self, entity, crop):
+        """Predicts when a crop will change and schedules it"""
+        inputs = self._field_input(self.field_for_crop(entity), 0)
+        self.scheduler.schedule(entity, growth.days_until_change(
+            crop, self.fruits[crop.fruit_id], inputs, INPUT_HORIZON))
+
+    def _sync_crop(self, entity, crop):
+        """Adds the days that passed since the crop was last looked at and
+        the field input of these days"""
+        elapsed = self.scheduler.elapsed(entity)
+        if elapsed:
+            water, sun = self._field_input(self.field_for_crop(entity),
+                                           -elapsed).totals(elapsed)
+            crop.days += elapsed
+            crop.water += water
+            crop.sun += sun
+            self.scheduler.mark_synced(entity)
+
+    def _field_input(self, field, offset):
+        """Returns the water and sun the field of a crop gets each day
+
+        Args:
+
+            field: The field entity
+
+            offset: The first day, relative to the next day the input
+            systems will apply
+
+        Returns:
+            The pixel_farm.field_input.DailyInput of the field
+        """
+        if field is None:
+            return NO_INPUT
+        cell = self.world.systems.fields.get_field(field)
+        grid = getattr(cell, "grid", None)
+        if grid is None:
+            return NO_INPUT
+        return self._cell_input(grid, cell.index, offset)
+
+    def _cell_input(self, grid, index, offset):
+        """Returns the water and sun a cell of a grid gets each day
+
+        Args:
+
+            grid: The grid of the field
+
+            index: The index of the cell in the grid
+
+            offset: The first day, relative to the next day the input
+            systems will apply
+
+        Returns:
+            The pixel_farm.field_input.DailyInput of the cell
+        """
+        inputs = NO_INPUT
+        for name in FIELD_INPUT_SYSTEMS:
+            system = getattr(self.world.systems, name, None)
+            if system is not None:
+                inputs = inputs + system.cell_input(grid, index, offset)
+        return inputs
+
+    def change_field_input(self, change, cells=None):
+        """Changes the daily input of cells and keeps the crops on them
+        correct. The crops get the input of the days since they were last
+        looked at before the change and are scheduled again after it.
+        Evicted crops are advanced to the current day first.
+
+        Args:
+
+            change: Called without arguments to change the input
+
+            cells: The (grid, cell indices) of the changed cells, None if
+            the input of all cells may change
+        """
+        if self.__offscreen:
+            self._settle_evicted(cells)
+        if self.scheduler is None:
+            change()
+            return
+        if cells is None:
+            entities = self.scheduler.keys()
+        else:
+            fields_system = self.world.systems.fields
+            entities = []
+            for grid, indices in cells:
+                for index in indices:
+                    x_pos, y_pos = grid.position(*divmod(index, grid.cols))
+                    entity = self.crop_for_field(
+                        fields_system.field_at(grid.layer, x_pos, y_pos))
+                    if entity is not None:
+                        entities.append(entity)
+        crop_c_name = Crop.registered_as
+        for entity in entities:
+            self._sync_crop(entity, getattr(entity, crop_c_name))
+            if self.store is not None and entity in self.store:
+                self.store.pull(entity)
+        change()
+        for entity in entities:
+            self._schedule(entity, getattr(entity, crop_c_name))
+
+    def _settle_evicted(self, cells=None):
+        """Advances evicted crops to the current day, so a change of the
+        input of their cells only counts from now on
+
+        Args:
+
+            cells: The (grid, cell indices) of the cells, None for all
+            evicted crops
+        """
+        if cells is None:
+            identifiers = list(self.__offscreen)
+        else:
+            identifiers = ["%s_%d_%d" % ((grid.name,) +
+                                         divmod(index, grid.cols))
+                           for grid, indices in cells for index in indices]
+        grids = self.world.systems.fields.grids
+        for identifier in identifiers:
+            state = self.__offscreen.get(identifier)
+            if state is None or state[1] == self.day:
+                continue
+            record, evicted_day, field_name, index = state
+            grid = grids.get(field_name)
+            if grid is None:
+                continue
+            elapsed = self.day - evicted_day
+            growth.fast_forward(record, self.fruits[record.fruit_id],
+                                grid.cell(*divmod(index, grid.cols)),
+                                elapsed,
+                                self._cell_input(grid, index, -elapsed))
+            self.__offscreen[identifier] = (record, self.day, field_name,
+                                            index)
+
+    def sync_crops(self):
+        """Updates the days of all crops when the transitions are scheduled.
+
+        This has to be called before the crops are saved.
+        """
+        if self.scheduler is None:
+            return
+        for entity in self.scheduler.keys():
+            crop = getattr(entity, Crop.registered_as)
+            self._sync_crop(entity, crop)
+            if self.store is not None and entity in self.store:
+                self.store.pull(entity)
+
+    def field_changed(self, field):
+        """Notifies the system that a field got water or sun
+
+        Args:
+
+            field: The field entity
+        """
+        if self.scheduler is None:
+            return
+        entity = self.crop_for_field(field)
+        if entity is not None:
+            self.__fed_crops.add(entity)
+
+    def mark_dirty(self, entity):
+        """Marks a crop entity as changed, so it is evaluated on the next step
+
+        Args:
+
+            entity: The crop entity
+        """
+        if self.dirty is not None:
+            self.dirty.add(entity)
+
+    def reindex_crops(self):
+        """Rebuilds the index of which crop is on which field.
+
+        This has to be called when crops were created without using
+        plant_crop, for example when loading a saved game. The Fields
+        system calls it when it sets up its fields and it is called when a
+        crop is not in the index. Crops that were not in the index before
+        are added to the store and the scheduler, if they are used, and
+        crops that are gone are removed from them. On the first call all
+        indexed crops are added, so crops that were created after the modes
+        were set are tracked as well. Crops whose field does not exist are
+        not indexed.
+        """
+        known = self.__crop_fields
+        self.__field_crops = {}
+        self.__crop_fields = {}
+        self.__index_misses = set()
+        for entity in getattr(self.world[...], Crop.registered_as):
+            crop = getattr(entity, Crop.registered_as)
+            field = self.world.get_entity(crop.field_id)
+            if field is not None:
+                self._index_crop(entity, field)
+        if known is None:
+            known = {}
+        for entity in known:
+            if entity not in self.__crop_fields:
+                self._untrack_crop(entity)
+        for entity in self.__crop_fields:
+            if entity not in known:
+                self._track_crop(entity)
+
+    def _index_crop(self, entity, field):
+        """Adds a crop entity and its field entity to the index"""
+        if self.__field_crops is None:
+            self.reindex_crops()
+        self.__field_crops[field] = entity
+        self.__crop_fields[entity] = field
+
+    def crop_for_field(self, field):
+        """Returns the crop that is on a field
+
+        Args:
+
+            field: The field entity
+
+        Returns:
+            The crop entity or None if there is no crop on the field.
+        """
+        if self.__field_crops is None:
+            self.reindex_crops()
+        entity = self.__field_crops.get(field)
+        if (entity is None and field is not None and
+                field not in self.__index_misses and
+                field.identifier not in self.__offscreen and
+                self.world.systems.fields.get_field(field).has_plant):
+            self.reindex_crops()
+            entity = self.__field_crops.get(field)
+            if entity is None:
+                self.__index_misses.add(field)
+        return entity
+
+    def field_for_crop(self, crop):
+        """Returns the field a crop is on
+
+        Args:
+
+            crop: The crop entity
+
+        Returns:
+            The field entity or None if the crop is not known.
+        """
+        if self.__crop_fields is None:
+            self.reindex_crops()
+        field = self.__crop_fields.get(crop)
+        if field is None and crop not in self.__index_misses:
+            self.reindex_crops()
+            field = self.__crop_fields.get(crop)
+            if field is None:
+                self.__index_misses.add(crop)
+        return field
+
+    def _add_to_store(self, entity):
+        """Adds a crop entity to the store, if its field is known"""
+        field_entity = self.field_for_crop(entity)
+        if field_entity is None:
+            return
+        crop = getattr(entity, Crop.registered_as)
+        field = self.world.systems.fields.get_field(field_entity)
+        self.store.add(entity, crop, field)
+
+    def _track_crop(self, entity):
+        """Adds a crop entity that was created without plant_crop to the
+        store and the scheduler, if they are used"""
+        crop = getattr(entity, Crop.registered_as)
+        if self.store is not None and entity not in self.store:
+            self._add_to_store(entity)
+        if self.scheduler is not None and entity not in self.scheduler:
+            self.scheduler.add(entity)
+            self._schedule(entity, crop)
+        self.mark_dirty(entity)
+        self._update_gfx(entity, crop)
+
+    def _untrack_crop(self, entity):
+        """Removes a crop entity from the store, the scheduler and the
+        changed crops"""
+        if self.store is not None and entity in self.store:
+            self.store.remove(entity)
+        if self.dirty is not None:
+            self.dirty.discard(entity)
+        if self.scheduler is not None:
+            self.scheduler.remove(entity)
+            self.__fed_crops.discard(entity)
+        self.sprites.forget(entity)
+
+    def _update_gfx(self, entity, crop):
+        """Sets the graphics of a crop entity to the ones of its stage"""
+        stage = self.fruits[crop.fruit_id].stages[crop.stage]
+        self.sprites.set(entity, stage.gfx, stage.namespace)
+
     def add_fruit(self, identifier, fruit_data):
-        """Adds a fruit to the system"""
+        """Adds a fruit to the system
+
+        Args:
+
+            identifier: The identifier of the fruit
+
+            fruit_data: The data of the fruit, either as a dictionary in the
+            format of the config file or as a compiled Fruit.
+        """
         if identifier not in self.fruits:
-            self.fruits[identifier] = fruit_data
+            fruit = compile_fruit(identifier, fruit_data)
+            self.__added_fruits[identifier] = fruit
+            self.fruits[identifier] = fruit
 
     def plant_crop(self, field, fruit):
         """pPant a crop on a field
@@ -106,70 +546,368 @@ class Crops(Base):
         """
         if isinstance(field, str):
             field = self.world.get_entity(field)
-        field_comp = getattr(field, Field.registered_as)
+        field_comp = self.world.systems.fields.get_field(field)
         if field_comp.has_plant:
             return
-        fruit_data = self.fruits[fruit]
-        stage_data = fruit_data["stages"][0]
+        crop_data = {}
+        crop_data["fruit_id"] = fruit
+        self._create_crop(field, field_comp, crop_data)
+
+    def _create_crop(self, field, field_comp, crop_data):
+        """Creates a crop entity on a field and adds it to the system
+
+        Args:
+
+            field: The field entity
+
+            field_comp: The state of the field
+
+            crop_data: The data of the Crop component
+
+        Returns:
+            The crop entity
+        """
+        crop_c_name = Crop.registered_as
+        stage = self.fruits[crop_data["fruit_id"]].stages[
+            crop_data.get("stage", 0)]
         comp_data = {}
         agent_data = comp_data["Agent"] = {}
-        agent_data["gfx"] = stage_data["gfx"]
-        if "namespace" in stage_data:
-            agent_data["namespace"] = stage_data["namespace"]
+        agent_data["gfx"] = stage.gfx
+        if stage.namespace is not None:
+            agent_data["namespace"] = stage.namespace
         agent_data["map"] = field.Agent.map
         agent_data["layer"] = "crops"
         agent_data["position"] = field.Agent.position
         agent_data["behaviour_type"] = "Base"
-        crop_data = comp_data["Crop"] = {}
-        crop_data["fruit_id"] = fruit
+        crop_data = comp_data[crop_c_name] = dict(crop_data)
         crop_data["field_id"] = field.identifier
         identifier = "%s_crop" % field.identifier
-        self.world.get_or_create_entity(identifier, comp_data)
+        entity = self.world.get_or_create_entity(identifier, comp_data)
         field_comp.has_plant = True
+        self.world.systems.fields.mark_dirty(field)
+        self._index_crop(entity, field)
+        if self.store is not None:
+            self._add_to_store(entity)
+        if self.scheduler is not None:
+            self.scheduler.add(entity)
+            self._schedule(entity, getattr(entity, crop_c_name))
+            if field_comp.water or field_comp.sun:
+                self.__fed_crops.add(entity)
+        self.mark_dirty(entity)
+        return entity
+
+    def _forget_crop(self, entity):
+        """Removes a crop entity from the system and deletes it. Returns the
+        field entity of the crop."""
+        field = self.field_for_crop(entity)
+        if field is not None:
+            del self.__field_crops[field]
+            del self.__crop_fields[entity]
+        self._untrack_crop(entity)
+        entity.delete()
+        return field
+
+    def remove_crop(self, entity):
+        """Removes a crop from its field and deletes it
+
+        Args:
+
+            entity: The crop entity
+        """
+        field = self._forget_crop(entity)
+        if field is not None:
+            fields_system = self.world.systems.fields
+            fields_system.get_field(field).has_plant = False
+            fields_system.mark_dirty(field)
+
+    def evict_crop(self, entity):
+        """Deletes a crop entity, but keeps its state so it can be restored
+        with restore_crop. The field keeps its plant.
+
+        Args:
+
+            entity: The crop entity
+        """
+        crop = getattr(entity, Crop.registered_as)
+        if self.scheduler is not None:
+            self._sync_crop(entity, crop)
+        record = CropRecord(crop.fruit_id, crop.field_id)
+        record.water = crop.water
+        record.sun = crop.sun
+        record.days = crop.days
+        record.stage = crop.stage
+        record.ripe = bool(crop.ripe)
+        record.harvested = bool(crop.harvested)
+        cell = self.world.systems.fields.get_field(self.field_for_crop(entity))
+        grid = getattr(cell, "grid", None)
+        self.__offscreen[crop.field_id] = (
+            record, self.day, grid and grid.name, getattr(cell, "index", 0))
+        self._forget_crop(entity)
+
+    def discard_evicted_crop(self, field_id):
+        """Forgets the state of a crop that was deleted by evict_crop
+
+        Args:
+
+            field_id: The identifier of the field of the crop
+        """
+        self.__offscreen.pop(field_id, None)
+
+    def restore_crop(self, field):
+        """Creates the crop entity of a field again, that was deleted by
+        evict_crop. The crop is advanced by the days that passed since then.
+
+        Args:
+
+            field: The field entity
+
+        Returns:
+            The crop entity or None if no crop of the field was evicted.
+        """
+        state = self.__offscreen.pop(field.identifier, None)
+        if state is None:
+            return None
+        record, evicted_day = state[:2]
+        fruit_id = record.fruit_id
+        crop_data = {"fruit_id": fruit_id, "water": record.water,
+                     "sun": record.sun, "days": record.days,
+                     "stage": record.stage, "ripe": record.ripe,
+                     "harvested": record.harvested}
+        fields_system = self.world.systems.fields
+        field_comp = fields_system.get_field(field)
+        entity = self._create_crop(field, field_comp, crop_data)
+        elapsed = self.day - evicted_day
+        if elapsed:
+            crop = getattr(entity, Crop.registered_as)
+            if field_comp.water or field_comp.sun:
+                fields_system.mark_dirty(field)
+            growth.fast_forward(crop, self.fruits[fruit_id], field_comp,
+                                elapsed, self._field_input(field, -elapsed))
+            if self.store is not None:
+                self.store.pull(entity)
+            if self.scheduler is not None:
+                self._schedule(entity, crop)
+                self.__fed_crops.discard(entity)
+        self._update_gfx(entity, getattr(entity, Crop.registered_as))
+        return entity
+
+    def harvest(self, entity):
+        """Harvest a ripe crop
+
+        Args:
+
+            entity: The crop entity
+
+        Returns:
+            True if the crop was harvested, False if it was not ripe.
+        """
+        crop = getattr(entity, Crop.registered_as)
+        if self.scheduler is not None:
+            self._sync_crop(entity, crop)
+        if not growth.harvest(crop):
+            return False
+        if self.store is not None and entity in self.store:
+            self.store.pull(entity)
+        if self.scheduler is not None:
+            self._schedule(entity, crop)
+        self.mark_dirty(entity)
+        return True
+
+    def _apply_field_input(self, days=1):
+        """Lets the Weather and Irrigation systems add the sun and water of
+        the next days to the cells without a plant, if they are registered.
+
+        Args:
+
+            days: The number of days
+
+        Returns:
+            True if any input was applied, False if neither system is
+            registered.
+        """
+        applied = False
+        for name in FIELD_INPUT_SYSTEMS:
+            system = getattr(self.world.systems, name, None)
+            if system is not None:
+                system.apply_days(days)
+                applied = True
+        return applied
 
     def advance_day(self):
-        """Advance all crops by one day"""
+        """Advance all crops by one day
+
+        The weather and irrigation of the day are applied to the fields
+        first. Crops that are not scheduled take their part of it directly.
+        """
+        fields_system = self.world.systems.fields
+        self._apply_field_input()
+        self.day += 1
+        if self.scheduler is not None:
+            self.scheduler.advance_day()
+            for entity in self.__fed_crops:
+                crop = getattr(entity, Crop.registered_as)
+                field_entity = self.field_for_crop(entity)
+                field = fields_system.get_field(field_entity)
+                self._sync_crop(entity, crop)
+                growth.take_field_input(crop, field)
+                fields_system.mark_dirty(field_entity)
+                if self.store is not None and entity in self.store:
+                    self.store.pull(entity)
+                self._schedule(entity, crop)
+            self.__fed_crops = set()
+            return
+        if self.store is not None:
+            store = self.store
+            store.pull_fields()
+            for key, water, sun in zip(store.keys, store.field_water,
+                                       store.field_sun):
+                if water or sun:
+                    fields_system.mark_dirty(self.field_for_crop(key))
+            for row, key in enumerate(store.keys):
+                water, sun = self._field_input(self.field_for_crop(key),
+                                               -1).totals(1)
+                store.field_water[row] += water
+                store.field_sun[row] += sun
+            store.advance_day()
+            store.push()
+            if self.dirty is not None:
+                self.dirty.update(store.keys)
+            return
         entities = getattr(self.world[...], Crop.registered_as)
         for entity in entities:
+            field_entity = self.field_for_crop(entity)
+            if field_entity is None:
+                continue
+            self.mark_dirty(entity)
             crop = getattr(entity, Crop.registered_as)
-            add_days(crop, 1)
-            field_entity = self.world.get_entity(crop.field_id)
-            field = getattr(field_entity,  Field.registered_as)
-            crop.water += field.water
-            field.water = 0
-            crop.sun += field.sun
-            field.sun = 0
+            field = fields_system.get_field(field_entity)
+            if field.water or field.sun:
+                fields_system.mark_dirty(field_entity)
+            growth.advance_day(crop, field)
+            water, sun = self._field_input(field_entity, -1).totals(1)
+            crop.water += water
+            crop.sun += sun
+
+    def advance_days(self, days):
+        """Advance all crops by a number of days
+
+        This gives the same result as calling advance_day and step for each
+        day, but each crop jumps directly to its final state. The input of
+        the Weather and Irrigation systems is added to the fields at once,
+        the crops take the input of each day from the running totals.
+
+        Args:
+
+            days: The number of days to advance
+        """
+        if days <= 0:
+            return
+        scheduler = self.scheduler
+        if scheduler is not None:
+            self.sync_crops()
+        self._apply_field_input(days)
+        self.day += days
+        if scheduler is not None:
+            scheduler.advance_day(days)
+            self.__fed_crops = set()
+        fields_system = self.world.systems.fields
+        entities = getattr(self.world[...], Crop.registered_as)
+        for entity in entities:
+            field_entity = self.field_for_crop(entity)
+            if field_entity is None:
+                continue
+            crop = getattr(entity, Crop.registered_as)
+            field = fields_system.get_field(field_entity)
+            if field.water or field.sun:
+                fields_system.mark_dirty(field_entity)
+            growth.fast_forward(crop, self.fruits[crop.fruit_id], field, days,
+                                self._field_input(field_entity, -days))
+            if self.store is not None and entity in self.store:
+                self.store.pull(entity)
+            if scheduler is not None:
+                scheduler.mark_synced(entity)
+                self._schedule(entity, crop)
+            self._update_gfx(entity, crop)
+            self.mark_dirty(entity)
+
+    def update_crop(self, entity, crop):
+        """Moves a crop to its next stage if the requirements are met and
+        updates its graphics.
+
+        Args:
+
+            entity: The crop entity
+
+            crop: The Crop component of the crop
+
+        Returns:
+            True if the crop was changed, False if not.
+        """
+        changed = growth.update_stage(crop, self.fruits[crop.fruit_id])
+        self._update_gfx(entity, crop)
+        return changed
 
     def step(self, dt):
         Base.step(self, dt)
-        for agent, crop in self.world.components.join(Agent.registered_as,
-                                                      Crop.registered_as):
-            fruit_data = self.fruits[crop.fruit_id]
-            stage_data = fruit_data["stages"][crop.stage]
-            if crop.harvested:
-                if crop.days > 0:
-                    if "regrows" in fruit_data:
-                        crop.harvested = False
-                        regrows = fruit_data["regrows"]
-                        crop.stage = regrows
-                        stage_data = fruit_data["stages"][regrows]
-                else:
-                    harvested = fruit_data["harvested"]
-                    crop.stage = harvested
-                    stage_data = fruit_data["stages"][harvested]
-            elif (crop.stage >= len(fruit_data["stages"]) - 1 or
-                    crop.ripe):
-                pass
-            elif (crop.days >= stage_data["min_days"] and
-                  crop.water >= stage_data["water"] and
-                  crop.sun >= stage_data["sun"]):
-                crop.sun = 0
-                crop.water = 0
-                crop.days = 0
-                crop.stage += 1
-                stage_data = fruit_data["stages"][crop.stage]
-                if crop.stage == fruit_data["ripe"]:
-                    crop.ripe = True
-            agent.gfx = stage_data["gfx"]
-            if "namespace" in stage_data:
-                agent.namespace = stage_data["namespace"]
+        if self.fruit_table.reload_if_changed():
+            self._reload_fruits()
+        self._update_stages()
+        self.sprites.flush()
+
+    def _update_stages(self):
+        """Updates the stages of the crops that can change"""
+        if self.scheduler is not None:
+            self._step_scheduled()
+        elif self.store is not None:
+            self._step_store()
+        else:
+            self._step_components()
+
+    def _step_scheduled(self):
+        """Updates the crops that are due"""
+        due = self.scheduler.pop_due()
+        self.evaluated_crops = len(due)
+        for entity in due:
+            crop = getattr(entity, Crop.registered_as)
+            self._sync_crop(entity, crop)
+            self.update_crop(entity, crop)
+            if self.store is not None and entity in self.store:
+                self.store.pull(entity)
+            self._schedule(entity, crop)
+
+    def _step_store(self):
+        """Updates the crops in the store"""
+        store = self.store
+        dirty = self.dirty
+        if dirty is None:
+            rows = None
+            self.evaluated_crops = len(store)
+        else:
+            self.dirty = set()
+            rows = [store.rows[entity] for entity in dirty
+                    if entity in store]
+            self.evaluated_crops = len(rows)
+        changed = store.update_stages(self.fruits, rows)
+        store.push(changed, fields=False)
+        for row in changed:
+            self._update_gfx(store.keys[row], store.crops[row])
+            self.mark_dirty(store.keys[row])
+
+    def _step_components(self):
+        """Updates the crops directly on their components"""
+        dirty = self.dirty
+        if dirty is None:
+            evaluated = 0
+            for entity in getattr(self.world[...], Crop.registered_as):
+                self.update_crop(entity, getattr(entity, Crop.registered_as))
+                evaluated += 1
+            self.evaluated_crops = evaluated
+            return
+        self.dirty = set()
+        self.evaluated_crops = len(dirty)
+        for entity in dirty:
+            crop = getattr(entity, Crop.registered_as)
+            if not crop:
+                continue
+            if self.update_crop(entity, crop):
+                self.dirty.add(entity)
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""This system executes actions over several frames.
+
+.. module:: executor
+    :synopsis: Executes actions over several frames
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+import time
+from collections import deque
+
+from fife_rpg.systems import Base
+
+
+class ActionExecutor(Base):
+
+    """This system executes queued actions over several frames.
+
+    Actions that have an execute_steps method, like the field actions, are
+    worked on one cell at a time until the time budget of the frame is
+    used up. Other actions are executed at once. At least one step is done
+    in each frame, so the actions always make progress. The budget can be
+    set with the ActionBudget setting of the pixel-farm module, see
+    load_settings.
+
+    Attributes
+    ----------
+    budget : int
+        The time in microseconds that may be spent on actions in a frame
+
+    queue : collections.deque
+        The actions that were not started yet
+
+    frame_costs : collections.deque
+        The time in microseconds spent on actions in the last frames in
+        which actions were run
+    """
+
+    def __init__(self, budget=2000, history=600):
+        Base.__init__(self)
+        self.budget = budget
+        self.queue = deque()
+        self.frame_costs = deque(maxlen=history)
+        self.__steps = None
+
+    @classmethod
+    def register(cls, name="ActionExecutor"):
+        """Registers the class as a system
+
+        Args:
+            name: The name under which the class should be registered
+
+        Returns:
+            True if the system was registered, False if not.
+        """
+        return super(ActionExecutor, cls).register(name)
+
+    def load_settings(self, settings):
+        """Reads the time budget from the settings
+
+        Args:
+
+            settings: The fife.extensions.fife_settings.Setting object of the
+            application. The ActionBudget value of the pixel-farm module is
+            used, the current budget is kept if it is not set.
+        """
+        self.budget = int(settings.get("pixel-farm", "ActionBudget",
+                                       self.budget))
+
+    @property
+    def busy(self):
+        """Whether there are actions that are not finished"""
+        return self.__steps is not None or bool(self.queue)
+
+    def add(self, action):
+        """Queues an action to be executed in the next frames
+
+        Args:
+            action: The action to execute
+        """
+        self.queue.append(action)
+
+    def run(self, deadline):
+        """Runs the queued actions until the deadline is reached or all
+        actions are finished
+
+        Args:
+            deadline: The time.perf_counter value at which to stop
+
+        Returns:
+            The number of steps that were done.
+        """
+        steps = 0
+        while True:
+            if self.__steps is None:
+                if not self.queue:
+                    break
+                action = self.queue.popleft()
+                execute_steps = getattr(action, "execute_steps", None)
+                if execute_steps is None:
+                    action.execute()
+                    steps += 1
+                    if time.perf_counter() >= deadline:
+                        break
+                    continue
+                self.__steps = execute_steps()
+            try:
+                next(self.__steps)
+            except StopIteration:
+                self.__steps = None
+            else:
+                steps += 1
+            if time.perf_counter() >= deadline:
+                break
+        return steps
+
+    def flush(self):
+        """Runs all queued actions to the end"""
+        self.run(float("inf"))
+
+    def frame_cost(self):
+        """Returns the median and 99th percentile of the frame costs
+
+        Returns:
+            A (p50, p99) tuple of microseconds, (0, 0) if no actions were
+            run yet.
+        """
+        if not self.frame_costs:
+            return 0, 0
+        costs = sorted(self.frame_costs)
+        count = len(costs)
+        return costs[(count - 1) // 2], costs[-(-count * 99 // 100) - 1]
+
+    def frame_cost_text(self):
+        """Returns a line that describes the frame costs and the budget"""
+        p50, p99 = self.frame_cost()
+        return "actions: p50 %d us, p99 %d us, budget %d us, %d frames" % (
+            p50, p99, self.budget, len(self.frame_costs))
+
+    def step(self, dt):
+        Base.step(self, dt)
+        if not self.busy:
+            return
+        start = time.perf_counter()
+        self.run(start + self.budget / 1000000.0)
+        self.frame_costs.append((time.perf_counter() - start) * 1000000.0)
@@ -23,19 +23,101 @@
 
 
 
-import yaml
-
+from fife import fife
 from fife_rpg.systems import Base
 from fife_rpg.components.agent import Agent
 
 from pixel_farm.components.field import Field
+from pixel_farm.config import load_config
+from pixel_farm.field_grid import FieldGrid
+from pixel_farm.autotile import border_tiles, update_border_tiles
+from pixel_farm.field_layout import (border_entities, border_identifier,
+                                     cell_entities, create_entities)
+from pixel_farm.field_rules import get_soil_gfx
+from pixel_farm.sprites import SpriteStates
+from pixel_farm.validity import ValidityMap
+
+
+def get_field(entity):
+    """Returns the state of a field entity
+
+    Args:
+
+        entity: The field entity
+
+    Returns:
+        The cell of the entity in the grid of the fields system or its Field
+        component if it is not part of a grid.
+    """
+    return entity.world.systems.fields.get_field(entity)
 
 
 class Fields(Base):
 
-    "This system manages the fields."
+    """This system manages the fields.
+
+    Attributes
+    ----------
+    sprites : pixel_farm.sprites.SpriteStates
+        The graphics of the field cells. Only changed graphics are set on the
+        agents, once per step. sprites.pushed is the number of cells whose
+        graphics were set in the last step.
+
+    grids : dict[str, pixel_farm.field_grid.FieldGrid]
+        The state of the cells of each configured field. The grids hold the
+        current state of the cells, use get_field to get the state of a
+        field entity. The Field components of the cells are a separate copy
+        of the state. The components of the cells that were marked as
+        changed are updated on each step, so they are current after it.
+
+    border_tiles : dict[str, dict]
+        The rotations of the border tiles of each field, by (row, column).
+        They are computed from the shape of the field by
+        pixel_farm.autotile and updated by set_occupied.
+
+    streaming : bool
+        Whether the cell entities only exist around the camera view. The
+        fields are split into chunks of chunk_size x chunk_size cells. A
+        chunk is created when it is at most chunk_margin chunks away from
+        the view and deleted when it is farther away. The state of deleted
+        cells stays in the grids, the state of their crops in the Crops
+        system.
+
+    version : int
+        Incremented when a cell is marked as changed or when cells are added
+        or removed. Results that were computed from the fields are still
+        current as long as the version is the same.
+
+    The cells each field action can be used on are kept in a
+    pixel_farm.validity.ValidityMap per action and field, see get_validity
+    and is_valid. The maps are made when they are first used and then
+    updated one cell at a time, by mark_dirty and set_occupied, so a cell
+    has to be marked with mark_dirty after its state changed. Changes to
+    many cells of a grid at once are marked with mark_grid_changed.
+
+    The fields are set up on the first step after the config was loaded or
+    changed. After that only the cells that were marked with mark_dirty are
+    rendered again. The cell entities are indexed by their layer and
+    position, use field_at and fields_at to look them up.
+    """
 
     def __init__(self):
+        self.sprites = SpriteStates(Agent.registered_as)
+        self.__needs_setup = True
+        self.__dirty = set()
+        self.__changed_grids = set()
+        self.version = 0
+        self.grids = {}
+        self.border_tiles = {}
+        self.__cells = {}
+        self.__positions = {}
+        self.__layers = set()
+        self.__validity = {}
+        self.streaming = False
+        self.chunk_size = 16
+        self.chunk_margin = 1
+        self.__chunks = {}
+        self.__view = None
         self.map = None
         self.layer = None
         self.vert_start = None
@@ -73,144 +155,634 @@ class Fields(Base):
 
             filepath: The path to the config file
         """
-        stream = file(filepath, "r")
-        self.fields = yaml.load(stream)["fields"]
+        self.set_fields(load_config(filepath)["fields"])
+
+    def set_fields(self, fields):
+        """Replaces the configured fields. They are set up on the next step.
+
+        Args:
+
+            fields: The data of the fields by field name, in the format of
+            the config file
+        """
+        self.fields = fields
+        self.sync_components()
+        self.grids = {}
+        self.border_tiles = {}
+        self.__cells = {}
+        self.__positions = {}
+        self.__layers = set()
+        self.__validity = {}
+        self.__chunks = {}
+        self.__view = None
+        self.__changed_grids = set()
+        self.__needs_setup = True
+        self.version += 1
+
+    def mark_dirty(self, entity):
+        """Marks a field cell as changed, so it is rendered on the next step
+        and the actions that can be used on it are updated.
+
+        Args:
+
+            entity: The field entity
+        """
+        self.__dirty.add(entity)
+        self.version += 1
+        cell = self.__cells.get(entity)
+        if cell is not None:
+            self._update_validity(cell)
+
+    def mark_cells_dirty(self, grid, indices):
+        """Marks cells of a grid as changed. The cells that have an entity
+        are rendered on the next step, the others when they are created.
+
+        Args:
+
+            grid: The grid of the field
+
+            indices: The indices of the cells in the grid
+        """
+        positions = self.__positions
+        layer = grid.layer
+        for index in indices:
+            x_pos, y_pos = grid.position(*divmod(index, grid.cols))
+            entity = positions.get((layer, x_pos, y_pos))
+            if entity is not None:
+                self.__dirty.add(entity)
+        self.version += 1
+
+    def mark_grid_changed(self, grid):
+        """Marks that any cell of a grid may have changed, without rendering
+        the cells again. The Field components of its cells are updated on
+        the next step.
+
+        Args:
+
+            grid: The grid of the field
+        """
+        self.__changed_grids.add(grid.name)
+
+    def mark_all_dirty(self):
+        """Marks all field cells as changed, so they are rendered on the next
+        step"""
+        self.__dirty.update(self.__cells)
+        self.version += 1
+
+    def setup_fields(self):
+        """Sets up all configured fields and marks their cells for rendering.
+
+        The grid of each field is filled from the Field components of its
+        cells, so the state of a loaded game is kept. The entities of all
+        fields are created first, then the agents of each map are updated
+        once. The Crops system then indexes the crops on the fields again.
+        """
+        self.__needs_setup = False
+        maps = set()
+        for field_name, field_data in self.fields.items():
+            grid = self.grids.get(field_name)
+            load = grid is None
+            if load:
+                grid = self.grids[field_name] = FieldGrid(field_name,
+                                                          field_data)
+            cells = grid.occupied_cells()
+            entities = self.setup_field(field_name, field_data)
+            if entities is None:
+                identifiers = cell_entities(field_name, field_data, cells)[0]
+                entities = [self.world.get_entity(identifier)
+                            for identifier in identifiers]
+            for entity, (row, col) in zip(entities, cells):
+                if entity is not None:
+                    self._add_cell(entity, grid.cell(row, col), load)
+            maps.add(field_data["map"])
+        for map_name in maps:
+            self.world.application.update_agents(map_name)
+        self.world.systems.Crops.reindex_crops()
+
+    def _add_cell(self, entity, cell, load):
+        """Adds a cell entity and marks it for rendering
+
+        Args:
+
+            entity: The cell entity
+
+            cell: The cell of the entity in its grid
+
+            load: Whether the state of the cell should be read from the Field
+            component of the entity
+        """
+        if load and entity not in self.__cells:
+            field = getattr(entity, Field.registered_as)
+            if field:
+                cell.plowed = field.plowed
+                cell.has_plant = field.has_plant
+                cell.water = field.water
+                cell.sun = field.sun
+                self._update_validity(cell)
+        self.__cells[entity] = cell
+        grid = cell.grid
+        x_pos, y_pos = grid.position(cell.row, cell.col)
+        self.__positions[grid.layer, x_pos, y_pos] = entity
+        self.__layers.add(grid.layer)
+        self.__dirty.add(entity)
+        self.version += 1
+        if self.streaming:
+            key = self._chunk_key(cell)
+            entities = self.__chunks.setdefault(key, [])
+            if entity not in entities:
+                entities.append(entity)
+
+    def get_validity(self, action, field_name):
+        """Returns the cells of a field an action can be used on
+
+        Args:
+
+            action: The field action class
+
+            field_name: The identifier of the field
+
+        Returns:
+            The pixel_farm.validity.ValidityMap of the action and field. It
+            is made if it does not exist yet.
+        """
+        maps = self.__validity.setdefault(field_name, {})
+        validity = maps.get(action)
+        if validity is None:
+            validity = maps[action] = ValidityMap(self.grids[field_name],
+                                                  action)
+        return validity
+
+    def is_valid(self, action, entity):
+        """Whether an action can be used on a field entity
+
+        Args:
+
+            action: The field action class
+
+            entity: The field entity
+
+        Returns:
+            True if the action can be used on the entity. The validity map
+            of the action is used if the entity is part of a grid.
+        """
+        cell = self.__cells.get(entity)
+        if cell is None:
+            return action.can_execute_on(entity)
+        return self.get_validity(action, cell.grid.name).is_valid(cell.row,
+                                                                  cell.col)
+
+    def _update_validity(self, cell):
+        """Updates a cell in the validity maps of its field"""
+        for validity in self.__validity.get(cell.grid.name, {}).values():
+            validity.update(cell.row, cell.col)
+
+    def get_field(self, entity):
+        """Returns the state of a field entity
+
+        Args:
+
+            entity: The field entity
+
+        Returns:
+            The cell of the entity in its grid. If the entity is not part of
+            a grid its Field component is returned.
+        """
+        cell = self.__cells.get(entity)
+        if cell is not None:
+            return cell
+        return getattr(entity, Field.registered_as)
+
+    def field_at(self, layer, x_pos, y_pos):
+        """Returns the field entity at a position
+
+        Args:
+
+            layer: The name of the layer
+
+            x_pos: The x layer coordinate
+
+            y_pos: The y layer coordinate
+
+        Returns:
+            The field entity or None if there is no field cell at the
+            position.
+        """
+        return self.__positions.get((layer, x_pos, y_pos))
+
+    def fields_at(self, x_pos, y_pos):
+        """Returns the field entities at a position on all layers
+
+        Args:
+
+            x_pos: The x layer coordinate
+
+            y_pos: The y layer coordinate
+
+        Returns:
+            The list of field entities at the position
+        """
+        positions = self.__positions
+        entities = []
+        for layer in self.__layers:
+            entity = positions.get((layer, x_pos, y_pos))
+            if entity is not None:
+                entities.append(entity)
+        return entities
+
+    def get_cell(self, field_name, row, col):
+        """Returns the state of a cell of a configured field
+
+        Args:
+
+            field_name: The identifier of the field
+
+            row: The row of the cell
+
+            col: The column of the cell
+
+        Returns:
+            The cell in the grid of the field.
+        """
+        return self.grids[field_name].cell(row, col)
+
+    def sync_components(self):
+        """Writes the state of all cells of the grids to the Field
+        components. step only writes the cells that were marked as changed,
+        this is needed when cells may have changed without being marked.
+        """
+        for entity, cell in self.__cells.items():
+            self._sync_component(entity, cell)
+
+    def _sync_component(self, entity, cell):
+        """Writes the state of a cell to the Field component of its
+        entity"""
+        field = getattr(entity, Field.registered_as)
+        field.plowed = cell.plowed
+        field.has_plant = cell.has_plant
+        field.water = cell.water
+        field.sun = cell.sun
 
     def setup_field(self, field_name, field_data):
         """Sets up a single field
 
+        The border tiles are computed from the shape of the field. When
+        streaming is used only the borders are created, the cells are
+        created by update_chunks. The agents of the map are not updated,
+        setup_fields does this once per map.
+
         Args:
 
             field_name: The identifier of the field
 
             fields: The data of the field
+
+        Returns:
+            The cell entities, in the order of the occupied cells of the
+            grid, or None if streaming is used.
         """
-        agent_c_name = Agent.registered_as
-        field_c_name = Field.registered_as
-        if self.world.is_identifier_used("%s_0_0" % field_name):
-            return
+        grid = self.grids.get(field_name)
+        if grid is None:
+            grid = self.grids[field_name] = FieldGrid(field_name, field_data)
+        tiles = self.border_tiles[field_name] = border_tiles(grid)
+        self._create_borders(field_name, field_data, tiles)
+        if self.streaming:
+            return None
+        return self._create_cells(field_name, field_data,
+                                  grid.occupied_cells())
+
+    def _create_borders(self, field_name, field_data, tiles):
+        """Creates the border entities of a field
+
+        Args:
+
+            field_name: The identifier of the field
+
+            field_data: The data of the field
 
-        for i in range(field_data["vert_size"]):
-            identifier = "%s_border_left_%d" % (field_name, i)
-            comp_data = {}
-            agent_data = comp_data[agent_c_name] = {}
-            agent_data["map"] = field_data["map"]
-            agent_data["layer"] = field_data["layer"]
-            agent_data["namespace"] = "LPC"
-            agent_data["gfx"] = "grass/soil"
-            agent_data["rotation"] = 270
-            v_pos = field_data["vert_start"] + i
-            h_pos = field_data["horz_start"] - 1
-            agent_data["position"] = [h_pos, v_pos]
-            agent_data["behaviour_type"] = "Base"
-            self.world.get_or_create_entity(identifier, comp_data)
-            h_pos = field_data["horz_start"] + field_data["horz_size"]
-            agent_data["position"] = [h_pos, v_pos]
-            agent_data["rotation"] = 90
-            identifier = "%s_border_right_%d" % (field_name, i)
-            self.world.get_or_create_entity(identifier, comp_data)
-
-        comp_data = {}
-        agent_data = comp_data[agent_c_name] = {}
+            tiles: The rotations of the border tiles by (row, column)
+        """
+        agent_c_name = Agent.registered_as
+        agent_data = {}
         agent_data["map"] = field_data["map"]
         agent_data["layer"] = field_data["layer"]
         agent_data["namespace"] = "LPC"
         agent_data["gfx"] = "grass/soil"
         agent_data["behaviour_type"] = "Base"
+        identifiers, positions, rotations = border_entities(field_name,
+                                                            field_data, tiles)
+        create_entities(self.world, {agent_c_name: agent_data}, identifiers,
+                        positions, rotations, agent_c_name)
+
+    def _create_cells(self, field_name, field_data, cells):
+        """Creates the cell entities of a field
+
+        Args:
+
+            field_name: The identifier of the field
+
+            field_data: The data of the field
+
+            cells: The (row, column) of the cells
+
+        Returns:
+            The cell entities, in the order of the cells
+        """
+        agent_c_name = Agent.registered_as
+        agent_data = {}
+        agent_data["map"] = field_data["map"]
+        agent_data["layer"] = field_data["layer"]
+        agent_data["namespace"] = "LPC"
+        agent_data["gfx"] = "soil:01"
+        agent_data["behaviour_type"] = "Base"
+        template = {agent_c_name: agent_data,
+                    Field.registered_as: {"plowed": False}}
+        identifiers, positions = cell_entities(field_name, field_data, cells)
+        return create_entities(self.world, template, identifiers, positions,
+                               agent_name=agent_c_name)
+
+    def _remove_cell(self, entity):
+        """Removes a cell entity and deletes it"""
+        cell = self.__cells.pop(entity, None)
+        if cell is not None:
+            grid = cell.grid
+            x_pos, y_pos = grid.position(cell.row, cell.col)
+            self.__positions.pop((grid.layer, x_pos, y_pos), None)
+        self.__dirty.discard(entity)
+        self.version += 1
+        self.sprites.forget(entity)
+        entity.delete()
+
+    def set_occupied(self, field_name, row, col, occupied):
+        """Adds a cell to a field or removes it, which changes the shape of
+        the field. Only the borders next to the cell are updated.
+
+        Args:
 
-        identifier = "%s_border_top_right" % (field_name)
-        v_pos = field_data["vert_start"] - 1
-        h_pos = field_data["horz_start"] + field_data["horz_size"]
-        agent_data["position"] = [h_pos, v_pos]
-        agent_data["rotation"] = 45
-        self.world.get_or_create_entity(identifier, comp_data)
-
-        identifier = "%s_border_bottom_right" % (field_name)
-        v_pos = field_data["vert_start"] + field_data["vert_size"]
-        h_pos = field_data["horz_start"] + field_data["horz_size"]
-        agent_data["position"] = [h_pos, v_pos]
-        agent_data["rotation"] = 135
-        self.world.get_or_create_entity(identifier, comp_data)
-
-        identifier = "%s_border_bottom_left" % (field_name)
-        v_pos = field_data["vert_start"] + field_data["vert_size"]
-        h_pos = field_data["horz_start"] - 1
-        agent_data["position"] = [h_pos, v_pos]
-        agent_data["rotation"] = 225
-        self.world.get_or_create_entity(identifier, comp_data)
-
-        identifier = "%s_border_top_left" % (field_name)
-        v_pos = field_data["vert_start"] - 1
-        h_pos = field_data["horz_start"] - 1
-        agent_data["position"] = [h_pos, v_pos]
-        agent_data["rotation"] = 315
-        self.world.get_or_create_entity(identifier, comp_data)
-
-        for i in range(field_data["horz_size"]):
-            identifier = "%s_border_top_%d" % (field_name, i)
-            comp_data = {}
-            agent_data = comp_data[agent_c_name] = {}
-            agent_data["map"] = field_data["map"]
-            agent_data["layer"] = field_data["layer"]
-            agent_data["namespace"] = "LPC"
-            agent_data["gfx"] = "grass/soil"
-            agent_data["rotation"] = 0
-            v_pos = field_data["vert_start"] - 1
-            h_pos = field_data["horz_start"] + i
-            agent_data["position"] = [h_pos, v_pos]
-            agent_data["behaviour_type"] = "Base"
-            self.world.get_or_create_entity(identifier, comp_data)
-            v_pos = field_data["vert_start"] + field_data["vert_size"]
-            agent_data["position"] = [h_pos, v_pos]
-            agent_data["rotation"] = 180
-            identifier = "%s_border_bottom_%d" % (field_name, i)
-            self.world.get_or_create_entity(identifier, comp_data)
-
-        for i in range(field_data["vert_size"]):
-            for j in range(field_data["horz_size"]):
-                identifier = "%s_%d_%d" % (field_name, i, j)
-                if self.world.is_identifier_used(identifier):
-                    continue
-                comp_data = {}
-                agent_data = comp_data[agent_c_name] = {}
-                agent_data["map"] = field_data["map"]
-                agent_data["layer"] = field_data["layer"]
-                agent_data["namespace"] = "LPC"
-                agent_data["gfx"] = "soil:01"
-                v_pos = field_data["vert_start"] + i
-                h_pos = field_data["horz_start"] + j
-                agent_data["position"] = [h_pos, v_pos]
-                agent_data["behaviour_type"] = "Base"
-                field_c_data = comp_data[field_c_name] = {}
-                field_c_data["plowed"] = False
-                self.world.get_or_create_entity(identifier, comp_data)
+            field_name: The identifier of the field
+
+            row: The row of the cell
+
+            col: The column of the cell
+
+            occupied: True to add the cell, False to remove it
+        """
+        grid = self.grids[field_name]
+        field_data = self.fields[field_name]
+        index = grid.index(row, col)
+        if bool(grid.occupied[index]) == bool(occupied):
+            return
+        cell = grid.cell(row, col)
+        identifier = "%s_%d_%d" % (field_name, row, col)
+        if occupied:
+            grid.occupied[index] = True
+            if not self.streaming or self._chunk_key(cell) in self.__chunks:
+                entities = self._create_cells(field_name, field_data,
+                                              [(row, col)])
+                self._add_cell(entities[0], cell, False)
+        else:
+            crops = self.world.systems.Crops
+            entity = self.world.get_entity(identifier)
+            if entity is not None:
+                crop = crops.crop_for_field(entity)
+                if crop is not None:
+                    crops.remove_crop(crop)
+                if self.streaming:
+                    entities = self.__chunks.get(self._chunk_key(cell))
+                    if entities is not None and entity in entities:
+                        entities.remove(entity)
+                self._remove_cell(entity)
+            crops.discard_evicted_crop(identifier)
+            grid.occupied[index] = False
+            cell.plowed = False
+            cell.has_plant = False
+            cell.water = 0
+            cell.sun = 0
+        self._update_validity(cell)
+        tiles = self.border_tiles[field_name]
+        changed = update_border_tiles(grid, tiles, [(row, col)])
+        added = {}
+        for (tile_row, tile_col), old in changed.items():
+            new = tiles.get((tile_row, tile_col), ())
+            for rotation in old:
+                if rotation not in new:
+                    entity = self.world.get_entity(border_identifier(
+                        field_name, tile_row, tile_col, rotation))
+                    if entity is not None:
+                        entity.delete()
+            rotations = tuple(rotation for rotation in new
+                              if rotation not in old)
+            if rotations:
+                added[tile_row, tile_col] = rotations
+        self._create_borders(field_name, field_data, added)
         self.world.application.update_agents(field_data["map"])
 
+    def load_settings(self, settings):
+        """Reads from the settings whether the cells should be streamed
+
+        Args:
+
+            settings: The fife.extensions.fife_settings.Setting object of the
+            application. The FieldStreaming, ChunkSize and ChunkMargin values
+            of the pixel-farm module are used. Streaming is used if it is
+            not set, the current chunk size and margin are kept if they are
+            not set.
+        """
+        self.use_streaming(
+            settings.get("pixel-farm", "FieldStreaming", True),
+            int(settings.get("pixel-farm", "ChunkSize", self.chunk_size)),
+            int(settings.get("pixel-farm", "ChunkMargin", self.chunk_margin)))
+
+    def use_streaming(self, use=True, chunk_size=16, chunk_margin=1):
+        """Sets whether the cell entities should only exist around the view
+
+        Args:
+
+            use: True to create and delete the cells with the view, False to
+            keep all cells
+
+            chunk_size: The number of rows and columns of a chunk
+
+            chunk_margin: The number of chunks around the view that are kept
+        """
+        if not use:
+            if self.streaming:
+                self.streaming = False
+                maps = set()
+                for key in self._all_chunks():
+                    if key not in self.__chunks:
+                        self.load_chunk(key)
+                        maps.add(self.fields[key[0]]["map"])
+                for map_name in maps:
+                    self.world.application.update_agents(map_name)
+                self.__chunks = {}
+            return
+        self.streaming = True
+        self.chunk_size = chunk_size
+        self.chunk_margin = chunk_margin
+        self.__view = None
+        chunks = {}
+        for entity, cell in self.__cells.items():
+            chunks.setdefault(self._chunk_key(cell), []).append(entity)
+        self.__chunks = chunks
+
+    def _chunk_key(self, cell):
+        """Returns the key of the chunk of a cell"""
+        size = self.chunk_size
+        return cell.grid.name, cell.row // size, cell.col // size
+
+    def _chunk_ranges(self, key):
+        """Returns the rows and columns of the cells of a chunk"""
+        field_name, chunk_row, chunk_col = key
+        grid = self.grids[field_name]
+        size = self.chunk_size
+        rows = range(chunk_row * size, min((chunk_row + 1) * size, grid.rows))
+        cols = range(chunk_col * size, min((chunk_col + 1) * size, grid.cols))
+        return rows, cols
+
+    def _all_chunks(self):
+        """Returns the keys of all chunks of all fields"""
+        size = self.chunk_size
+        keys = []
+        for field_name, grid in self.grids.items():
+            for chunk_row in range((grid.rows + size - 1) // size):
+                for chunk_col in range((grid.cols + size - 1) // size):
+                    keys.append((field_name, chunk_row, chunk_col))
+        return keys
+
+    def _chunks_in_rect(self, field_name, rect):
+        """Returns the keys of the chunks of a field that are in or near a
+        rectangle of layer coordinates"""
+        grid = self.grids[field_name]
+        x_min, y_min, x_max, y_max = rect
+        size = self.chunk_size
+        margin = self.chunk_margin
+        first_row = max(0, (y_min - grid.vert_start) // size - margin)
+        last_row = min((grid.rows - 1) // size,
+                       (y_max - grid.vert_start) // size + margin)
+        first_col = max(0, (x_min - grid.horz_start) // size - margin)
+        last_col = min((grid.cols - 1) // size,
+                       (x_max - grid.horz_start) // size + margin)
+        return [(field_name, chunk_row, chunk_col)
+                for chunk_row in range(first_row, last_row + 1)
+                for chunk_col in range(first_col, last_col + 1)]
+
+    def load_chunk(self, key):
+        """Creates the cell entities of a chunk and restores their crops
+
+        Args:
+
+            key: The (field name, chunk row, chunk column) of the chunk
+        """
+        if key in self.__chunks:
+            return
+        field_name = key[0]
+        grid = self.grids[field_name]
+        cells = grid.occupied_cells(*self._chunk_ranges(key))
+        entities = self._create_cells(field_name, self.fields[field_name],
+                                      cells)
+        self.__chunks[key] = entities
+        crops = self.world.systems.Crops
+        for entity, (row, col) in zip(entities, cells):
+            self._add_cell(entity, grid.cell(row, col), False)
+            crops.restore_crop(entity)
+
+    def evict_chunk(self, key):
+        """Deletes the cell entities of a chunk and their crops. Their state
+        is kept in the grid and the Crops system.
+
+        Args:
+
+            key: The (field name, chunk row, chunk column) of the chunk
+        """
+        entities = self.__chunks.pop(key, ())
+        crops = self.world.systems.Crops
+        for entity in entities:
+            crop = crops.crop_for_field(entity)
+            if crop is not None:
+                crops.evict_crop(crop)
+            self._remove_cell(entity)
+
+    def get_view_rect(self, game_map, layer_name):
+        """Returns the part of a layer that is shown by the camera
+
+        Args:
+
+            game_map: The map
+
+            layer_name: The name of the layer
+
+        Returns:
+            The smallest and largest x and y layer coordinates that are in
+            the view.
+        """
+        camera = game_map.camera
+        cell_grid = game_map.get_layer(layer_name).getCellGrid()
+        viewport = camera.getViewPort()
+        left = viewport.getX()
+        top = viewport.getY()
+        right = left + viewport.getW()
+        bottom = top + viewport.getH()
+        x_coords = []
+        y_coords = []
+        for screen_x, screen_y in ((left, top), (right, top),
+                                   (left, bottom), (right, bottom)):
+            map_coords = camera.toMapCoordinates(
+                fife.ScreenPoint(screen_x, screen_y), False)
+            coords = cell_grid.toLayerCoordinates(map_coords)
+            x_coords.append(coords.x)
+            y_coords.append(coords.y)
+        return min(x_coords), min(y_coords), max(x_coords), max(y_coords)
+
+    def update_chunks(self):
+        """Creates the chunks that came near the view and deletes the ones
+        that left it"""
+        game_map = self.world.application.current_map
+        if game_map is None:
+            return
+        views = {}
+        for field_data in self.fields.values():
+            layer_name = field_data["layer"]
+            if field_data["map"] == game_map.name and layer_name not in views:
+                views[layer_name] = self.get_view_rect(game_map, layer_name)
+        view = (game_map.name, views)
+        if view == self.__view:
+            return
+        self.__view = view
+        wanted = set()
+        for field_name, field_data in self.fields.items():
+            if field_data["map"] == game_map.name:
+                wanted.update(self._chunks_in_rect(
+                    field_name, views[field_data["layer"]]))
+        for key in list(self.__chunks):
+            if key not in wanted:
+                self.evict_chunk(key)
+        loaded = False
+        for key in wanted:
+            if key not in self.__chunks:
+                self.load_chunk(key)
+                loaded = True
+        if loaded:
+            self.world.application.update_agents(game_map.name)
+
     def step(self, dt):
         Base.step(self, dt)
-        for field_name in self.fields.keys():
-            field_data = self.fields[field_name]
-            self.setup_field(field_name, field_data)
-            for i in range(field_data["vert_size"]):
-                for j in range(field_data["horz_size"]):
-                    field_c_name = Field.registered_as
-                    agent_c_name = Agent.registered_as
-                    identifier = "%s_%d_%d" % (field_name, i, j)
-                    entity = self.world.get_entity(identifier)
-                    field = getattr(entity, field_c_name)
-                    field_agent = getattr(entity, agent_c_name)
-                    try:
-                        is_plowed = field.plowed
-                    except AttributeError:
-                        print(identifier)
-                    is_watered = field.water > 0
-                    if is_plowed:
-                        if is_watered:
-                            field_agent.gfx = "plowed_soil_watered"
-                        else:
-                            field_agent.gfx = "plowed_soil"
-                    else:
-                        if is_watered:
-                            field_agent.gfx = "soil_watered"
-                        else:
-                            field_agent.gfx = "soil:01"
+        if self.__needs_setup:
+            self.setup_fields()
+        if self.streaming:
+            self.update_chunks()
+        cells = self.__cells
+        if self.__changed_grids:
+            changed = self.__changed_grids
+            for entity, cell in cells.items():
+                if cell.grid.name in changed:
+                    self._sync_component(entity, cell)
+            self.__changed_grids = set()
+        if self.__dirty:
+            for entity in self.__dirty:
+                field = self.get_field(entity)
+                if field:
+                    self.sprites.set(entity, get_soil_gfx(field))
+                if entity in cells:
+                    self._sync_component(entity, field)
+            self.__dirty = set()
+        self.sprites.flush()
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""This system lets sprinklers water the fields.
+
+.. module:: irrigation
+    :synopsis: Lets sprinklers water the fields
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+from fife_rpg.components.agent import Agent
+from fife_rpg.systems import Base
+
+from pixel_farm.components.sprinkler import Sprinkler
+from pixel_farm.field_input import DailyInput
+from pixel_farm.irrigation import IrrigationMap, sprinkler_coverage
+from pixel_farm.masks import get_mask
+
+
+class Irrigation(Base):
+
+    """This system lets sprinklers water the fields.
+
+    The cells a sprinkler covers are computed when it is added, the water
+    of all sprinklers is added to the fields at once when the Crops system
+    advances the day.
+
+    Attributes
+    ----------
+    map : pixel_farm.irrigation.IrrigationMap
+        The water the sprinklers give each cell per day
+
+    sprinklers : dict
+        The (field name, cell indices) of the coverage of each sprinkler
+        entity, and the water it gives
+
+    All sprinkler entities are added again when the grids of the Fields
+    system change, for example when its config was loaded. Sprinklers that
+    are placed or removed later have to be added with add_sprinkler and
+    removed with remove_sprinkler. The crops get the water from cell_input,
+    so the Crops system is told when the water of cells changes.
+    """
+
+    def __init__(self):
+        Base.__init__(self)
+        self.map = IrrigationMap()
+        self.sprinklers = {}
+        self.__grids = None
+
+    @classmethod
+    def register(cls, name="Irrigation"):
+        """Registers the class as a system
+
+        Args:
+            name: The name under which the class should be registered
+
+        Returns:
+            True if the system was registered, False if not.
+        """
+        return super(Irrigation, cls).register(name)
+
+    def _change_input(self, change, coverage=None):
+        """Changes the water of cells and lets the Crops system update the
+        crops on them
+
+        Args:
+
+            change: Called without arguments to change the water
+
+            coverage: The (field name, cell indices) of the changed cells,
+            None if all cells may change
+        """
+        crops = getattr(self.world.systems, "Crops", None)
+        if crops is None:
+            change()
+            return
+        cells = None
+        if coverage is not None:
+            grids = self.world.systems.fields.grids
+            cells = [(grids[field_name], indices)
+                     for field_name, indices in coverage]
+        crops.change_field_input(change, cells)
+
+    def setup_sprinklers(self):
+        """Adds all sprinkler entities to the current grids"""
+        fields_system = self.world.systems.fields
+        self.__grids = dict(fields_system.grids)
+
+        def setup():
+            self.map.clear()
+            self.sprinklers = {}
+            entities = getattr(self.world[...], Sprinkler.registered_as)
+            for entity in entities:
+                self._add_coverage(entity, self._coverage(entity))
+        self._change_input(setup)
+
+    def _check_grids(self):
+        """Sets the sprinklers up again if the grids changed"""
+        if self.__grids != self.world.systems.fields.grids:
+            self.setup_sprinklers()
+
+    def _coverage(self, entity):
+        """Returns the (field name, cell indices) of the cells a sprinkler
+        covers"""
+        fields_system = self.world.systems.fields
+        sprinkler = getattr(entity, Sprinkler.registered_as)
+        agent = getattr(entity, Agent.registered_as)
+        mask = get_mask(sprinkler.mask)
+        x_pos, y_pos = agent.position[0], agent.position[1]
+        coverage = []
+        for field_name, grid in fields_system.grids.items():
+            if fields_system.fields[field_name].get("map") != agent.map:
+                continue
+            cells = sprinkler_coverage(grid, mask, x_pos, y_pos)
+            if cells:
+                coverage.append((field_name, cells))
+        return coverage
+
+    def _add_coverage(self, entity, coverage):
+        """Adds the water of a sprinkler to the cells it covers"""
+        water = getattr(entity, Sprinkler.registered_as).water
+        grids = self.world.systems.fields.grids
+        for field_name, cells in coverage:
+            self.map.add(grids[field_name], cells, water)
+        self.sprinklers[entity] = (coverage, water)
+
+    def add_sprinkler(self, entity):
+        """Computes the coverage of a sprinkler and adds its water
+
+        Args:
+
+            entity: The sprinkler entity
+        """
+        self._check_grids()
+        if entity in self.sprinklers:
+            return
+        coverage = self._coverage(entity)
+        self._change_input(lambda: self._add_coverage(entity, coverage),
+                           coverage)
+
+    def remove_sprinkler(self, entity):
+        """Removes the water of a sprinkler
+
+        Args:
+
+            entity: The sprinkler entity
+        """
+        self._check_grids()
+        if entity not in self.sprinklers:
+            return
+        coverage, water = self.sprinklers[entity]
+
+        def remove():
+            del self.sprinklers[entity]
+            grids = self.world.systems.fields.grids
+            for field_name, cells in coverage:
+                self.map.add(grids[field_name], cells, -water)
+        self._change_input(remove, coverage)
+
+    def cell_input(self, grid, index, offset):
+        """Returns the water the sprinklers give a cell each day
+
+        Args:
+
+            grid: The grid of the field
+
+            index: The index of the cell in the grid
+
+            offset: The first day, relative to the next day that will be
+            applied. The water is the same every day.
+
+        Returns:
+            The pixel_farm.field_input.DailyInput of the cell
+        """
+        totals = self.map.totals.get(grid.name)
+        if totals is None or len(totals) != len(grid):
+            return DailyInput()
+        return DailyInput(water=totals[index])
+
+    def apply_day(self):
+        """Adds the water of all sprinklers to the fields
+
+        Returns:
+            True if any dry cell got wet, False if not.
+        """
+        return self.apply_days(1)
+
+    def apply_days(self, days):
+        """Adds the water of all sprinklers of the next days to the fields
+        at once
+
+        Args:
+
+            days: The number of days
+
+        Returns:
+            True if any dry cell got wet, False if not.
+        """
+        self._check_grids()
+        fields_system = self.world.systems.fields
+        grids = fields_system.grids
+        wetted = self.map.apply(grids, days)
+        for field_name in self.map.totals:
+            if field_name in grids:
+                fields_system.mark_grid_changed(grids[field_name])
+        for field_name, cells in wetted.items():
+            fields_system.mark_cells_dirty(grids[field_name], cells)
+        return bool(wetted)
+
+    def step(self, dt):
+        Base.step(self, dt)
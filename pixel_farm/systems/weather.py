@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""This system applies the weather to the fields.
+
+.. module:: weather
+    :synopsis: Applies the weather to the fields
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+from fife_rpg.systems import Base
+
+from pixel_farm.field_input import DailyInput
+from pixel_farm.weather import WeatherModel, WeatherTotals
+
+
+class Weather(Base):
+
+    """This system applies the weather to the fields.
+
+    The sun and rain of a day are added to all cells of all fields that
+    have no plant at once, when the Crops system advances the day. Only the
+    cells that got wet are rendered again. The crops get the weather of the
+    days that passed from cell_input when they are looked at.
+
+    Attributes
+    ----------
+    model : pixel_farm.weather.WeatherModel
+        The model that produces the weather of each day
+
+    day : int
+        The number of days the weather was applied. It is only advanced by
+        the Crops system, so the weather of a crop's day is known.
+    """
+
+    def __init__(self):
+        Base.__init__(self)
+        self.model = WeatherModel()
+        self.day = 0
+        self.__totals = {}
+
+    @classmethod
+    def register(cls, name="Weather"):
+        """Registers the class as a system
+
+        Args:
+            name: The name under which the class should be registered
+
+        Returns:
+            True if the system was registered, False if not.
+        """
+        return super(Weather, cls).register(name)
+
+    def get_totals(self, grid):
+        """Returns the running totals of the weather of a field
+
+        Args:
+
+            grid: The grid of the field
+
+        Returns:
+            The pixel_farm.weather.WeatherTotals of the field
+        """
+        totals = self.__totals.get(grid.name)
+        if totals is None or totals.grid is not grid or (
+                totals.model is not self.model):
+            totals = self.__totals[grid.name] = WeatherTotals(self.model,
+                                                              grid)
+        return totals
+
+    def cell_input(self, grid, index, offset):
+        """Returns the sun and rain a cell gets each day
+
+        Args:
+
+            grid: The grid of the field
+
+            index: The index of the cell in the grid
+
+            offset: The first day, relative to the next day that will be
+            applied
+
+        Returns:
+            The pixel_farm.field_input.DailyInput of the cell
+        """
+        return DailyInput(sources=((self.get_totals(grid),
+                                    self.model.region(grid, index),
+                                    self.day + offset),))
+
+    def apply_day(self):
+        """Adds the sun and rain of the next day to the fields
+
+        Returns:
+            True if any dry cell got wet, False if not.
+        """
+        return self.apply_days(1)
+
+    def apply_days(self, days):
+        """Adds the sun and rain of the next days to the fields at once
+
+        Args:
+
+            days: The number of days
+
+        Returns:
+            True if any dry cell got wet, False if not.
+        """
+        fields_system = self.world.systems.fields
+        wet = False
+        for grid in fields_system.grids.values():
+            wetted = self.model.apply(self.day, grid, days)
+            fields_system.mark_grid_changed(grid)
+            if wetted:
+                fields_system.mark_cells_dirty(grid, wetted)
+                wet = True
+        self.day += days
+        return wet
+
+    def step(self, dt):
+        Base.step(self, dt)
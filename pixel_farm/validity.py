@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""The cells of a field an action can be used on
+
+.. module:: validity
+    :synopsis: The cells of a field an action can be used on
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+
+class ValidityMap(object):
+    """Bitsets of the cells of a grid an action can be used on
+
+    The bitsets are computed once and then updated one cell at a time, when
+    the cell changed.
+
+    Parameters
+    ----------
+    grid : pixel_farm.field_grid.FieldGrid
+        The grid of the field
+    action : type
+        The action class. Its valid_bits is used to compute the bitsets and
+        its cell_valid to update a cell.
+
+    Attributes
+    ----------
+    grid : pixel_farm.field_grid.FieldGrid
+        The grid of the field
+    action : type
+        The action class
+    rows : list[int]
+        The bitset of each row, in which bit n is set if the action can be
+        used on the cell in column n
+    """
+
+    def __init__(self, grid, action):
+        self.grid = grid
+        self.action = action
+        self.rows = [action.valid_bits(grid, row) for row in range(grid.rows)]
+
+    def row_bits(self, row):
+        """Returns the bitset of a row
+
+        Parameters
+        ----------
+        row : int
+            The row
+
+        Returns
+        -------
+        int
+        """
+        return self.rows[row]
+
+    def is_valid(self, row, col):
+        """Whether the action can be used on a cell
+
+        Parameters
+        ----------
+        row, col : int
+            The row and column of the cell
+
+        Returns
+        -------
+        bool
+        """
+        return bool(self.rows[row] >> col & 1)
+
+    def update(self, row, col):
+        """Updates the bit of a cell after it changed
+
+        Parameters
+        ----------
+        row, col : int
+            The row and column of the cell
+        """
+        grid = self.grid
+        if (grid.occupied[grid.index(row, col)] and
+                self.action.cell_valid(grid.cell(row, col))):
+            self.rows[row] |= 1 << col
+        else:
+            self.rows[row] &= ~(1 << col)
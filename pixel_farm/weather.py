@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""The daily sun and rain
+
+The weather of a day only depends on the seed and the day, so it is the
+same every time a day is simulated and it is known in advance.
+
+.. module:: weather
+    :synopsis: The daily sun and rain
+
+.. moduleauthor:: Karsten Bock <KarstenBock@gmx.net>
+"""
+
+import random
+from array import array
+from itertools import compress
+from operator import and_, mul, not_
+
+
+class WeatherModel(object):
+    """Produces the sun and rain of each day
+
+    Parameters
+    ----------
+    seed : int
+        The seed of the weather
+    max_sun : int
+        The sun of a day without clouds
+    rain_chance : float
+        The chance that it rains on a day or in a region
+    rain : int
+        The water that rain gives
+    region_size : int
+        The number of rows and columns of a cloud region. Each region of a
+        field gets its own clouds and rain. The whole field has the same
+        weather if this is 0.
+
+    Attributes
+    ----------
+    seed : int
+        The seed of the weather
+    max_sun : int
+        The sun of a day without clouds
+    rain_chance : float
+        The chance that it rains on a day or in a region
+    rain : int
+        The water that rain gives
+    region_size : int
+        The number of rows and columns of a cloud region
+    """
+
+    def __init__(self, seed=0, max_sun=2, rain_chance=0.3, rain=1,
+                 region_size=0):
+        self.seed = seed
+        self.max_sun = max_sun
+        self.rain_chance = rain_chance
+        self.rain = rain
+        self.region_size = region_size
+
+    def _random(self, day, name=""):
+        """Returns the random generator of a day and field"""
+        return random.Random("%s:%d:%s" % (self.seed, day, name))
+
+    def _region_weather(self, generator):
+        """Returns the sun and rain of a region"""
+        clouds = generator.randint(0, self.max_sun)
+        if generator.random() < self.rain_chance:
+            return self.max_sun - clouds, self.rain
+        return self.max_sun - clouds, 0
+
+    def daily(self, day):
+        """Returns the weather of a day, which is the same on all fields
+        without regions
+
+        Parameters
+        ----------
+        day : int
+            The day
+
+        Returns
+        -------
+        sun : int
+            The sun of the day
+        rain : int
+            The water the rain gives
+        """
+        return self._region_weather(self._random(day))
+
+    def region_count(self, grid):
+        """Returns the number of cloud regions of a field
+
+        Parameters
+        ----------
+        grid : pixel_farm.field_grid.FieldGrid
+            The grid of the field
+
+        Returns
+        -------
+        int
+        """
+        size = self.region_size
+        if size <= 0:
+            return 1
+        return (((grid.rows + size - 1) // size) *
+                ((grid.cols + size - 1) // size))
+
+    def region(self, grid, index):
+        """Returns the cloud region of a cell
+
+        Parameters
+        ----------
+        grid : pixel_farm.field_grid.FieldGrid
+            The grid of the field
+        index : int
+            The index of the cell in the grid
+
+        Returns
+        -------
+        int
+            The index of the region, row by row
+        """
+        size = self.region_size
+        if size <= 0:
+            return 0
+        row, col = divmod(index, grid.cols)
+        region_cols = (grid.cols + size - 1) // size
+        return row // size * region_cols + col // size
+
+    def regions(self, day, grid):
+        """Returns the sun and rain of each cloud region of a field
+
+        Parameters
+        ----------
+        day : int
+            The day
+        grid : pixel_farm.field_grid.FieldGrid
+            The grid of the field
+
+        Returns
+        -------
+        list[tuple[int]]
+            The sun and rain of each region, row by row
+        """
+        if self.region_size <= 0:
+            return [self.daily(day)]
+        generator = self._random(day, grid.name)
+        return [self._region_weather(generator)
+                for _ in range(self.region_count(grid))]
+
+    def _expand(self, grid, regions):
+        """Returns the sun and rain of each cell from the ones of the
+        regions"""
+        size = self.region_size
+        if size <= 0:
+            sun, rain = regions[0]
+            cells = len(grid)
+            return array("l", [sun]) * cells, array("l", [rain]) * cells
+        region_cols = (grid.cols + size - 1) // size
+        sun_cells = array("l")
+        rain_cells = array("l")
+        for start in range(0, len(regions), region_cols):
+            sun_line = array("l")
+            rain_line = array("l")
+            for sun, rain in regions[start:start + region_cols]:
+                sun_line.extend(array("l", [sun]) * size)
+                rain_line.extend(array("l", [rain]) * size)
+            del sun_line[grid.cols:]
+            del rain_line[grid.cols:]
+            rows = min(size, grid.rows - start // region_cols * size)
+            sun_cells.extend(sun_line * rows)
+            rain_cells.extend(rain_line * rows)
+        return sun_cells, rain_cells
+
+    def cloud_map(self, day, grid):
+        """Returns the sun and rain of each cell of a field
+
+        Parameters
+        ----------
+        day : int
+            The day
+        grid : pixel_farm.field_grid.FieldGrid
+            The grid of the field
+
+        Returns
+        -------
+        sun : array.array
+            The sun of each cell
+        rain : array.array
+            The water of each cell
+        """
+        return self._expand(grid, self.regions(day, grid))
+
+    def apply(self, day, grid, days=1):
+        """Adds the sun and rain of a number of days to the cells of a field
+        that have no plant. The crops get the weather through
+        WeatherTotals instead.
+
+        Parameters
+        ----------
+        day : int
+            The first day
+        grid : pixel_farm.field_grid.FieldGrid
+            The grid of the field
+        days : int
+            The number of days
+
+        Returns
+        -------
+        list[int]
+            The indices of the cells that were dry and got rain
+        """
+        regions = [[0, 0] for _ in range(self.region_count(grid))]
+        for cur_day in range(day, day + days):
+            for total, (sun, rain) in zip(regions, self.regions(cur_day,
+                                                                grid)):
+                total[0] += sun
+                total[1] += rain
+        mask = grid.unplanted()
+        if self.region_size <= 0:
+            sun, rain = regions[0]
+            wetted = []
+            if rain:
+                wetted = list(compress(range(len(grid)),
+                                       map(and_, mask, map(not_, grid.water))))
+                grid.add_scalar("water", rain, mask)
+            if sun:
+                grid.add_scalar("sun", sun, mask)
+            return wetted
+        sun_cells, rain_cells = self._expand(grid, regions)
+        wetted = list(compress(range(len(grid)), map(
+            and_, map(bool, map(mul, mask, rain_cells)),
+            map(not_, grid.water))))
+        grid.add_cells("sun", sun_cells, mask)
+        grid.add_cells("water", rain_cells, mask)
+        return wetted
+
+
+class WeatherTotals(object):
+    """Running totals of the rain and sun of each cloud region of a field
+
+    The totals are computed as far as they are asked for.
+
+    Parameters
+    ----------
+    model : WeatherModel
+        The model that produces the weather
+    grid : pixel_farm.field_grid.FieldGrid
+        The grid of the field
+
+    Attributes
+    ----------
+    model : WeatherModel
+        The model that produces the weather
+    grid : pixel_farm.field_grid.FieldGrid
+        The grid of the field
+    days : int
+        The number of days the totals cover
+    """
+
+    def __init__(self, model, grid):
+        self.model = model
+        self.grid = grid
+        count = model.region_count(grid)
+        self.__water = [array("l", [0]) for _ in range(count)]
+        self.__sun = [array("l", [0]) for _ in range(count)]
+        self.days = 0
+
+    def extend(self, days):
+        """Computes the totals up to a day
+
+        Parameters
+        ----------
+        days : int
+            The number of days the totals should cover
+        """
+        while self.days < days:
+            regions = self.model.regions(self.days, self.grid)
+            for water, sun, (day_sun, day_rain) in zip(self.__water,
+                                                       self.__sun, regions):
+                water.append(water[-1] + day_rain)
+                sun.append(sun[-1] + day_sun)
+            self.days += 1
+
+    def between(self, region, start, end):
+        """Returns the rain and sun of a region from a day to another. Days
+        before day 0 have no weather.
+
+        Parameters
+        ----------
+        region : int
+            The index of the region
+        start, end : int
+            The first day and the day after the last one
+
+        Returns
+        -------
+        water, sun : int
+            The rain and sun of the days
+        """
+        start = max(start, 0)
+        end = max(end, 0)
+        self.extend(end)
+        water = self.__water[region]
+        sun = self.__sun[region]
+        return water[end] - water[start], sun[end] - sun[start]